@@ -3,6 +3,9 @@ ASGI config for assignment project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Set ASYNC_VIEWS=True when serving the application through this file to use the async versions of the
+read only pages and the live ticket events stream, see myapp/async_views.py and the README.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -23,8 +23,10 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 from django.contrib.messages import constants as messages
+from django.core.exceptions import ImproperlyConfigured
 import dj_database_url
 import os
+import tempfile
 
 MESSAGE_TAGS = {
     messages.ERROR: "danger",
@@ -60,6 +62,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the time taken by the other middleware is included in the metrics
+    "myapp.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -90,13 +94,89 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "assignment.wsgi.application"
 
+# Serve the read only pages with the async views in myapp/async_views.py. Only enable this when the
+# application is run through asgi.py, under WSGI the async views would each need their own event loop.
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS", "False").lower() == "true"
+
+# Run background jobs, such as deleting a Status or Ticket Type with many tickets, in the request that
+# queues them rather than with `manage.py run_worker`. Used by the tests.
+BACKGROUND_TASKS_EAGER = (
+    os.environ.get("BACKGROUND_TASKS_EAGER", "False").lower() == "true"
+)
+
+# How long deleted tickets are remembered for the ticket changes API. A client that has not checked for
+# changes for longer than this must load every ticket again.
+TOMBSTONE_RETENTION_DAYS = int(os.environ.get("TOMBSTONE_RETENTION_DAYS", "30"))
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 DATABASES = {}
 
 database_url = os.environ.get("DATABASE_URL")
-DATABASES["default"] = dj_database_url.parse(database_url)
+
+# Database connections are kept open between requests for DATABASE_CONN_MAX_AGE seconds, and checked
+# before reuse so a connection closed by the database server is replaced rather than causing an error.
+# Under ASGI each request runs in a new thread, which cannot reuse a persistent connection, so they are
+# disabled by default when the async views are used. Use a connection pooler such as PgBouncer instead.
+DATABASE_CONN_MAX_AGE = int(
+    os.environ.get("DATABASE_CONN_MAX_AGE", "0" if ASYNC_VIEWS else "600")
+)
+DATABASE_CONN_HEALTH_CHECKS = (
+    os.environ.get("DATABASE_CONN_HEALTH_CHECKS", "True").lower() == "true"
+)
+
+DATABASES["default"] = dj_database_url.parse(
+    database_url,
+    conn_max_age=DATABASE_CONN_MAX_AGE,
+    conn_health_checks=DATABASE_CONN_HEALTH_CHECKS,
+)
+
+# Set DATABASE_POOLER=pgbouncer when connecting through PgBouncer in transaction pooling mode. Server side
+# cursors do not work through a transaction pooler, so chunked reads (such as the ticket export) fall
+# back to client side cursors.
+if os.environ.get("DATABASE_POOLER", "").lower() == "pgbouncer":
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# CACHE_BACKEND selects where cached data is stored:
+#   locmem - In the memory of each process (default). Changes made through one process are not seen by
+#            the others until their entries expire, so use file or redis with more than one worker
+#   file   - In files under CACHE_LOCATION, shared by the processes on one machine
+#   redis  - In a Redis compatible server at CACHE_LOCATION, shared by all processes. Requires `redis`
+CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "assignment"),
+    "file": (
+        "django.core.cache.backends.filebased.FileBasedCache",
+        os.path.join(tempfile.gettempdir(), "assignment_cache"),
+    ),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://127.0.0.1:6379"),
+}
+
+cache_backend = os.environ.get("CACHE_BACKEND", "locmem").lower()
+if cache_backend not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f"CACHE_BACKEND must be one of {', '.join(CACHE_BACKENDS)}, not {cache_backend}"
+    )
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[cache_backend][0],
+        "LOCATION": os.environ.get("CACHE_LOCATION", CACHE_BACKENDS[cache_backend][1]),
+        "TIMEOUT": int(os.environ.get("CACHE_TIMEOUT", "300")),
+        "KEY_PREFIX": "assignment",
+    }
+}
+
+# Metrics
+# Each process writes its request metrics to a file in METRICS_DIR, which the /metrics page adds up. All
+# processes on a machine must share the directory, which should be emptied when the webpage is deployed.
+# Admin users can view /metrics, as can a Prometheus server sending "Authorization: Bearer <METRICS_TOKEN>".
+METRICS_DIR = os.environ.get(
+    "METRICS_DIR", os.path.join(tempfile.gettempdir(), "assignment_metrics")
+)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -25,28 +25,45 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
-from myapp import views
+from myapp import views, async_views
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 
 app_name = "myapp"
 
+# The read only pages are served by their async versions when running under ASGI
+read_views = async_views if settings.ASYNC_VIEWS else views
+
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("", views.HomePage, name="Home"),
+    path("", read_views.HomePage, name="Home"),
     path("register/", views.RegisterPage, name="Register"),
     path("login/", views.LoginPage, name="Login"),
     path("logout/", views.LogoutPage, name="Logout"),
     path("create_ticket/", views.CreateTicketPage, name="Create Ticket"),
     path("create_status/", views.CreateStatusPage, name="Create Status"),
     path("create_ticket_type/", views.CreateTicketTypePage, name="Create Ticket Type"),
-    path("view_tickets/", views.ViewTickets, name="View Tickets"),
-    path("view_ticket/<int:id>", views.ViewTicket, name="View Ticket"),
-    path("view_statuses/", views.ViewStatuses, name="View Statuses"),
-    path("view_status/<str:status_name>", views.ViewStatus, name="View Status"),
-    path("view_types/", views.ViewTypes, name="View Types"),
-    path("view_type/<str:type_name>", views.ViewType, name="View Type"),
+    path("view_tickets/", read_views.ViewTickets, name="View Tickets"),
+    path("view_ticket/<int:id>", read_views.ViewTicket, name="View Ticket"),
+    path("search_tickets/", views.SearchTickets, name="Search Tickets"),
+    path("export_tickets/", views.ExportTickets, name="Export Tickets"),
+    path("ticket_changes/", views.TicketChanges, name="Ticket Changes"),
+    path(
+        "assignee_autocomplete/",
+        views.AssigneeAutocomplete,
+        name="Assignee Autocomplete",
+    ),
+    path(
+        "bulk_update_tickets/",
+        views.BulkUpdateTicketsPage,
+        name="Bulk Update Tickets",
+    ),
+    path("view_statuses/", read_views.ViewStatuses, name="View Statuses"),
+    path("view_status/<str:status_name>", read_views.ViewStatus, name="View Status"),
+    path("view_types/", read_views.ViewTypes, name="View Types"),
+    path("view_type/<str:type_name>", read_views.ViewType, name="View Type"),
     path("update_ticket/<int:id>", views.UpdateTicket, name="Update Ticket"),
     path(
         "update_status/<str:status_name>", views.UpdateStatusPage, name="Update Status"
@@ -55,7 +72,18 @@ urlpatterns = [
     path("delete_ticket/<int:id>", views.DeleteTicket, name="Delete Ticket"),
     path("delete_status/<str:status_name>", views.DeleteStatus, name="Delete Status"),
     path("delete_type/<str:type_name>", views.DeleteTicketType, name="Delete Type"),
+    path("view_deletion/<int:id>", views.ViewDeletion, name="View Deletion"),
+    path("view_jobs/", views.ViewJobs, name="View Jobs"),
+    path("view_job/<int:id>", views.ViewJob, name="View Job"),
     path("readme/", views.ReadmePage, name="Readme"),
+    path("metrics", views.Metrics, name="Metrics"),
 ]
 
+if settings.ASYNC_VIEWS:
+    # The ticket events stream holds its connection open, which a WSGI worker cannot do without being
+    # blocked, so it is only served under ASGI
+    urlpatterns.append(
+        path("ticket_events/", async_views.TicketEvents, name="Ticket Events")
+    )
+
 urlpatterns += staticfiles_urlpatterns()
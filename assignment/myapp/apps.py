@@ -1,11 +1,11 @@
 """
 Program:  Web Based Database Application
-Filename: apps.py            
-@author:  © Jack Styles             
-Course:   BSc Digital Technology Solutions                     
-Module:   Software Engineering and Agile             
-Tutor:    Suraksha Neupane                         
-@version: 1.0     
+Filename: apps.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
 Date:     22/09/23
 """
 
@@ -15,3 +15,14 @@ from django.apps import AppConfig
 class MyappConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "myapp"
+
+    def ready(self):
+        """
+        Connects the signal handlers of the application once the models are loaded, and the recording
+        of query metrics to each database connection as it is opened
+        """
+        from . import signals  # noqa: F401
+        from django.db.backends.signals import connection_created
+        from .metrics import install_query_recorder
+
+        connection_created.connect(install_query_recorder)
@@ -0,0 +1,417 @@
+"""
+Program:  Web Based Database Application
+Filename: async_views.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+"""
+Async versions of the read only pages in `views.py`, used when the application is served through
+`asgi.py` with ASYNC_VIEWS enabled. Database queries use Django's async ORM API, so a request waiting on
+the database does not hold a worker thread.
+
+Loading the session and user, reading the cache, validating forms that query the database and rendering
+templates that query the database are not async in Django 4.2, so these steps are run with
+`sync_to_async`. Every other template is given fully loaded data, so it can be rendered directly.
+"""
+
+import asyncio
+import functools
+import time
+from urllib.parse import urlencode
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.models import User
+from django.contrib.auth.views import redirect_to_login
+from django.http import StreamingHttpResponse
+from django.shortcuts import render, redirect
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from .changes import (
+    MAX_CHANGES_LIMIT,
+    CursorExpired,
+    get_latest_cursor,
+    get_ticket_changes,
+)
+from .events import (
+    EVENTS_HEARTBEAT,
+    RESET_EVENT,
+    broadcaster,
+    change_event,
+    format_event,
+    position_event,
+)
+from .pagination import apaginate, clean_sort
+from .views import (
+    annotate_can_update,
+    can_user_update,
+    can_user_update_ticket,
+    filter_ticket_list,
+    get_cached_status,
+    get_cached_statuses,
+    get_cached_ticket_counts,
+    get_cached_type,
+    get_cached_types,
+    get_home_tickets,
+    get_page_validators,
+    get_status_version,
+    get_ticket_detail_queryset,
+    get_ticket_list_context,
+    get_ticket_list_queryset,
+    get_ticket_list_version,
+    get_ticket_version,
+    get_type_version,
+)
+
+# Seconds a browser stays connected to the ticket events stream before it is closed, after which the
+# browser reconnects from the last event it received. Django 4.2 does not notice a browser disconnecting
+# while a response is streamed, so this also bounds how long a closed connection is kept.
+EVENTS_STREAM_SECONDS = 300
+# Milliseconds the browser waits before reconnecting
+EVENTS_RETRY_MS = 3000
+
+
+async def aload_user(request):
+    """
+    Loads the user of the request. The session and user are loaded by the database on first use of
+    `request.user`, which is done in a thread as it is not async in Django 4.2. The loaded user is kept
+    on the request, so it can be used by the view and templates afterwards.
+
+    Parameters:
+        request: The webpage request
+
+    Returns:
+        (User): The user of the request, or an AnonymousUser
+    """
+
+    def load_user():
+        # Checking the user forces the lazily loaded user to be fetched
+        request.user.is_authenticated
+        return request.user
+
+    return await sync_to_async(load_user)()
+
+
+def async_login_required(view):
+    """
+    Async equivalent of `login_required(login_url="/login")`
+
+    Parameters:
+        view: The async view to protect
+
+    Returns:
+        : The wrapped view
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aload_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path(), "/login")
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def async_conditional_page(get_version):
+    """
+    Async equivalent of `views.conditional_page`, as `condition` and `cache_control` do not support
+    async views in Django 4.2
+
+    Parameters:
+        get_version: See `views.get_page_validators`
+
+    Returns:
+        : The decorator for the async view
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            etag, last_modified = None, None
+            if request.method in ("GET", "HEAD"):
+                # Reading the messages and the version of the page may query the database
+                etag, last_modified = await sync_to_async(get_page_validators)(
+                    request, get_version, *args, **kwargs
+                )
+            if etag is not None:
+                etag = quote_etag(etag)
+            if last_modified is not None:
+                last_modified = int(last_modified.timestamp())
+
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = await view(request, *args, **kwargs)
+                if request.method in ("GET", "HEAD"):
+                    if last_modified is not None and not response.has_header(
+                        "Last-Modified"
+                    ):
+                        response.headers["Last-Modified"] = http_date(last_modified)
+                    if etag is not None:
+                        response.headers.setdefault("ETag", etag)
+
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+async def aget_reporter_names(objects) -> dict:
+    """
+    Async version of `views.get_reporter_names`
+    """
+    reporter_ids = {obj.reporter_id for obj in objects}
+    return {
+        user_id: username
+        async for user_id, username in User.objects.filter(
+            id__in=reporter_ids
+        ).values_list("id", "username")
+    }
+
+
+async def HomePage(request):
+    """
+    Async version of `views.HomePage`
+    """
+    user = await aload_user(request)
+
+    if user.is_authenticated:
+        # The cache API is not async in Django 4.2, and the tickets are queried on a cache miss
+        home_tickets = await sync_to_async(get_home_tickets)(user.id)
+
+        return render(
+            request,
+            "myapp/home.html",
+            context={
+                "tickets": home_tickets["tickets"] or None,
+                "more_tickets_query": home_tickets["has_more"]
+                and urlencode({"assignee": user.username}),
+            },
+        )
+    return render(request, "myapp/home.html")
+
+
+@async_login_required
+@async_conditional_page(get_ticket_list_version)
+async def ViewTickets(request):
+    """
+    Async version of `views.ViewTickets`
+    """
+    sort = clean_sort(request.GET.get("sort"))
+
+    # Validating the status and type filters queries the database
+    tickets, filter_form = await sync_to_async(filter_ticket_list)(
+        request, annotate_can_update(get_ticket_list_queryset(), request.user)
+    )
+    if not filter_form.is_valid():
+        messages.error(request, "Invalid filter, showing all tickets.")
+
+    try:
+        page = await apaginate(
+            tickets,
+            sort=sort,
+            after=request.GET.get("after"),
+            before=request.GET.get("before"),
+        )
+    except ValueError as e:
+        messages.error(request, message=f"Error: {e}")
+        return redirect("View Tickets")
+
+    reporters = await aget_reporter_names(page.items)
+    context = get_ticket_list_context(request, page, sort, filter_form, reporters)
+
+    # The filter and bulk update forms query the statuses and types while they are rendered
+    return await sync_to_async(render)(request, "myapp/display_tickets.html", context)
+
+
+@async_login_required
+@async_conditional_page(get_ticket_version)
+async def ViewTicket(request, id: int):
+    """
+    Async version of `views.ViewTicket`
+    """
+    try:
+        ticket = await get_ticket_detail_queryset().aget(ticket_id=id)
+    except Exception as e:
+        messages.error(request, message=f"Error: {e}")
+        return redirect("View Tickets")
+
+    return render(
+        request,
+        "myapp/display_ticket.html",
+        {"ticket": ticket, "can_update": can_user_update_ticket(request, ticket)},
+    )
+
+
+@async_login_required
+async def ViewStatuses(request):
+    """
+    Async version of `views.ViewStatuses`
+    """
+    # The cache API is not async in Django 4.2, and the statuses are queried on a cache miss
+    statuses, reporters = await sync_to_async(get_cached_statuses)()
+    counts = (await sync_to_async(get_cached_ticket_counts)())["statuses"]
+
+    items = [
+        {
+            "status_name": status.status_name,
+            "reporter": reporters.get(status.reporter_id, "None"),
+            "is_closed": status.is_closed,
+            "tickets": counts.get(status.status_name, 0),
+            "open_tickets": (
+                0 if status.is_closed else counts.get(status.status_name, 0)
+            ),
+            "can_update": can_user_update(request, status),
+        }
+        for status in statuses
+    ]
+    return render(request, "myapp/display_statuses.html", {"items": items})
+
+
+@async_login_required
+@async_conditional_page(get_status_version)
+async def ViewStatus(request, status_name):
+    """
+    Async version of `views.ViewStatus`
+    """
+    try:
+        status = await sync_to_async(get_cached_status)(status_name)
+    except Exception as e:
+        messages.error(request, message=f"Error: {e}")
+        return redirect("View Statuses")
+
+    return render(
+        request,
+        "myapp/display_status.html",
+        {"status": status, "can_update": can_user_update(request, status)},
+    )
+
+
+@async_login_required
+async def ViewTypes(request):
+    """
+    Async version of `views.ViewTypes`
+    """
+    ticket_types, reporters = await sync_to_async(get_cached_types)()
+    counts = (await sync_to_async(get_cached_ticket_counts)())["types"]
+
+    items = [
+        {
+            "type_name": ticket_type.type_name,
+            "reporter": reporters.get(ticket_type.reporter_id, "None"),
+            "tickets": counts.get(ticket_type.type_name, (0, 0))[0],
+            "open_tickets": counts.get(ticket_type.type_name, (0, 0))[1],
+            "can_update": can_user_update(request, ticket_type),
+        }
+        for ticket_type in ticket_types
+    ]
+    return render(request, "myapp/display_types.html", {"items": items})
+
+
+@async_login_required
+@async_conditional_page(get_type_version)
+async def ViewType(request, type_name):
+    """
+    Async version of `views.ViewType`
+    """
+    try:
+        type = await sync_to_async(get_cached_type)(type_name)
+    except Exception as e:
+        messages.error(request, message=f"Error: {e}")
+        return redirect("View Types")
+
+    return render(
+        request,
+        "myapp/display_type.html",
+        {"type": type, "can_update": can_user_update(request, type)},
+    )
+
+
+async def ticket_event_stream(cursor: str):
+    """
+    Sends the ticket events to a browser, first the changes since `cursor` if it reconnected, then the
+    events published while it is connected, see `events.py`
+
+    Parameters:
+        cursor (str): The id of the last event the browser received, or None
+
+    Yields:
+        (str): The server-sent events
+    """
+    queue = broadcaster.subscribe()
+    try:
+        yield f"retry: {EVENTS_RETRY_MS}\n\n"
+
+        sent = set()
+        if cursor:
+            try:
+                changes = await sync_to_async(get_ticket_changes)(
+                    cursor, MAX_CHANGES_LIMIT
+                )
+            except (CursorExpired, ValueError):
+                changes = None
+
+            if changes is None or changes["has_more"]:
+                # Too much has changed to replay, so the browser loads the tickets again
+                yield format_event(RESET_EVENT)
+                cursor = None
+            else:
+                for change in changes["changes"]:
+                    event = change_event(change)
+                    sent.add(event["key"])
+                    yield format_event(event)
+                yield format_event(position_event(changes["cursor"]))
+
+        if not cursor:
+            yield format_event(position_event(await sync_to_async(get_latest_cursor)()))
+
+        end = time.monotonic() + EVENTS_STREAM_SECONDS
+        while (remaining := end - time.monotonic()) > 0:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), min(EVENTS_HEARTBEAT, remaining)
+                )
+            except asyncio.TimeoutError:
+                # A comment keeps an idle connection from being closed by proxies
+                yield ": keepalive\n\n"
+                continue
+
+            if event["key"] not in sent:
+                yield format_event(event)
+    finally:
+        broadcaster.unsubscribe(queue)
+
+
+@async_login_required
+async def TicketEvents(request):
+    """
+    Streams the tickets created, updated and deleted as server-sent events, for pages that show the
+    tickets to keep them up to date. Each event has the action and the exported fields of the ticket, as
+    listed by the ticket changes API. Every logged in user can see every ticket.
+
+    A browser reconnecting with a Last-Event-ID header is sent the changes it missed, or a reset event if
+    it must load the tickets again. The cursor of the ticket changes API can be passed as `cursor` to
+    start from it.
+
+    Parameters:
+        request: The webpage request
+
+    Returns:
+        (StreamingHttpResponse): The event stream
+    """
+    cursor = request.headers.get("Last-Event-ID") or request.GET.get("cursor")
+    response = StreamingHttpResponse(
+        ticket_event_stream(cursor), content_type="text/event-stream"
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    # Stops proxies such as nginx holding back the events until their buffer is full
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
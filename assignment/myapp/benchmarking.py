@@ -0,0 +1,129 @@
+"""
+Program:  Web Based Database Application
+Filename: benchmarking.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+import math
+import time
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.urls import URLPattern, get_resolver
+
+
+def percentile(values: list, pct: float) -> float:
+    """
+    Calculates a percentile of a list of values using the nearest rank method
+
+    Parameters:
+        values (list): The values
+        pct (float): The percentile to calculate, between 0 and 100
+
+    Returns:
+        (float): The value at the percentile, 0 if there are no values
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarise(latencies: list) -> dict:
+    """
+    Summarises request latencies
+
+    Parameters:
+        latencies (list): The latency of each request in seconds
+
+    Returns:
+        (dict): The number of requests and the mean, p50, p95 and p99 latency in milliseconds
+    """
+    return {
+        "requests": len(latencies),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def get_request_host() -> str:
+    """
+    Returns:
+        (str): A host allowed by ALLOWED_HOSTS, to send benchmark requests to
+    """
+    return next(
+        (host for host in settings.ALLOWED_HOSTS if host and "*" not in host),
+        "localhost",
+    ).lstrip(".")
+
+
+def list_routes() -> list:
+    """
+    Lists the named routes of the site, skipping included URL configurations such as the admin site
+
+    Returns:
+        (list): The name of each route and the names of the arguments in its path
+    """
+    return [
+        (pattern.name, list(pattern.pattern.converters))
+        for pattern in get_resolver().url_patterns
+        if isinstance(pattern, URLPattern) and pattern.name
+    ]
+
+
+class WSGIRequester:
+    """
+    Sends requests straight to the WSGI application, without a web server. Unlike the Django test
+    client, this goes through the full request cycle including the request_started and request_finished
+    signals, which is where Django opens and closes database connections.
+    """
+
+    def __init__(self, cookies: str = ""):
+        self.handler = WSGIHandler()
+        self.cookies = cookies
+        self.host = get_request_host()
+
+    def get(self, path: str) -> tuple:
+        """
+        Sends a GET request
+
+        Parameters:
+            path (str): The path and query string to request
+
+        Returns:
+            status (str): The status line of the response
+            elapsed (float): The time taken to handle the request, in seconds
+        """
+        path, _, query = path.partition("?")
+        environ = {
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "HTTP_HOST": self.host,
+            "SERVER_NAME": self.host,
+            "HTTP_COOKIE": self.cookies,
+            "wsgi.input": BytesIO(),
+        }
+        setup_testing_defaults(environ)
+        result = {}
+
+        def start_response(status, headers, exc_info=None):
+            result["status"] = status
+
+        start = time.perf_counter()
+        response = self.handler(environ, start_response)
+        try:
+            for _ in response:
+                pass
+        finally:
+            # Closing the response sends request_finished
+            response.close()
+        return result["status"], time.perf_counter() - start
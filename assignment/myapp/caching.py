@@ -0,0 +1,250 @@
+"""
+Program:  Web Based Database Application
+Filename: caching.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+"""
+Cached reference data (Statuses and TicketTypes) is stored under keys containing a version number,
+which is held in the cache itself. Changing a Status or TicketType increments the version, so every
+process stops using the old entries at once, and the old entries expire on their own. This needs a cache
+shared by every process: with the `locmem` backend each process holds its own version, which the other
+processes never see increment, so their entries are only replaced once they expire.
+
+The ticket list has a deletions version held in the cache the same way, which is incremented whenever
+tickets are deleted, as deleting a ticket does not change the modification time of any other.
+
+The ticket counts of the Statuses and TicketTypes are cached together, and deleted whenever a count
+changes.
+
+The tickets on the home page of each user are cached under a key for that user, which is deleted when a
+ticket assigned to or unassigned from them changes.
+
+The choices of the Status and TicketType form fields are also kept in the memory of each process, as
+they are needed by every ticket form. These are tagged with the version they were built at, and are
+rebuilt once the shared version changes, or after REFERENCE_CHOICES_TTL when the version is not shared.
+"""
+
+import hashlib
+import time
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+
+REFERENCE_VERSION_KEY = "reference_data_version"
+TICKET_DELETIONS_VERSION_KEY = "ticket_deletions_version"
+TICKET_COUNTS_KEY = "ticket_counts"
+
+# The most seconds a process keeps a list of choices, so an entry created through another process is
+# offered even when the cache is not shared and the version change is never seen
+REFERENCE_CHOICES_TTL = 30.0
+
+# Maps the name of a list of choices to the version and time it was built at and the choices
+_local_choices = {}
+
+
+def _get_version(key: str) -> int:
+    """
+    Gets a version number held in the cache, starting it if it is not held
+    """
+    version = cache.get(key)
+
+    if version is None:
+        # Starting from the current time means a version that was evicted from the cache is never reused,
+        # which could otherwise bring back entries cached under it
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def _bump_version(key: str):
+    """
+    Moves a version number held in the cache to a new version
+    """
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The version is not in the cache, so there is nothing cached under it to invalidate
+        _get_version(key)
+
+
+def get_reference_version() -> int:
+    """
+    Gets the current version of the reference data
+
+    Returns:
+        (int): The version number
+    """
+    return _get_version(REFERENCE_VERSION_KEY)
+
+
+def bump_reference_version():
+    """
+    Invalidates all cached reference data, by moving to a new version
+    """
+    _bump_version(REFERENCE_VERSION_KEY)
+
+
+def get_ticket_deletions_version() -> int:
+    """
+    Gets the current version of the deleted tickets
+
+    Returns:
+        (int): The version number
+    """
+    return _get_version(TICKET_DELETIONS_VERSION_KEY)
+
+
+def bump_ticket_deletions_version():
+    """
+    Records that tickets have been deleted, by moving to a new version
+    """
+    _bump_version(TICKET_DELETIONS_VERSION_KEY)
+
+
+def reference_cache_key(*parts) -> str:
+    """
+    Builds the cache key for an item of reference data at the current version. The parts are hashed, as
+    Status and TicketType names can contain characters that are not valid in all cache backends.
+
+    Parameters:
+        *parts: The values identifying the item
+
+    Returns:
+        (str): The cache key
+    """
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f"reference:{get_reference_version()}:{digest}"
+
+
+def get_reference_data(name: str, build, *parts):
+    """
+    Gets an item of reference data from the cache, building and caching it if it is not cached
+
+    Parameters:
+        name (str): The name of the item
+        build: Function returning the item when it is not cached
+        *parts: Any values identifying the item, such as the name of a Status
+
+    Returns:
+        : The item
+    """
+    return cache.get_or_set(reference_cache_key(name, *parts), build)
+
+
+def get_reference_choices(name: str, build) -> list:
+    """
+    Gets a list of choices from the memory of this process, building it if it is not held, was built
+    at an older version of the reference data, or is older than REFERENCE_CHOICES_TTL. Only the version
+    is read from the shared cache.
+
+    Parameters:
+        name (str): The name of the list of choices
+        build: Function returning the choices when they are not held
+
+    Returns:
+        (list): The choices
+    """
+    # The version is read before building, so a change made while building causes another rebuild
+    version = get_reference_version()
+    now = time.monotonic()
+    held = _local_choices.get(name)
+    if (
+        held is not None
+        and held[0] == version
+        and now - held[1] < REFERENCE_CHOICES_TTL
+    ):
+        return held[2]
+
+    choices = build()
+    _local_choices[name] = (version, now, choices)
+    return choices
+
+
+def get_ticket_counts(build) -> dict:
+    """
+    Gets the ticket counts of the Statuses and TicketTypes from the cache, building and caching them if
+    they are not cached
+
+    Parameters:
+        build: Function returning the counts when they are not cached
+
+    Returns:
+        (dict): The counts
+    """
+    return cache.get_or_set(TICKET_COUNTS_KEY, build)
+
+
+def invalidate_ticket_counts():
+    """
+    Removes the cached ticket counts, so they are read from the database again
+    """
+    cache.delete(TICKET_COUNTS_KEY)
+
+
+def dashboard_cache_key(user_id: int) -> str:
+    """
+    Builds the cache key for the tickets on the home page of a user
+
+    Parameters:
+        user_id (int): The id of the user
+
+    Returns:
+        (str): The cache key
+    """
+    return f"dashboard:{user_id}"
+
+
+def get_dashboard(user_id: int, build):
+    """
+    Gets the tickets on the home page of a user from the cache, building and caching them if they are
+    not cached
+
+    Parameters:
+        user_id (int): The id of the user
+        build: Function returning the tickets when they are not cached
+
+    Returns:
+        : The tickets
+    """
+    return cache.get_or_set(dashboard_cache_key(user_id), build)
+
+
+def invalidate_dashboards(user_ids):
+    """
+    Removes the cached home page tickets of users, so they are built again on their next visit
+
+    Parameters:
+        user_ids: The ids of the users, where None (an unassigned ticket) is ignored
+    """
+    keys = [dashboard_cache_key(user_id) for user_id in set(user_ids) if user_id]
+    if keys:
+        cache.delete_many(keys)
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs) -> list:
+    """
+    Warns when the cache is kept in the memory of each process, as changes to the reference data made
+    through one process are then not seen by the others until their cached entries expire
+
+    Returns:
+        (list): The warnings
+    """
+    if settings.CACHES["default"]["BACKEND"].endswith(".LocMemCache"):
+        return [
+            checks.Warning(
+                "The cache is kept in the memory of each process, so changes to Statuses and Ticket "
+                "Types are not seen by the other processes until their cached entries expire.",
+                hint="Set CACHE_BACKEND to file or redis when more than one process serves the "
+                "webpage.",
+                id="myapp.W001",
+            )
+        ]
+    return []
@@ -0,0 +1,158 @@
+"""
+Program:  Web Based Database Application
+Filename: changes.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+"""
+Lists the tickets created, updated or deleted since a cursor, for clients that keep a copy of the tickets
+up to date by polling. Saved tickets are found by their `updated_at` time and deleted tickets by their
+TicketTombstone, both read in order of (time, ticket id) using an index, so each poll only reads the
+rows that changed.
+
+A change is only listed once it is CHANGE_SETTLE_TIME old. `updated_at` is set when a ticket is saved,
+which is before its transaction commits, so a change could otherwise become visible after a client had
+already been given a cursor past it.
+"""
+
+import datetime
+import heapq
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from .export import EXPORT_VALUES, export_row, get_export_queryset
+from .models import Ticket, TicketTombstone
+from .pagination import decode_cursor, encode_cursor
+
+CHANGES_LIMIT = 100
+MAX_CHANGES_LIMIT = 1000
+CHANGE_SETTLE_TIME = datetime.timedelta(seconds=5)
+
+
+class CursorExpired(Exception):
+    """
+    Raised when a cursor is older than the deleted tickets are remembered for
+    """
+
+
+def _after(time_field: str, time: datetime.datetime, ticket_id: int) -> Q:
+    """
+    Builds the filter selecting the rows after a cursor: time > t OR (time = t AND ticket_id > id)
+    """
+    return Q(**{f"{time_field}__gt": time}) | Q(
+        **{time_field: time, "ticket_id__gt": ticket_id}
+    )
+
+
+def change_cursor(time: datetime.datetime, ticket_id: int) -> str:
+    """
+    Builds the cursor pointing at a change
+
+    Parameters:
+        time (datetime): When the ticket was saved or deleted
+        ticket_id (int): The id of the ticket
+
+    Returns:
+        (str): The cursor
+    """
+    return encode_cursor([time.isoformat(), ticket_id])
+
+
+def get_latest_cursor() -> str:
+    """
+    Returns:
+        (str): A cursor pointing at the present, after every change that can currently be listed
+    """
+    return change_cursor(timezone.now() - CHANGE_SETTLE_TIME, 0)
+
+
+def get_ticket_changes(cursor: str = None, limit: int = CHANGES_LIMIT) -> dict:
+    """
+    Lists the tickets changed since a cursor, oldest change first. Without a cursor every ticket is
+    listed, so a client can load the tickets and then keep them up to date with the same cursor.
+
+    Parameters:
+        cursor (str), default=None: The cursor returned by the previous call
+        limit (int), default=CHANGES_LIMIT: The most changes to return
+
+    Returns:
+        (dict): The changes, each with its action ("created", "updated" or "deleted") and the exported
+            fields of the ticket unless it was deleted, the cursor to pass to the next call, and if there
+            are more changes after it
+
+    Raises:
+        ValueError: If the cursor is malformed
+        CursorExpired: If the cursor is older than TOMBSTONE_RETENTION_DAYS
+    """
+    now = timezone.now()
+    settled = now - CHANGE_SETTLE_TIME
+    tickets = Ticket.objects.filter(updated_at__lte=settled)
+    tombstones = TicketTombstone.objects.filter(deleted_at__lte=settled)
+
+    since = None
+    if cursor is not None:
+        try:
+            time, ticket_id = decode_cursor(cursor, [datetime.datetime, int])
+        except ValueError as e:
+            raise ValueError("Invalid changes cursor") from e
+        if timezone.is_naive(time):
+            raise ValueError("Invalid changes cursor")
+
+        if time < now - datetime.timedelta(days=settings.TOMBSTONE_RETENTION_DAYS):
+            raise CursorExpired(
+                "The cursor is too old to list the deleted tickets, load every ticket again"
+            )
+        since = time
+        tickets = tickets.filter(_after("updated_at", time, ticket_id))
+        tombstones = tombstones.filter(_after("deleted_at", time, ticket_id))
+
+    # Reading one more row than the limit from each finds out if there are more changes
+    saved = [
+        (
+            row["updated_at"],
+            row["ticket_id"],
+            "created" if since is None or row["created_at"] > since else "updated",
+            export_row(row),
+        )
+        for row in get_export_queryset(tickets)
+        .order_by("updated_at", "ticket_id")
+        .values(*EXPORT_VALUES, "created_at", "updated_at")[: limit + 1]
+    ]
+    deleted = [
+        (deleted_at, ticket_id, "deleted", None)
+        for deleted_at, ticket_id in tombstones.order_by(
+            "deleted_at", "ticket_id"
+        ).values_list("deleted_at", "ticket_id")[: limit + 1]
+    ]
+    changes = list(heapq.merge(saved, deleted, key=lambda change: change[:2]))
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if changes:
+        time, ticket_id, _, _ = changes[-1]
+        cursor = change_cursor(time, ticket_id)
+    elif cursor is None:
+        # Nothing has changed yet, so the client is given the latest cursor to carry on from, taken at
+        # the time the changes were read up to rather than from `get_latest_cursor`, which could skip
+        # changes made since
+        cursor = change_cursor(settled, 0)
+
+    return {
+        "changes": [
+            {
+                "ticket_id": ticket_id,
+                "changed_at": time,
+                "action": action,
+                "deleted": action == "deleted",
+                "ticket": ticket,
+            }
+            for time, ticket_id, action, ticket in changes
+        ],
+        "cursor": cursor,
+        "has_more": has_more,
+    }
@@ -0,0 +1,144 @@
+"""
+Program:  Web Based Database Application
+Filename: counters.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+"""
+Each Status stores the number of tickets using it, and each TicketType the number of tickets and open
+tickets using it, so the pages listing them do not count the tickets for each row. The counts are
+changed in the same transaction as a ticket is saved or deleted. Changes that do not send signals,
+such as `update()` and `bulk_create()`, recount the affected rows with `recount_ticket_counts`.
+"""
+
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from .caching import invalidate_ticket_counts
+from .models import Ticket, Status, TicketType
+
+
+def adjust_ticket_counts(old: tuple, new: tuple):
+    """
+    Moves a ticket between the counts of Statuses and TicketTypes
+
+    Parameters:
+        old (tuple): The status and type ids the ticket had, None if it has been created
+        new (tuple): The status and type ids the ticket has, None if it has been deleted
+    """
+    if old == new:
+        return
+
+    status_ids = {key[0] for key in (old, new) if key and key[0]}
+    closed = set(
+        Status.objects.filter(pk__in=status_ids, is_closed=True).values_list(
+            "pk", flat=True
+        )
+    )
+
+    for key, change in ((old, -1), (new, 1)):
+        if key is None:
+            continue
+        status_id, type_id = key
+        if status_id:
+            Status.objects.filter(pk=status_id).update(
+                ticket_count=F("ticket_count") + change
+            )
+        if type_id:
+            TicketType.objects.filter(pk=type_id).update(
+                ticket_count=F("ticket_count") + change,
+                open_ticket_count=F("open_ticket_count")
+                + (0 if status_id in closed else change),
+            )
+
+    transaction.on_commit(invalidate_ticket_counts)
+
+
+def subtract_ticket_counts(keys: list):
+    """
+    Removes tickets deleted without signals from the counts of their Statuses and TicketTypes, with
+    one update for each Status and TicketType rather than each ticket
+
+    Parameters:
+        keys (list): The status and type ids of each deleted ticket
+    """
+    status_ids = {status_id for status_id, _ in keys if status_id}
+    closed = set(
+        Status.objects.filter(pk__in=status_ids, is_closed=True).values_list(
+            "pk", flat=True
+        )
+    )
+
+    for status_id, count in Counter(
+        status_id for status_id, _ in keys if status_id
+    ).items():
+        Status.objects.filter(pk=status_id).update(
+            ticket_count=F("ticket_count") - count
+        )
+
+    for type_id, count in Counter(type_id for _, type_id in keys if type_id).items():
+        open_count = sum(
+            1
+            for status_id, key_type_id in keys
+            if key_type_id == type_id and status_id not in closed
+        )
+        TicketType.objects.filter(pk=type_id).update(
+            ticket_count=F("ticket_count") - count,
+            open_ticket_count=F("open_ticket_count") - open_count,
+        )
+
+    transaction.on_commit(invalidate_ticket_counts)
+
+
+def count_tickets(tickets, field: str):
+    """
+    Builds a subquery counting the tickets for each row of the outer query
+
+    Parameters:
+        tickets (QuerySet): The tickets to count
+        field (str): The field of the ticket referencing the outer row
+
+    Returns:
+        : The count, 0 when the row has no tickets
+    """
+    counts = (
+        tickets.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def recount_ticket_counts(status_ids=None, type_ids=None):
+    """
+    Recounts the tickets of Statuses and TicketTypes. Each table is updated by a single statement,
+    counting the tickets with a grouped subquery.
+
+    Parameters:
+        status_ids, default=None: The Statuses to recount, all when not provided
+        type_ids, default=None: The TicketTypes to recount, all when not provided
+    """
+    statuses = Status.objects.all()
+    if status_ids is not None:
+        statuses = statuses.filter(pk__in=status_ids)
+    types = TicketType.objects.all()
+    if type_ids is not None:
+        types = types.filter(pk__in=type_ids)
+
+    statuses.update(ticket_count=count_tickets(Ticket.objects.all(), "status"))
+    types.update(
+        ticket_count=count_tickets(Ticket.objects.all(), "type"),
+        open_ticket_count=count_tickets(
+            Ticket.objects.exclude(status__is_closed=True), "type"
+        ),
+    )
+
+    transaction.on_commit(invalidate_ticket_counts)
@@ -0,0 +1,147 @@
+"""
+Program:  Web Based Database Application
+Filename: deletion.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+"""
+Deleting a Status or TicketType also deletes every ticket using it. Rather than deleting them all in
+one request and one transaction, the tickets are deleted by a background job in batches, each in its own
+short transaction, with the progress recorded on a BulkDeletion. The Status or TicketType itself is
+deleted once it has no tickets left.
+"""
+
+from django.db import connection, transaction
+from django.db.models import F
+from .caching import bump_ticket_deletions_version, invalidate_dashboards
+from .counters import subtract_ticket_counts
+from .events import broadcaster, publish_ticket_deleted
+from .jobs import enqueue, format_error, job_task
+from .models import Ticket, Status, TicketType, TicketTombstone, BulkDeletion
+
+# The model deleted for each model name, and the field of the ticket referencing it
+DELETION_MODELS = {"Status": (Status, "status"), "Ticket Type": (TicketType, "type")}
+
+# The most tickets deleted in a single transaction
+DELETE_BATCH_SIZE = 500
+
+
+def start_deletion(model_name: str, obj, user) -> BulkDeletion:
+    """
+    Starts deleting a Status or TicketType and its tickets in the background. If the entry is already
+    being deleted, the deletion in progress is returned instead.
+
+    Parameters:
+        model_name (str): The name of the model, a key of `DELETION_MODELS`
+        obj: The Status or TicketType
+        user (User): The user deleting the entry
+
+    Returns:
+        (BulkDeletion): The deletion
+    """
+    active = BulkDeletion.objects.filter(
+        model_name=model_name,
+        object_id=obj.pk,
+        state__in=(BulkDeletion.PENDING, BulkDeletion.RUNNING),
+    ).first()
+    if active:
+        return active
+
+    deletion = BulkDeletion.objects.create(
+        model_name=model_name,
+        object_id=obj.pk,
+        total=obj.ticket_count,
+        requested_by=user.id,
+    )
+    deletion.job = enqueue(run_deletion, deletion.id, user=user)
+    deletion.save(update_fields=["job"])
+    return deletion
+
+
+def delete_batch(deletion: BulkDeletion, field: str) -> int:
+    """
+    Deletes a batch of the tickets using the entry being deleted, in a single transaction. The tickets
+    are deleted with one DELETE statement rather than loaded and deleted one at a time, so no pre_delete
+    or post_delete signals are sent for them. What the post_delete receivers in `signals.py` do is
+    done here for the whole batch instead:
+
+    - `ticket_deleted`: the ticket counts are subtracted and the home pages of the assignees invalidated
+    - `record_tombstone`: the tombstones are recorded, the deleted tickets version is bumped and the
+      deletions are published to the ticket events stream
+
+    No other model references a Ticket, so there is nothing for the database to cascade to.
+
+    Parameters:
+        deletion (BulkDeletion): The deletion
+        field (str): The field of the ticket referencing the entry
+
+    Returns:
+        (int): The number of tickets deleted, 0 once there are none left
+    """
+    with transaction.atomic():
+        batch = list(
+            Ticket.objects.filter(**{field: deletion.object_id})
+            .order_by("ticket_id")
+            .values_list("ticket_id", "assignee_id", "status_id", "type_id")[
+                :DELETE_BATCH_SIZE
+            ]
+        )
+        if not batch:
+            return 0
+
+        ticket_ids = [row[0] for row in batch]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {connection.ops.quote_name(Ticket._meta.db_table)} "
+                f"WHERE ticket_id IN ({', '.join(['%s'] * len(ticket_ids))})",
+                ticket_ids,
+            )
+        tombstones = TicketTombstone.objects.bulk_create(
+            TicketTombstone(ticket_id=ticket_id) for ticket_id in ticket_ids
+        )
+        subtract_ticket_counts([(row[2], row[3]) for row in batch])
+        BulkDeletion.objects.filter(pk=deletion.pk).update(
+            deleted=F("deleted") + len(batch)
+        )
+
+    invalidate_dashboards(row[1] for row in batch)
+    bump_ticket_deletions_version()
+    if broadcaster.has_subscribers():
+        for tombstone in tombstones:
+            publish_ticket_deleted(tombstone.ticket_id, tombstone.deleted_at)
+    return len(batch)
+
+
+@job_task
+def run_deletion(deletion_id: int):
+    """
+    Deletes the tickets using an entry in batches, followed by the entry itself, recording the
+    progress on the deletion. If the job is retried after a failure, it carries on from the tickets
+    that are left.
+
+    Parameters:
+        deletion_id (int): The id of the BulkDeletion
+    """
+    deletion = BulkDeletion.objects.get(pk=deletion_id)
+    model, field = DELETION_MODELS[deletion.model_name]
+    BulkDeletion.objects.filter(pk=deletion.pk).update(
+        state=BulkDeletion.RUNNING, error=None
+    )
+
+    try:
+        while delete_batch(deletion, field):
+            pass
+        # Any ticket created since the last batch is deleted with the entry
+        model.objects.filter(pk=deletion.object_id).delete()
+    except Exception as e:
+        BulkDeletion.objects.filter(pk=deletion.pk).update(
+            state=BulkDeletion.FAILED, error=format_error(e, BulkDeletion)
+        )
+        raise
+
+    BulkDeletion.objects.filter(pk=deletion.pk).update(state=BulkDeletion.DONE)
@@ -0,0 +1,277 @@
+"""
+Program:  Web Based Database Application
+Filename: events.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+"""
+Pushes ticket events to the browsers connected to the ticket events stream, see `async_views.TicketEvents`.
+
+Each process has one `Broadcaster`, holding a queue for each connected browser. A ticket saved or deleted
+by a request in the same process is published by the signal handlers in `signals.py` as soon as its
+transaction commits. Changes made by other processes, and changes that do not send signals such as bulk
+updates, are found by a single poller for the process reading the ticket changes from the database, see
+`changes.py`. Each event is only published once, whichever finds it first.
+
+An idle browser costs a queue and a waiting coroutine, and the poller runs two indexed queries every
+EVENTS_POLL_INTERVAL no matter how many browsers are connected, and stops while none are.
+"""
+
+import asyncio
+import collections
+import json
+import threading
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, close_old_connections
+from .changes import (
+    MAX_CHANGES_LIMIT,
+    change_cursor,
+    get_latest_cursor,
+    get_ticket_changes,
+)
+from .export import EXPORT_VALUES, export_row, get_export_queryset
+from .models import Ticket
+
+# Seconds between each check of the database for changes made by other processes
+EVENTS_POLL_INTERVAL = 2.0
+# Seconds between the comments sent to keep an idle connection open through proxies
+EVENTS_HEARTBEAT = 15.0
+# The most events waiting to be sent to a browser. A browser that falls further behind is told to reload.
+EVENT_QUEUE_SIZE = 100
+# The number of recently published events remembered, so an event is not published twice
+RECENT_EVENTS = 10000
+
+# Sent to a browser that may have missed events, which should load the tickets again
+RESET_EVENT = {"key": None, "id": None, "event": "reset", "data": {}}
+
+
+def change_event(change: dict, with_id: bool = True) -> dict:
+    """
+    Builds the event for a change listed by `get_ticket_changes`
+
+    Parameters:
+        change (dict): The change
+        with_id (bool), default=True: If the cursor of the change is sent as the id of the event, which the
+            browser reconnects from. Only changes read by the poller are sent with their id, as a change
+            published when it is saved may be newer than changes other processes have not yet committed.
+
+    Returns:
+        (dict): The event, with the cursor of the change as its key
+    """
+    key = change_cursor(change["changed_at"], change["ticket_id"])
+    return {
+        "key": key,
+        "id": key if with_id else None,
+        "event": "ticket",
+        "data": {
+            "action": change["action"],
+            "ticket_id": change["ticket_id"],
+            "ticket": change["ticket"],
+        },
+    }
+
+
+def format_event(event: dict) -> str:
+    """
+    Formats an event in the server-sent events format. An event with an id but no name only moves the
+    position the browser reconnects from.
+
+    Parameters:
+        event (dict): The event
+
+    Returns:
+        (str): The event as sent to the browser
+    """
+    lines = []
+    if event.get("id"):
+        lines.append(f"id: {event['id']}")
+    if event.get("event"):
+        lines.append(f"event: {event['event']}")
+        lines.append(f"data: {json.dumps(event['data'], cls=DjangoJSONEncoder)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def position_event(cursor: str) -> dict:
+    """
+    Builds the event moving the position the browser reconnects from to a cursor
+    """
+    return {"key": None, "id": cursor, "event": None}
+
+
+class Broadcaster:
+    """
+    Sends the events published in this process to the queue of each connected browser
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.recent = collections.OrderedDict()
+        self.poller = None
+
+    def has_subscribers(self) -> bool:
+        """
+        Returns:
+            (bool): If any browser is connected to this process
+        """
+        return bool(self.subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """
+        Connects a browser, starting the poller if it is not running. Must be called from the event loop
+        the events will be read on.
+
+        Returns:
+            (asyncio.Queue): The queue the events for the browser are put on
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        with self.lock:
+            self.subscribers.add((loop, queue))
+            if (
+                self.poller is None
+                or self.poller.done()
+                or self.poller.get_loop().is_closed()
+            ):
+                self.poller = loop.create_task(self.poll())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """
+        Disconnects a browser
+
+        Parameters:
+            queue (asyncio.Queue): The queue returned by `subscribe`
+        """
+        with self.lock:
+            self.subscribers = {
+                subscriber
+                for subscriber in self.subscribers
+                if subscriber[1] is not queue
+            }
+
+    def publish(self, event: dict):
+        """
+        Sends an event to every connected browser, unless it has already been published. This can be
+        called from any thread.
+
+        Parameters:
+            event (dict): The event, its key is used to find events that were already published
+        """
+        with self.lock:
+            if event["key"] is not None:
+                if event["key"] in self.recent:
+                    return
+                self.recent[event["key"]] = True
+                if len(self.recent) > RECENT_EVENTS:
+                    self.recent.popitem(last=False)
+            subscribers = list(self.subscribers)
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self.put, queue, event)
+            except RuntimeError:
+                # The event loop of the browser has been closed
+                self.unsubscribe(queue)
+
+    @staticmethod
+    def put(queue: asyncio.Queue, event: dict):
+        """
+        Puts an event on the queue of a browser, replacing the events waiting with a reset event if the
+        browser has fallen too far behind
+        """
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            event = RESET_EVENT
+        queue.put_nowait(event)
+
+    async def poll(self):
+        """
+        Publishes the changes found in the database while any browser is connected, which includes the
+        changes made by other processes
+        """
+        cursor = await sync_to_async(get_latest_cursor)()
+        while self.has_subscribers():
+            await asyncio.sleep(EVENTS_POLL_INTERVAL)
+            try:
+                changes = await sync_to_async(read_changes)(cursor)
+            except DatabaseError:
+                # Tried again at the next interval
+                continue
+
+            for change in changes["changes"]:
+                self.publish(change_event(change))
+            if changes["changes"]:
+                # The changes already published when they were saved are not sent again, so the position
+                # the browsers reconnect from is moved past them separately
+                self.publish(position_event(changes["cursor"]))
+            cursor = changes["cursor"]
+
+
+def read_changes(cursor: str) -> dict:
+    """
+    Reads the ticket changes for the poller. The poller is not part of a request, so connections that
+    have expired or failed are closed here, as they would be at the start of a request.
+    """
+    close_old_connections()
+    return get_ticket_changes(cursor, MAX_CHANGES_LIMIT)
+
+
+broadcaster = Broadcaster()
+
+
+def publish_ticket_saved(ticket_id: int, created: bool):
+    """
+    Publishes the event for a saved ticket, after its transaction has committed
+
+    Parameters:
+        ticket_id (int): The id of the ticket
+        created (bool): If the ticket was created
+    """
+    row = (
+        get_export_queryset(Ticket.objects.filter(ticket_id=ticket_id))
+        .values(*EXPORT_VALUES, "updated_at")
+        .first()
+    )
+    if row is None:
+        return
+
+    broadcaster.publish(
+        change_event(
+            {
+                "changed_at": row["updated_at"],
+                "ticket_id": ticket_id,
+                "action": "created" if created else "updated",
+                "ticket": export_row(row),
+            },
+            with_id=False,
+        )
+    )
+
+
+def publish_ticket_deleted(ticket_id: int, deleted_at):
+    """
+    Publishes the event for a deleted ticket, after its transaction has committed
+
+    Parameters:
+        ticket_id (int): The id of the ticket
+        deleted_at (datetime): The time recorded on its tombstone
+    """
+    broadcaster.publish(
+        change_event(
+            {
+                "changed_at": deleted_at,
+                "ticket_id": ticket_id,
+                "action": "deleted",
+                "ticket": None,
+            },
+            with_id=False,
+        )
+    )
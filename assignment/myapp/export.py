@@ -0,0 +1,169 @@
+"""
+Program:  Web Based Database Application
+Filename: export.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+import csv
+import json
+from django.contrib.auth.models import User
+from django.db.models import F, OuterRef, Subquery
+from .models import Ticket
+
+EXPORT_FORMATS = ("csv", "ndjson")
+
+EXPORT_FIELDS = (
+    "ticket_id",
+    "ticket_title",
+    "ticket_info",
+    "assignee",
+    "reporter",
+    "status",
+    "type",
+    "date_reported",
+    "date_due",
+)
+
+# The columns selected by `get_export_queryset`
+EXPORT_VALUES = (
+    "ticket_id",
+    "ticket_title",
+    "ticket_info",
+    "assignee_name",
+    "reporter_name",
+    "status_id",
+    "type_id",
+    "date_reported",
+    "date_due",
+)
+
+# The number of rows fetched from the database at a time while streaming
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """
+    A file-like object that returns what is written to it, allowing `csv.writer` to produce one line
+    at a time for a streaming response
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def get_export_queryset(queryset=None):
+    """
+    Builds the queryset used to export tickets. The assignee, reporter, status and type are resolved to
+    their names by the database, so each row is exported without any further queries.
+
+    Parameters:
+        queryset (QuerySet), default=None: The tickets to export, all tickets when not provided
+
+    Returns:
+        (QuerySet): Dictionaries of the exported fields for each ticket, ordered by ticket id
+    """
+    if queryset is None:
+        queryset = Ticket.objects.all()
+
+    return (
+        queryset.order_by("ticket_id")
+        .annotate(
+            assignee_name=F("assignee__username"),
+            # reporter_id is not a relation, so the username is resolved by a subquery
+            reporter_name=Subquery(
+                User.objects.filter(id=OuterRef("reporter_id")).values("username")[:1]
+            ),
+        )
+        .values(*EXPORT_VALUES)
+    )
+
+
+def iter_export_rows(queryset):
+    """
+    Reads the tickets to export from the database in chunks, using a server side cursor where the
+    database supports one, so memory use does not grow with the number of tickets
+
+    Parameters:
+        queryset (QuerySet): The queryset built by `get_export_queryset`
+
+    Yields:
+        (dict): The exported fields of a ticket
+    """
+    for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield export_row(row)
+
+
+def export_row(row: dict) -> dict:
+    """
+    Converts a row of the queryset built by `get_export_queryset` to the exported fields of a ticket
+
+    Parameters:
+        row (dict): The row
+
+    Returns:
+        (dict): The exported fields of the ticket
+    """
+    return {
+        "ticket_id": row["ticket_id"],
+        "ticket_title": row["ticket_title"],
+        "ticket_info": row["ticket_info"],
+        "assignee": row["assignee_name"],
+        "reporter": row["reporter_name"],
+        "status": row["status_id"],
+        "type": row["type_id"],
+        "date_reported": row["date_reported"],
+        "date_due": row["date_due"],
+    }
+
+
+def stream_csv(rows):
+    """
+    Formats exported tickets as CSV, one line at a time
+
+    Parameters:
+        rows: The rows produced by `iter_export_rows`
+
+    Yields:
+        (str): A line of the CSV file, starting with the header
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def stream_ndjson(rows):
+    """
+    Formats exported tickets as newline delimited JSON, one line at a time
+
+    Parameters:
+        rows: The rows produced by `iter_export_rows`
+
+    Yields:
+        (str): A JSON object for a ticket, followed by a newline
+    """
+    for row in rows:
+        yield json.dumps(row, default=str) + "\n"
+
+
+def stream_export(queryset, export_format: str):
+    """
+    Streams an export of tickets in the requested format
+
+    Parameters:
+        queryset (QuerySet): The tickets to export
+        export_format (str): One of `EXPORT_FORMATS`
+
+    Returns:
+        : A generator of the lines of the export
+    """
+    rows = iter_export_rows(get_export_queryset(queryset))
+
+    if export_format == "ndjson":
+        return stream_ndjson(rows)
+    return stream_csv(rows)
@@ -14,7 +14,10 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from .models import Ticket, Status, TicketType
+from .caching import get_reference_choices
+from django.urls import reverse
 from django.forms import ValidationError
+from django.db.models import Subquery
 import re
 
 
@@ -59,7 +62,92 @@ class NewUser(UserCreationForm):
         return user
 
 
+class CachedChoiceField(forms.ChoiceField):
+    """
+    Selects a Status or TicketType using choices held in the memory of the process, rather than
+    querying the table each time the field is rendered or validated like a ModelChoiceField.
+    The cleaned value is an unsaved instance with only its primary key set, which is all a ForeignKey
+    needs to be saved.
+    """
+
+    def __init__(self, model, order_by: str, **kwargs):
+        self.model = model
+        self.order_by = order_by
+        super().__init__(choices=self.get_choices, **kwargs)
+
+    def get_choices(self) -> list:
+        """
+        Gets the choices of the field, starting with the empty choice
+
+        Returns:
+            (list): The primary key and name of each entry
+        """
+        choices = get_reference_choices(
+            self.model._meta.model_name,
+            lambda: [
+                (obj.pk, str(obj)) for obj in self.model.objects.order_by(self.order_by)
+            ],
+        )
+        return [("", "---------")] + choices
+
+    def to_python(self, value):
+        """
+        Converts the selected primary key to an instance of the model
+
+        Returns:
+            : The instance, or None if nothing was selected
+        """
+        if value in self.empty_values:
+            return None
+        return self.model(pk=value)
+
+    def validate(self, value):
+        """
+        Checks the selected entry is one of the choices
+        """
+        forms.Field.validate(self, value)
+        if value is not None and not self.valid_value(value.pk):
+            raise ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": value.pk},
+            )
+
+
+class AssigneeInput(forms.TextInput):
+    """
+    Text input for a username, suggesting users from the assignee autocomplete page as the user types
+    """
+
+    template_name = "myapp/widgets/assignee_input.html"
+
+    def __init__(self, attrs: dict = None):
+        super().__init__(
+            {"class": "form-control", "autocomplete": "off", **(attrs or {})}
+        )
+
+    def get_context(self, name: str, value, attrs: dict) -> dict:
+        """
+        Adds the autocomplete URL and the suggestion list to the attributes of the input
+        """
+        context = super().get_context(name, value, attrs)
+        widget_attrs = context["widget"]["attrs"]
+        widget_attrs["data-autocomplete-url"] = reverse("Assignee Autocomplete")
+        widget_attrs["list"] = f"{widget_attrs.get('id', name)}_list"
+        return context
+
+
 class AddTicket(forms.ModelForm):
+    assignee = forms.CharField(
+        required=False, help_text="Username", widget=AssigneeInput()
+    )
+    status = CachedChoiceField(
+        Status, "status_name", widget=forms.Select(attrs={"class": "form-control"})
+    )
+    type = CachedChoiceField(
+        TicketType, "type_name", widget=forms.Select(attrs={"class": "form-control"})
+    )
+
     class Meta:
         model = Ticket
         fields = (
@@ -74,14 +162,34 @@ class AddTicket(forms.ModelForm):
         widgets = {
             "ticket_title": forms.TextInput(attrs={"class": "form-control"}),
             "ticket_info": forms.Textarea(attrs={"class": "form-control"}),
-            "assignee": forms.Select(attrs={"class": "form-control"}),
-            "status": forms.Select(attrs={"class": "form-control"}),
-            "type": forms.Select(attrs={"class": "form-control"}),
             "date_due": forms.DateInput(
                 attrs={"class": "form-control"}, format="%d/%m/%y"
             ),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The assignee is entered as a username rather than chosen from a list of every user
+        if self.instance.assignee_id and "assignee" not in kwargs.get("initial", {}):
+            self.initial["assignee"] = self.instance.assignee.username
+
+    def clean_assignee(self):
+        """
+        Resolves the username entered by the user to the user being assigned the ticket
+
+        Returns:
+            assignee (User): The user, or None if no username was entered
+        """
+        username = self.cleaned_data["assignee"]
+
+        if not username:
+            return None
+
+        try:
+            return User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise ValidationError(f"User {username} does not exist")
+
     def clean_ticket_title(self) -> str:
         """
         Apply validation to the user input of the ticket title
@@ -98,6 +206,15 @@ class AddTicket(forms.ModelForm):
 
         return ticket_title
 
+    def _get_validation_exclusions(self) -> set:
+        """
+        Excludes the assignee, Status and TicketType from the validation done by the model, as the fields
+        have already checked they exist, and the model would query the database to check them again
+        """
+        exclude = super()._get_validation_exclusions()
+        exclude.update({"assignee", "status", "type"})
+        return exclude
+
     def save(self, commit: bool = True, **kwargs):
         """
         Commit the entry to the Ticket datatable
@@ -127,11 +244,12 @@ class AddTicket(forms.ModelForm):
 class AddStatus(forms.ModelForm):
     class Meta:
         model = Status
-        fields = ("status_name", "status_description")
+        fields = ("status_name", "status_description", "is_closed")
 
         widgets = {
             "status_name": forms.TextInput(attrs={"class": "form-control"}),
             "status_description": forms.Textarea(attrs={"class": "form-control"}),
+            "is_closed": forms.CheckboxInput(attrs={"class": "form-check-input"}),
         }
 
     def clean_status_name(self) -> str:
@@ -178,10 +296,11 @@ class AddStatus(forms.ModelForm):
 class UpdateStatus(forms.ModelForm):
     class Meta:
         model = Status
-        fields = ("status_description",)
+        fields = ("status_description", "is_closed")
 
         widgets = {
             "status_description": forms.Textarea(attrs={"class": "form-control"}),
+            "is_closed": forms.CheckboxInput(attrs={"class": "form-check-input"}),
         }
 
     def clean_status_name(self) -> str:
@@ -326,6 +445,155 @@ class UpdateTicketType(forms.ModelForm):
         return ticket_type
 
 
+class TicketFilter(forms.Form):
+    status = forms.ModelChoiceField(
+        queryset=Status.objects.all(),
+        required=False,
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    type = forms.ModelChoiceField(
+        queryset=TicketType.objects.all(),
+        required=False,
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    assignee = forms.CharField(
+        required=False,
+        help_text="Username",
+        widget=forms.TextInput(attrs={"class": "form-control"}),
+    )
+    reporter = forms.CharField(
+        required=False,
+        help_text="Username",
+        widget=forms.TextInput(attrs={"class": "form-control"}),
+    )
+    due_after = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"class": "form-control", "type": "date"}),
+    )
+    due_before = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"class": "form-control", "type": "date"}),
+    )
+    overdue = forms.BooleanField(
+        required=False, widget=forms.CheckboxInput(attrs={"class": "form-check-input"})
+    )
+
+    def filter(self, queryset):
+        """
+        Applies the filters entered by the user to a Ticket queryset. The filters are all applied by
+        the database, and are supported by the indexes defined on the Ticket model.
+
+        Parameters:
+            queryset (QuerySet): The tickets to filter
+
+        Returns:
+            queryset (QuerySet): The filtered tickets
+        """
+        data = self.cleaned_data
+
+        if data.get("status"):
+            queryset = queryset.filter(status=data["status"])
+        if data.get("type"):
+            queryset = queryset.filter(type=data["type"])
+        if data.get("assignee"):
+            queryset = queryset.filter(assignee__username=data["assignee"])
+        if data.get("reporter"):
+            # reporter_id is not a relation, so the username is resolved to an id by a subquery
+            queryset = queryset.filter(
+                reporter_id=Subquery(
+                    User.objects.filter(username=data["reporter"]).values("id")[:1]
+                )
+            )
+        if data.get("due_after"):
+            queryset = queryset.filter(date_due__gte=data["due_after"])
+        if data.get("due_before"):
+            queryset = queryset.filter(date_due__lte=data["due_before"])
+        if data.get("overdue"):
+            queryset = queryset.filter(date_due__lt=datetime.date.today())
+
+        return queryset
+
+
+class BulkUpdateTickets(forms.Form):
+    status = forms.ModelChoiceField(
+        queryset=Status.objects.all(),
+        required=False,
+        empty_label="Keep status",
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    type = forms.ModelChoiceField(
+        queryset=TicketType.objects.all(),
+        required=False,
+        empty_label="Keep type",
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    assignee = forms.CharField(
+        required=False,
+        help_text="Username",
+        widget=forms.TextInput(attrs={"class": "form-control"}),
+    )
+    unassign = forms.BooleanField(
+        required=False, widget=forms.CheckboxInput(attrs={"class": "form-check-input"})
+    )
+
+    def clean_assignee(self):
+        """
+        Resolves the username entered by the user to the user being assigned the tickets
+
+        Returns:
+            assignee (User): The user, or None if no username was entered
+        """
+        username = self.cleaned_data["assignee"]
+
+        if not username:
+            return None
+
+        try:
+            return User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise ValidationError(f"User {username} does not exist")
+
+    def clean(self):
+        """
+        Checks that a single, valid change has been chosen for the tickets
+
+        Returns:
+            cleaned_data (dict): The validated data of the form
+        """
+        cleaned_data = super().clean()
+
+        if cleaned_data.get("assignee") and cleaned_data.get("unassign"):
+            raise ValidationError(
+                "Please either choose an assignee or unassign the tickets"
+            )
+
+        if not self.get_changes():
+            raise ValidationError("Please choose a change to make to the tickets")
+
+        return cleaned_data
+
+    def get_changes(self) -> dict:
+        """
+        Builds the changes to apply to the selected tickets
+
+        Returns:
+            changes (dict): The fields to update, with their new values
+        """
+        data = self.cleaned_data
+        changes = {}
+
+        if data.get("status"):
+            changes["status"] = data["status"]
+        if data.get("type"):
+            changes["type"] = data["type"]
+        if data.get("assignee"):
+            changes["assignee"] = data["assignee"]
+        elif data.get("unassign"):
+            changes["assignee"] = None
+
+        return changes
+
+
 def check_capital_letter(text: str) -> bool:
     """
     Checks a string to ensure it starts with a capital letter
@@ -0,0 +1,256 @@
+"""
+Program:  Web Based Database Application
+Filename: jobs.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+"""
+A job queue stored in the database, so work can be taken out of the request without a message broker.
+Jobs are added with `enqueue` and run by `manage.py run_worker`, which can be run as many times and with
+as many threads as needed. Each job is claimed by exactly one worker: on PostgreSQL with
+`SELECT ... FOR UPDATE SKIP LOCKED`, and on SQLite, which has no row locks, by an update that only
+succeeds while the job is still queued. A job that fails is retried after a delay that doubles after
+each attempt, until it has used all of its attempts.
+
+While a job runs, its worker records a heartbeat every JOB_HEARTBEAT_INTERVAL. A running job without a
+heartbeat for JOB_TIMEOUT belongs to a worker that has stopped, and is queued again. A job that is
+simply slow keeps its heartbeat, so it is never run twice at the same time.
+"""
+
+import datetime
+import threading
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Job
+
+# The delay before a failed job is retried the first time, doubling for each attempt after
+RETRY_DELAY = datetime.timedelta(seconds=30)
+
+# How often the worker running a job records that it is still running
+JOB_HEARTBEAT_INTERVAL = datetime.timedelta(seconds=30)
+
+# A running job without a heartbeat for this long is assumed to belong to a worker that has stopped, and
+# is queued again
+JOB_TIMEOUT = datetime.timedelta(minutes=5)
+
+# The number of queued jobs a worker tries to claim on SQLite before giving up until its next poll
+CLAIM_CANDIDATES = 10
+
+
+def job_task(func):
+    """
+    Decorator marking a function as a task that can be run by a job. Only marked functions can be run,
+    so a job can never call an arbitrary function.
+    """
+    func.is_job_task = True
+    return func
+
+
+def get_task(name: str):
+    """
+    Gets the function run by a job
+
+    Parameters:
+        name (str): The import path of the function
+
+    Returns:
+        : The function
+
+    Raises:
+        ValueError: If the function is not a job task
+    """
+    func = import_string(name)
+    if not getattr(func, "is_job_task", False):
+        raise ValueError(f"{name} is not a job task")
+    return func
+
+
+def enqueue(func, *args, user=None, max_attempts: int = 3) -> Job:
+    """
+    Queues a task to be run by a worker. When BACKGROUND_TASKS_EAGER is set, as in the tests, the task is
+    instead run in this process once the current transaction commits.
+
+    Parameters:
+        func: The task, a function decorated with `job_task`
+        *args: The arguments of the task, which must be JSON serialisable
+        user (User), default=None: The user queueing the task
+        max_attempts (int), default=3: How many times the task is run before it is failed
+
+    Returns:
+        (Job): The queued job
+    """
+    job = Job.objects.create(
+        task=f"{func.__module__}.{func.__qualname__}",
+        arguments=list(args),
+        max_attempts=max_attempts,
+        requested_by=getattr(user, "id", None) or 0,
+    )
+
+    if settings.BACKGROUND_TASKS_EAGER:
+        transaction.on_commit(lambda: run_job(start_job(job.pk, "eager")))
+    return job
+
+
+def start_job(job_id: int, worker: str) -> Job:
+    """
+    Marks a claimed job as running
+
+    Parameters:
+        job_id (int): The id of the job
+        worker (str): The name of the worker running the job
+
+    Returns:
+        (Job): The job
+    """
+    now = timezone.now()
+    Job.objects.filter(pk=job_id).update(
+        state=Job.RUNNING,
+        worker=worker,
+        attempts=F("attempts") + 1,
+        date_started=now,
+        date_heartbeat=now,
+    )
+    return Job.objects.get(pk=job_id)
+
+
+def claim_job(worker: str):
+    """
+    Claims the next queued job that is due to run
+
+    Parameters:
+        worker (str): The name of the worker claiming the job
+
+    Returns:
+        (Job): The claimed job, now running, or None if there are no jobs to run
+    """
+    queued = Job.objects.filter(
+        state=Job.QUEUED, run_after__lte=timezone.now()
+    ).order_by("run_after", "id")
+
+    if connection.features.has_select_for_update_skip_locked:
+        # Jobs locked by another worker are skipped rather than waited for
+        with transaction.atomic():
+            job_id = (
+                queued.select_for_update(skip_locked=True)
+                .values_list("id", flat=True)
+                .first()
+            )
+            if job_id is None:
+                return None
+            return start_job(job_id, worker)
+
+    for job_id in queued.values_list("id", flat=True)[:CLAIM_CANDIDATES]:
+        # Only one worker can change the job from queued, the others update no rows and try the next job
+        claimed = Job.objects.filter(pk=job_id, state=Job.QUEUED).update(
+            state=Job.RUNNING
+        )
+        if claimed:
+            return start_job(job_id, worker)
+    return None
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Queues the jobs of workers that have stopped again, failing those that have used all their attempts
+
+    Returns:
+        (int): The number of jobs queued again
+    """
+    cutoff = timezone.now() - JOB_TIMEOUT
+    stale = Job.objects.filter(state=Job.RUNNING).filter(
+        Q(date_heartbeat__lt=cutoff)
+        # Jobs started before heartbeats were recorded
+        | Q(date_heartbeat=None, date_started__lt=cutoff)
+    )
+    stale.filter(attempts__gte=F("max_attempts")).update(
+        state=Job.FAILED,
+        error="Error: The worker running the job stopped",
+        date_finished=timezone.now(),
+    )
+    return stale.update(state=Job.QUEUED, worker=None)
+
+
+def format_error(e: Exception, model=Job) -> str:
+    """
+    Formats the error of a failed job, cut to the length of the `error` field so it can always be saved
+
+    Parameters:
+        e (Exception): The exception raised by the task
+        model, default=Job: The model the error is saved on
+
+    Returns:
+        (str): The error
+    """
+    return f"Error: {e}"[: model._meta.get_field("error").max_length]
+
+
+def record_heartbeats(job: Job, stop: threading.Event):
+    """
+    Records a heartbeat for a running job every JOB_HEARTBEAT_INTERVAL, until `stop` is set. This runs in
+    its own thread, so it has its own database connection, which is closed when it stops.
+
+    Parameters:
+        job (Job): The job
+        stop (threading.Event): Set once the job has finished
+    """
+    try:
+        while not stop.wait(JOB_HEARTBEAT_INTERVAL.total_seconds()):
+            try:
+                Job.objects.filter(
+                    pk=job.pk, state=Job.RUNNING, worker=job.worker
+                ).update(date_heartbeat=timezone.now())
+            except DatabaseError:
+                # Tried again at the next interval, the job is only requeued after JOB_TIMEOUT
+                pass
+    finally:
+        connection.close()
+
+
+def run_job(job: Job) -> bool:
+    """
+    Runs a claimed job, recording its result. A failed job is queued again to be retried if it has
+    attempts left. Heartbeats are recorded while the job runs.
+
+    Parameters:
+        job (Job): The job
+
+    Returns:
+        (bool): If the job succeeded
+    """
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=record_heartbeats, args=(job, stop), daemon=True
+    )
+    heartbeat.start()
+    try:
+        try:
+            get_task(job.task)(*job.arguments)
+        finally:
+            stop.set()
+            heartbeat.join()
+    except Exception as e:
+        if job.attempts < job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                state=Job.QUEUED,
+                worker=None,
+                error=format_error(e),
+                run_after=timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1),
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                state=Job.FAILED, error=format_error(e), date_finished=timezone.now()
+            )
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        state=Job.DONE, error=None, date_finished=timezone.now()
+    )
+    return True
@@ -0,0 +1,304 @@
+"""
+Program:  Web Based Database Application
+Filename: bench.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+import json
+import tempfile
+import time
+import tracemalloc
+import uuid
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from myapp.benchmarking import get_request_host, list_routes, summarise
+from myapp.models import BulkDeletion, Job
+from myapp.seeding import seed_data
+
+BENCH_USERNAME = "bench_admin"
+# Routes that are not measured, as their response never ends
+SKIPPED_ROUTES = {"Ticket Events"}
+
+
+class Command(BaseCommand):
+    help = "Seeds a database with generated data and measures the latency, queries and memory of every page"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--statuses", type=int, default=20)
+        parser.add_argument("--types", type=int, default=20)
+        parser.add_argument("--tickets", type=int, default=10000)
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seeds the generated data"
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=20,
+            help="The number of timed requests sent to each page",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=2,
+            help="The number of untimed requests sent to each page first",
+        )
+        parser.add_argument(
+            "--routes",
+            nargs="+",
+            metavar="NAME",
+            help="The names of the routes to measure, all of them if not set",
+        )
+        parser.add_argument(
+            "--no-test-database",
+            action="store_true",
+            help="Seeds and measures the configured database instead of a temporary test database",
+        )
+        parser.add_argument("--output", help="File to write the results to")
+        parser.add_argument(
+            "--baseline",
+            help="Results of an earlier run to compare against, failing if a page has regressed",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=20,
+            help="How many percent slower than the baseline the p95 latency of a page may be",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Seeds the data and measures each page, printing the results as JSON. The pages are requested
+        through the test client as an admin user, with a cache and metrics directory of their own, so the
+        results are not affected by, and do not affect, the running webpage.
+        """
+        if options["requests"] < 1:
+            raise CommandError("--requests must be at least 1")
+
+        baseline = None
+        if options["baseline"]:
+            try:
+                with open(options["baseline"], encoding="utf-8") as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read {options['baseline']}: {e}")
+
+        connection = connections["default"]
+        old_name = None
+        if not options["no_test_database"]:
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+
+        caches = {
+            alias: {**config, "KEY_PREFIX": f"bench-{uuid.uuid4().hex}"}
+            for alias, config in settings.CACHES.items()
+        }
+        try:
+            with tempfile.TemporaryDirectory() as metrics_dir, override_settings(
+                CACHES=caches, METRICS_DIR=metrics_dir
+            ):
+                results = self.run_benchmark(connection, options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        regressions = []
+        if baseline is not None:
+            regressions = compare_results(
+                baseline, results["routes"], options["tolerance"]
+            )
+            results["regressions"] = regressions
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} pages regressed: "
+                + "; ".join(regression["reason"] for regression in regressions)
+            )
+
+    def run_benchmark(self, connection, options) -> dict:
+        """
+        Seeds the data and measures each page
+
+        Returns:
+            (dict): The seeded volumes and the results for each page
+        """
+        start = time.perf_counter()
+        seeded = seed_data(
+            options["users"],
+            options["statuses"],
+            options["types"],
+            options["tickets"],
+            seed=options["seed"],
+        )
+        seed_seconds = time.perf_counter() - start
+
+        user = User.objects.filter(username=BENCH_USERNAME).first()
+        if user is None:
+            user = User.objects.create_superuser(BENCH_USERNAME)
+        job = Job.objects.create(
+            task="myapp.deletion.run_deletion", state=Job.DONE, requested_by=user.id
+        )
+        deletion = BulkDeletion.objects.create(
+            model_name="Status",
+            object_id="Bench status",
+            state=BulkDeletion.DONE,
+            requested_by=user.id,
+            job=job,
+        )
+
+        # Values for the arguments in the path of each page, overridden for pages whose id is not a ticket
+        arguments = {
+            "id": seeded["ticket_ids"][0] if seeded["ticket_ids"] else 0,
+            "status_name": seeded["status_names"][0] if seeded["status_names"] else "",
+            "type_name": seeded["type_names"][0] if seeded["type_names"] else "",
+        }
+        route_arguments = {
+            "View Deletion": {"id": deletion.id},
+            "View Job": {"id": job.id},
+        }
+
+        client = Client(HTTP_HOST=get_request_host(), raise_request_exception=False)
+        client.force_login(user)
+
+        routes = {}
+        for name, parameters in list_routes():
+            if name in SKIPPED_ROUTES or (
+                options["routes"] and name not in options["routes"]
+            ):
+                continue
+            kwargs = {
+                parameter: route_arguments.get(name, {}).get(
+                    parameter, arguments.get(parameter)
+                )
+                for parameter in parameters
+            }
+            path = reverse(name, kwargs=kwargs)
+            routes[name] = self.measure(client, user, path, connection, options)
+
+        return {
+            "database": connection.vendor,
+            "seed": {
+                "seed": options["seed"],
+                "users": options["users"],
+                "statuses": options["statuses"],
+                "types": options["types"],
+                "tickets": options["tickets"],
+                "seconds": round(seed_seconds, 3),
+            },
+            "routes": routes,
+        }
+
+    def measure(self, client, user, path: str, connection, options) -> dict:
+        """
+        Measures a page, first sending the warmup requests, then the timed requests, then a single request
+        with memory tracing, as tracing slows down every allocation
+
+        Parameters:
+            client (Client): The logged in test client
+            user (User): The user the client is logged in as
+            path (str): The page to request
+            connection: The database connection the queries are counted on
+            options (dict): The options of the command
+
+        Returns:
+            (dict): The latency, query counts, peak memory and response codes of the page
+        """
+
+        def request() -> int:
+            response = client.get(path)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            response.close()
+            return response.status_code
+
+        def log_in_again():
+            # Pages such as the logout page end the session
+            if "_auth_user_id" not in client.session:
+                client.force_login(user)
+
+        for _ in range(options["warmup"]):
+            request()
+            log_in_again()
+
+        latencies = []
+        queries = []
+        status_codes = set()
+        for _ in range(options["requests"]):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                status_codes.add(request())
+                latencies.append(time.perf_counter() - start)
+            queries.append(len(captured))
+            log_in_again()
+
+        tracemalloc.start()
+        try:
+            request()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        log_in_again()
+
+        return {
+            "path": path,
+            "status_codes": sorted(status_codes),
+            **summarise(latencies),
+            "queries_mean": round(sum(queries) / len(queries), 2),
+            "queries_max": max(queries),
+            "peak_memory_kb": round(peak / 1024, 1),
+        }
+
+
+def compare_results(baseline: dict, routes: dict, tolerance: float) -> list:
+    """
+    Compares the results of each page against an earlier run. A page has regressed if it makes more
+    queries than before, or its p95 latency is more than `tolerance` percent slower.
+
+    Parameters:
+        baseline (dict): The results of the earlier run
+        routes (dict): The results of each page in this run
+        tolerance (float): How many percent slower the p95 latency may be
+
+    Returns:
+        (list): The pages that regressed and why
+    """
+    regressions = []
+    for name, result in routes.items():
+        before = baseline.get("routes", {}).get(name)
+        if before is None:
+            continue
+
+        if result["queries_max"] > before["queries_max"]:
+            regressions.append(
+                {
+                    "route": name,
+                    "reason": f"{name} made {result['queries_max']} queries, up from {before['queries_max']}",
+                }
+            )
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance / 100):
+            regressions.append(
+                {
+                    "route": name,
+                    "reason": f"{name} p95 latency was {result['p95_ms']}ms, up from {before['p95_ms']}ms",
+                }
+            )
+    return regressions
@@ -0,0 +1,92 @@
+"""
+Program:  Web Based Database Application
+Filename: bench_connections.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+import json
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from myapp.benchmarking import WSGIRequester, summarise
+
+
+class Command(BaseCommand):
+    help = "Measures the latency of a page with and without persistent database connections"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/view_statuses/")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--username",
+            help="User to log in as, required for pages that need a login",
+        )
+        parser.add_argument(
+            "--conn-max-age",
+            type=int,
+            help="Connection lifetime to compare against, DATABASE_CONN_MAX_AGE if not set",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Requests the page repeatedly with CONN_MAX_AGE set to 0, which opens a new connection for every
+        request, and then with persistent connections, printing the latencies of both as JSON
+        """
+        cookies = ""
+        if options["username"]:
+            try:
+                user = User.objects.get(username=options["username"])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['username']} does not exist")
+            client = Client()
+            client.force_login(user)
+            session = client.cookies[settings.SESSION_COOKIE_NAME].value
+            cookies = f"{settings.SESSION_COOKIE_NAME}={session}"
+
+        connection = connections["default"]
+        original_max_age = connection.settings_dict["CONN_MAX_AGE"]
+        persistent_max_age = options["conn_max_age"] or original_max_age or 600
+        requester = WSGIRequester(cookies)
+        results = {}
+
+        try:
+            for label, max_age in (
+                ("new_connection_per_request", 0),
+                ("persistent_connections", persistent_max_age),
+            ):
+                # The lifetime is read when a connection is opened
+                connection.close()
+                connection.settings_dict["CONN_MAX_AGE"] = max_age
+
+                status, _ = requester.get(options["path"])
+                if not status.startswith("200"):
+                    raise CommandError(
+                        f"{options['path']} returned {status}, use --username for pages that need a login"
+                    )
+
+                latencies = [
+                    requester.get(options["path"])[1]
+                    for _ in range(options["requests"])
+                ]
+                results[label] = {"conn_max_age": max_age, **summarise(latencies)}
+        finally:
+            connection.close()
+            connection.settings_dict["CONN_MAX_AGE"] = original_max_age
+
+        self.stdout.write(
+            json.dumps(
+                {
+                    "path": options["path"],
+                    "database": connection.vendor,
+                    "results": results,
+                },
+                indent=2,
+            )
+        )
@@ -0,0 +1,67 @@
+"""
+Program:  Web Based Database Application
+Filename: export_tickets.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from myapp.export import stream_export, EXPORT_FORMATS
+from myapp.forms import TicketFilter
+from myapp.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Streams the tickets as CSV or newline delimited JSON, using the same filters as the view tickets page"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument(
+            "--output", help="File to write the export to, standard output if not set"
+        )
+        parser.add_argument("--status", help="Only export tickets with this status")
+        parser.add_argument("--type", help="Only export tickets with this type")
+        parser.add_argument("--assignee", help="Username of the assignee")
+        parser.add_argument("--reporter", help="Username of the reporter")
+        parser.add_argument(
+            "--due-after", help="Only tickets due on or after YYYY-MM-DD"
+        )
+        parser.add_argument(
+            "--due-before", help="Only tickets due on or before YYYY-MM-DD"
+        )
+        parser.add_argument(
+            "--overdue", action="store_true", help="Only export overdue tickets"
+        )
+
+    def handle(self, *args, **options):
+        """
+        Runs the export, writing each line as it is produced so memory use stays constant
+        """
+        filter_form = TicketFilter(
+            {
+                "status": options["status"],
+                "type": options["type"],
+                "assignee": options["assignee"],
+                "reporter": options["reporter"],
+                "due_after": options["due_after"],
+                "due_before": options["due_before"],
+                "overdue": options["overdue"],
+            }
+        )
+        if not filter_form.is_valid():
+            raise CommandError(f"Invalid filters: {filter_form.errors.as_text()}")
+
+        lines = stream_export(
+            filter_form.filter(Ticket.objects.all()), options["format"]
+        )
+
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,278 @@
+"""
+Program:  Web Based Database Application
+Filename: import_tickets.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+import csv
+import datetime
+import itertools
+import json
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.forms import ValidationError
+from myapp.caching import invalidate_dashboards
+from myapp.counters import recount_ticket_counts
+from myapp.forms import AddTicket, check_capital_letter
+from myapp.models import Ticket, Status, TicketType
+
+IMPORT_FORMATS = ("csv", "json")
+# The fields naming a Status, TicketType or User, which are looked up for each batch
+LOOKUP_FIELDS = ("status", "type", "assignee", "reporter")
+
+
+def read_rows(path: str, import_format: str):
+    """
+    Reads the tickets to import from a file, one row at a time
+
+    CSV files must have a header row. JSON files can contain a list of objects, or one object per
+    line (as produced by `export_tickets --format ndjson`). The columns match those of the export.
+
+    Parameters:
+        path (str): The file to read
+        import_format (str): One of `IMPORT_FORMATS`
+
+    Yields:
+        line (int): The line (CSV and JSON lines) or position (JSON list) of the row in the file
+        row: The fields of the row, or a ValidationError if the line is not valid JSON
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        if import_format == "csv":
+            # The header is line 1, so the first ticket is on line 2
+            yield from enumerate(csv.DictReader(file), start=2)
+            return
+
+        first = file.read(1)
+        file.seek(0)
+        if first == "[":
+            yield from enumerate(json.load(file), start=1)
+            return
+
+        for line, text in enumerate(file, start=1):
+            if text.strip():
+                # A malformed line fails on its own, like a row that fails validation
+                try:
+                    row = json.loads(text)
+                except ValueError as e:
+                    row = ValidationError(f"Invalid JSON: {e}")
+                yield line, row
+
+
+def clean_row(row: dict, statuses: set, types: set, users: dict, reporter_id: int):
+    """
+    Validates a row using the same rules as the `AddTicket` form, and builds the ticket for it. The
+    statuses, types and users are looked up in the sets built for the batch rather than the database.
+
+    Parameters:
+        row: The fields of the row, which must be a dict
+        statuses (set): The names of the statuses that exist
+        types (set): The names of the ticket types that exist
+        users (dict): Maps the usernames that exist to their ids
+        reporter_id (int): The id of the reporter, used when the row does not name one
+
+    Returns:
+        (Ticket): The unsaved ticket
+
+    Raises:
+        ValidationError: If the row is not valid
+    """
+    if not isinstance(row, dict):
+        raise ValidationError("The row must be an object of ticket fields")
+
+    fields = AddTicket.base_fields
+    errors = []
+
+    # The names looked up in the batch must be text, as any JSON value can be given
+    for name in LOOKUP_FIELDS:
+        if row.get(name) is not None and not isinstance(row[name], str):
+            errors.append(f"{name}: Enter a name.")
+    if errors:
+        raise ValidationError(errors)
+
+    def clean(name: str, value):
+        try:
+            return fields[name].clean(value)
+        except ValidationError as e:
+            errors.extend(f"{name}: {message}" for message in e.messages)
+
+    ticket_title = clean("ticket_title", row.get("ticket_title"))
+    if ticket_title and not check_capital_letter(ticket_title):
+        errors.append(
+            "ticket_title: Please enter the ticket title with the first letter as a Capital"
+        )
+
+    ticket_info = clean("ticket_info", row.get("ticket_info"))
+    date_due = clean("date_due", row.get("date_due"))
+
+    status = row.get("status")
+    if not status:
+        errors.append("status: This field is required.")
+    elif status not in statuses:
+        errors.append(f"status: {status} does not exist")
+
+    ticket_type = row.get("type")
+    if not ticket_type:
+        errors.append("type: This field is required.")
+    elif ticket_type not in types:
+        errors.append(f"type: {ticket_type} does not exist")
+
+    assignee = row.get("assignee")
+    if assignee and assignee not in users:
+        errors.append(f"assignee: {assignee} does not exist")
+
+    reporter = row.get("reporter")
+    if reporter and reporter not in users:
+        errors.append(f"reporter: {reporter} does not exist")
+
+    date_reported = row.get("date_reported")
+    if date_reported:
+        try:
+            date_reported = datetime.date.fromisoformat(str(date_reported))
+        except ValueError:
+            errors.append("date_reported: Enter a date as YYYY-MM-DD.")
+    else:
+        date_reported = datetime.date.today()
+
+    if errors:
+        raise ValidationError(errors)
+
+    return Ticket(
+        ticket_title=ticket_title,
+        ticket_info=ticket_info or None,
+        assignee_id=users[assignee] if assignee else None,
+        status_id=status,
+        type_id=ticket_type,
+        date_reported=date_reported,
+        date_due=date_due,
+        reporter_id=users[reporter] if reporter else reporter_id,
+    )
+
+
+class Command(BaseCommand):
+    help = "Imports tickets from a CSV or JSON file, validating them with the same rules as the create ticket page"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="The CSV or JSON file to import")
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            help="The format of the file, taken from the file extension if not set",
+        )
+        parser.add_argument(
+            "--reporter",
+            help="Username recorded as the reporter of rows that do not name one",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="The number of rows validated and inserted together",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Imports the tickets in batches. Each batch looks up its statuses, types and users with one query
+        each, and inserts its valid rows with a single `bulk_create` in its own transaction.
+        """
+        path = options["path"]
+        import_format = options["format"] or (
+            "csv" if path.lower().endswith(".csv") else "json"
+        )
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        reporter_id = 0
+        if options["reporter"]:
+            try:
+                reporter_id = User.objects.get(username=options["reporter"]).id
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['reporter']} does not exist")
+
+        try:
+            rows = read_rows(path, import_format)
+            start = time.perf_counter()
+            imported, failed = 0, 0
+
+            while batch := list(itertools.islice(rows, batch_size)):
+                batch_imported, batch_failed = self.import_batch(batch, reporter_id)
+                imported += batch_imported
+                failed += batch_failed
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {path}: {e}")
+
+        elapsed = time.perf_counter() - start
+        rate = imported / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} tickets in {elapsed:.2f}s ({rate:.0f} tickets/s), {failed} rows failed"
+            )
+        )
+
+    def import_batch(self, batch: list, reporter_id: int) -> tuple:
+        """
+        Validates and inserts a batch of rows, reporting the rows that fail validation
+
+        Parameters:
+            batch (list): The line numbers and rows of the batch
+            reporter_id (int): The id of the reporter for rows that do not name one
+
+        Returns:
+            imported (int): The number of tickets inserted
+            failed (int): The number of rows that failed validation
+        """
+        rows = [row for _, row in batch if isinstance(row, dict)]
+
+        def names(*fields) -> set:
+            # Values that are not text are rejected by `clean_row`
+            return {
+                row[field]
+                for row in rows
+                for field in fields
+                if isinstance(row.get(field), str)
+            }
+
+        statuses = set(
+            Status.objects.filter(status_name__in=names("status")).values_list(
+                "status_name", flat=True
+            )
+        )
+        types = set(
+            TicketType.objects.filter(type_name__in=names("type")).values_list(
+                "type_name", flat=True
+            )
+        )
+        usernames = names("assignee", "reporter")
+        users = dict(
+            User.objects.filter(username__in=usernames).values_list("username", "id")
+        )
+
+        tickets = []
+        failed = 0
+        for line, row in batch:
+            try:
+                if isinstance(row, ValidationError):
+                    raise row
+                tickets.append(clean_row(row, statuses, types, users, reporter_id))
+            except ValidationError as e:
+                failed += 1
+                self.stderr.write(f"Line {line}: {'; '.join(e.messages)}")
+
+        with transaction.atomic():
+            Ticket.objects.bulk_create(tickets)
+            # bulk_create does not send signals, so the ticket counts are recounted here
+            recount_ticket_counts(
+                {ticket.status_id for ticket in tickets},
+                {ticket.type_id for ticket in tickets},
+            )
+        # The home pages of the assignees are invalidated for the same reason
+        invalidate_dashboards(ticket.assignee_id for ticket in tickets)
+
+        return len(tickets), failed
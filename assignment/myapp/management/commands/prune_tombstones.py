@@ -0,0 +1,31 @@
+"""
+Program:  Web Based Database Application
+Filename: prune_tombstones.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from myapp.models import TicketTombstone
+
+
+class Command(BaseCommand):
+    help = "Removes the records of deleted tickets older than TOMBSTONE_RETENTION_DAYS"
+
+    def handle(self, *args, **options):
+        """
+        Removes the old tombstones. Clients with a cursor older than them are asked to load every ticket
+        again by the ticket changes API, so no deletion is missed.
+        """
+        horizon = timezone.now() - datetime.timedelta(
+            days=settings.TOMBSTONE_RETENTION_DAYS
+        )
+        deleted, _ = TicketTombstone.objects.filter(deleted_at__lt=horizon).delete()
+        self.stdout.write(self.style.SUCCESS(f"Removed {deleted} tombstones"))
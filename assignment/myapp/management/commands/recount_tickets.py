@@ -0,0 +1,26 @@
+"""
+Program:  Web Based Database Application
+Filename: recount_tickets.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from myapp.counters import recount_ticket_counts
+
+
+class Command(BaseCommand):
+    help = "Recounts the tickets of every Status and TicketType, repairing the stored counts"
+
+    def handle(self, *args, **options):
+        """
+        Recounts the tickets in a transaction, so the counts are never seen half updated
+        """
+        with transaction.atomic():
+            recount_ticket_counts()
+        self.stdout.write(self.style.SUCCESS("Ticket counts recounted"))
@@ -0,0 +1,102 @@
+"""
+Program:  Web Based Database Application
+Filename: run_worker.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+import os
+import socket
+import threading
+import traceback
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from myapp.jobs import claim_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Runs the jobs queued in the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="The number of jobs run at the same time, each in its own thread",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before checking for jobs again when the queue is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Stop once the queue is empty, rather than waiting for more jobs",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Starts a thread for each job that can run at once, running until interrupted, or until the queue
+        is empty when `--once` is given
+        """
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1")
+
+        self.stop = threading.Event()
+        name = f"{socket.gethostname()}:{os.getpid()}"
+        threads = [
+            threading.Thread(target=self.work, args=(f"{name}:{i}", options))
+            for i in range(options["concurrency"])
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping once the running jobs have finished")
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+
+    def work(self, worker: str, options: dict):
+        """
+        Claims and runs jobs one at a time. An error, such as a lost database connection, is reported and
+        the loop carries on after the poll interval, so the worker never runs with fewer threads.
+
+        Parameters:
+            worker (str): The name of the worker
+            options (dict): The options of the command
+        """
+        try:
+            while not self.stop.is_set():
+                try:
+                    # Connections are kept between jobs, but closed if broken or past CONN_MAX_AGE
+                    close_old_connections()
+                    requeue_stale_jobs()
+                    job = claim_job(worker)
+
+                    if job is None:
+                        if options["once"]:
+                            return
+                        self.stop.wait(options["poll_interval"])
+                        continue
+
+                    if run_job(job):
+                        self.stdout.write(self.style.SUCCESS(f"{worker}: {job} done"))
+                    else:
+                        self.stderr.write(f"{worker}: {job} failed")
+                except Exception:
+                    self.stderr.write(f"{worker}: {traceback.format_exc()}")
+                    # A broken connection is closed by `close_old_connections` before trying again
+                    self.stop.wait(options["poll_interval"])
+        finally:
+            connections.close_all()
@@ -0,0 +1,453 @@
+"""
+Program:  Web Based Database Application
+Filename: metrics.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+"""
+Records the number of requests, their latency and the SQL queries they run for each URL, exposed in the
+Prometheus text format by the metrics page.
+
+The metrics are added up in the memory of each process, without any database writes. As the webpage is
+run by several processes, each process also writes its totals to its own file in METRICS_DIR, at most
+once every METRICS_FLUSH_INTERVAL, and the metrics page adds up the files of every process. A file is
+named after the process and the time it started, so a new process never overwrites the totals of an
+old one, which would make the totals go down. For the same reason, the files of processes that have
+exited are added into a single file of exited processes rather than deleted, so the number of files
+stays bounded.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where the files of exited processes are kept
+    fcntl = None
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+# The upper bounds of the request latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# The least time between each process writing its totals, in seconds
+METRICS_FLUSH_INTERVAL = 1.0
+
+# The request methods recorded by name, any other method a client sends is recorded as "other" so it
+# cannot add labels without limit
+METRIC_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+# The file the totals of exited processes are added into, and the file locked while doing so
+EXITED_METRICS_FILE = "exited.json"
+EXITED_METRICS_LOCK = "exited.lock"
+
+# The query counts of the request being handled. A context variable is used as queries made by async
+# views run in other threads, which are given a copy of the context by `sync_to_async`.
+_request_queries = contextvars.ContextVar("request_queries", default=None)
+
+
+class QueryStats:
+    """
+    The number of SQL queries run by a request, and the time taken by them
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper timing each query run while a request is being handled. This is added to
+    every database connection as it is opened, see `apps.py`.
+    """
+    stats = _request_queries.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - start
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    Adds `record_query` to a database connection when it is opened
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class MetricsRegistry:
+    """
+    The metrics recorded by this process, for each route, request method and response status
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.started = time.time_ns()
+        self.last_flush = 0.0
+
+    def record(
+        self, route: str, method: str, status: int, seconds: float, queries: QueryStats
+    ):
+        """
+        Records a request
+
+        Parameters:
+            route (str): The name of the URL pattern that handled the request
+            method (str): The request method
+            status (int): The status code of the response
+            seconds (float): The time taken to handle the request
+            queries (QueryStats): The queries run by the request
+        """
+        key = (route, method, str(status))
+        with self.lock:
+            metrics = self.routes.get(key)
+            if metrics is None:
+                metrics = self.routes[key] = new_metrics()
+            metrics["count"] += 1
+            metrics["seconds"] += seconds
+            metrics["queries"] += queries.count
+            metrics["query_seconds"] += queries.seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    metrics["buckets"][i] += 1
+                    break
+
+        if time.monotonic() - self.last_flush >= METRICS_FLUSH_INTERVAL:
+            try:
+                self.flush()
+            except OSError:
+                # Recording metrics must never fail the request, the totals are written on the next flush
+                pass
+
+    def snapshot(self) -> list:
+        """
+        Copies the metrics recorded by this process
+
+        Returns:
+            (list): The labels and metrics of each route
+        """
+        with self.lock:
+            return [
+                {"labels": list(key), **metrics, "buckets": list(metrics["buckets"])}
+                for key, metrics in self.routes.items()
+            ]
+
+    def flush(self):
+        """
+        Writes the metrics recorded by this process to its file in METRICS_DIR. The file is replaced in
+        one step, so it is never read half written.
+        """
+        self.last_flush = time.monotonic()
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        path = os.path.join(settings.METRICS_DIR, f"{os.getpid()}-{self.started}.json")
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self.snapshot(), file)
+        os.replace(temp_path, path)
+
+
+registry = MetricsRegistry()
+
+
+def new_metrics() -> dict:
+    """
+    Returns:
+        (dict): The metrics of a route before any requests are recorded
+    """
+    return {
+        "count": 0,
+        "seconds": 0.0,
+        "buckets": [0] * len(LATENCY_BUCKETS),
+        "queries": 0,
+        "query_seconds": 0.0,
+    }
+
+
+def add_metrics(totals: dict, routes: list):
+    """
+    Adds the metrics read from a file to the totals
+
+    Parameters:
+        totals (dict): Maps the route, method and status to the metrics of the requests
+        routes (list): The metrics of each route, as written by `MetricsRegistry.flush`
+    """
+    for metrics in routes:
+        total = totals.setdefault(tuple(metrics["labels"]), new_metrics())
+        for field in ("count", "seconds", "queries", "query_seconds"):
+            total[field] += metrics[field]
+        for i, count in enumerate(metrics["buckets"]):
+            total["buckets"][i] += count
+
+
+def read_metrics_file(path: str):
+    """
+    Reads the metrics written to a file
+
+    Returns:
+        (list): The metrics of each route, or None if the file cannot be read, such as the file of a
+            process that stopped while writing it
+    """
+    try:
+        with open(path) as file:
+            routes = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return routes if isinstance(routes, list) else None
+
+
+def get_file_process(name: str):
+    """
+    Gets the id of the process that wrote a metrics file, from its name
+
+    Returns:
+        (int): The process id, or None if the file was not written by a single process
+    """
+    try:
+        return int(name.split("-", 1)[0])
+    except ValueError:
+        return None
+
+
+def process_exists(pid: int) -> bool:
+    """
+    Checks if a process is running, by sending it no signal
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # The process exists but belongs to another user
+        return True
+    return True
+
+
+def fold_exited_processes(directory: str):
+    """
+    Adds the totals of the processes that have exited into EXITED_METRICS_FILE and deletes their files.
+    A lock is held while this is done, so the totals of a process are never added twice by processes
+    collecting the metrics at the same time.
+
+    Parameters:
+        directory (str): The metrics directory
+    """
+    if fcntl is None:
+        return
+
+    with open(os.path.join(directory, EXITED_METRICS_LOCK), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        exited = [
+            name
+            for name in os.listdir(directory)
+            if (pid := get_file_process(name)) is not None and not process_exists(pid)
+        ]
+        if not exited:
+            return
+
+        exited_path = os.path.join(directory, EXITED_METRICS_FILE)
+        totals = {}
+        add_metrics(totals, read_metrics_file(exited_path) or [])
+        for name in exited:
+            # Temporary files are left half written by a process that stopped while writing them
+            if name.endswith(".json"):
+                add_metrics(
+                    totals, read_metrics_file(os.path.join(directory, name)) or []
+                )
+
+        temp_path = f"{exited_path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(
+                [{"labels": list(key), **metrics} for key, metrics in totals.items()],
+                file,
+            )
+        os.replace(temp_path, exited_path)
+
+        for name in exited:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def collect_metrics() -> dict:
+    """
+    Adds up the metrics written by every process. Files that cannot be read are skipped, and if the
+    metrics directory cannot be read, only the metrics of this process are returned.
+
+    Returns:
+        (dict): Maps the route, method and status to the metrics of the requests
+    """
+    totals = {}
+    try:
+        registry.flush()
+        fold_exited_processes(settings.METRICS_DIR)
+        names = os.listdir(settings.METRICS_DIR)
+    except OSError:
+        add_metrics(totals, registry.snapshot())
+        return totals
+
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        routes = read_metrics_file(os.path.join(settings.METRICS_DIR, name))
+        if routes is not None:
+            add_metrics(totals, routes)
+
+    return totals
+
+
+def format_labels(key: tuple, **extra) -> str:
+    """
+    Formats the labels of a metric, escaping the values as required by the Prometheus text format
+    """
+    labels = dict(zip(("route", "method", "status"), key), **extra)
+    values = (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in labels.values()
+    )
+    return ",".join(f'{name}="{value}"' for name, value in zip(labels, values))
+
+
+def render_metrics(totals: dict) -> str:
+    """
+    Formats metrics in the Prometheus text format
+
+    Parameters:
+        totals (dict): The metrics built by `collect_metrics`
+
+    Returns:
+        (str): The formatted metrics
+    """
+    keys = sorted(totals)
+    lines = [
+        "# HELP assignment_requests_total Requests handled.",
+        "# TYPE assignment_requests_total counter",
+    ]
+    lines += [
+        f"assignment_requests_total{{{format_labels(key)}}} {totals[key]['count']}"
+        for key in keys
+    ]
+
+    lines += [
+        "# HELP assignment_request_duration_seconds Time taken to handle requests.",
+        "# TYPE assignment_request_duration_seconds histogram",
+    ]
+    for key in keys:
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, totals[key]["buckets"]):
+            cumulative += count
+            lines.append(
+                f"assignment_request_duration_seconds_bucket{{{format_labels(key, le=bound)}}} {cumulative}"
+            )
+        lines.append(
+            f"assignment_request_duration_seconds_bucket{{{format_labels(key, le='+Inf')}}} {totals[key]['count']}"
+        )
+        lines.append(
+            f"assignment_request_duration_seconds_sum{{{format_labels(key)}}} {totals[key]['seconds']}"
+        )
+        lines.append(
+            f"assignment_request_duration_seconds_count{{{format_labels(key)}}} {totals[key]['count']}"
+        )
+
+    lines += [
+        "# HELP assignment_db_queries_total SQL queries run by requests.",
+        "# TYPE assignment_db_queries_total counter",
+    ]
+    lines += [
+        f"assignment_db_queries_total{{{format_labels(key)}}} {totals[key]['queries']}"
+        for key in keys
+    ]
+
+    lines += [
+        "# HELP assignment_db_query_seconds_total Time taken by SQL queries run by requests.",
+        "# TYPE assignment_db_query_seconds_total counter",
+    ]
+    lines += [
+        f"assignment_db_query_seconds_total{{{format_labels(key)}}} {totals[key]['query_seconds']}"
+        for key in keys
+    ]
+
+    return "\n".join(lines) + "\n"
+
+
+def get_route(request) -> str:
+    """
+    Gets the name of the URL pattern that handled a request, so requests for different tickets or
+    statuses are recorded together
+
+    Returns:
+        (str): The name of the URL pattern, "unmatched" if no pattern matched
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.url_name or match.route
+
+
+class MetricsMiddleware:
+    """
+    Records the metrics of each request. Queries run while a streaming response is sent, such as by the
+    ticket export, happen after the middleware has returned and so are not included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        queries = QueryStats()
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self.record(request, response, time.perf_counter() - start, queries)
+        return response
+
+    async def __acall__(self, request):
+        queries = QueryStats()
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self.record(request, response, time.perf_counter() - start, queries)
+        return response
+
+    def record(self, request, response, seconds: float, queries: QueryStats):
+        """
+        Records the metrics of a request in the registry of this process
+        """
+        registry.record(
+            get_route(request),
+            request.method if request.method in METRIC_METHODS else "other",
+            response.status_code,
+            seconds,
+            queries,
+        )
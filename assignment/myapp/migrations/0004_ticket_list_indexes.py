@@ -0,0 +1,27 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0003_status_reporter_id_tickettype_reporter_id_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["ticket_title", "ticket_id"],
+                name="myapp_ticke_ticket__26dd8e_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["date_reported", "ticket_id"],
+                name="myapp_ticke_date_re_347b59_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0004_ticket_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["status", "date_due"], name="myapp_ticke_status__74d677_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["type", "date_due"], name="myapp_ticke_type_id_1303a1_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["assignee", "status"], name="myapp_ticke_assigne_118739_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["reporter_id"], name="myapp_ticke_reporte_d929b4_idx"
+            ),
+        ),
+    ]
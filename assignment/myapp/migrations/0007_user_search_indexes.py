@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# The assignee autocomplete matches the start of the username, first name and last name ignoring case,
+# which Django runs on PostgreSQL as UPPER(column::text) LIKE UPPER('text%'). These indexes match that
+# expression, and text_pattern_ops allows them to be used for prefix LIKE searches. SQLite is used for
+# local development, so no indexes are created there.
+USER_SEARCH_COLUMNS = ("username", "first_name", "last_name")
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for column in USER_SEARCH_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "myapp_user_{column}_prefix_idx" '
+            f'ON "auth_user" (UPPER("{column}"::text) text_pattern_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for column in USER_SEARCH_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "myapp_user_{column}_prefix_idx"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("myapp", "0006_ticket_search_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:42
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_tickets(tickets, field):
+    counts = (
+        tickets.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def populate_counts(apps, schema_editor):
+    Ticket = apps.get_model("myapp", "Ticket")
+    Status = apps.get_model("myapp", "Status")
+    TicketType = apps.get_model("myapp", "TicketType")
+
+    Status.objects.update(ticket_count=count_tickets(Ticket.objects.all(), "status"))
+    # No Status is closed yet, so every ticket is open
+    TicketType.objects.update(
+        ticket_count=count_tickets(Ticket.objects.all(), "type"),
+        open_ticket_count=count_tickets(Ticket.objects.all(), "type"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0007_user_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="status",
+            name="is_closed",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="status",
+            name="ticket_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="tickettype",
+            name="open_ticket_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="tickettype",
+            name="ticket_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0008_ticket_counts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BulkDeletion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model_name", models.CharField(max_length=20)),
+                ("object_id", models.CharField(max_length=20)),
+                ("total", models.PositiveIntegerField(default=0)),
+                ("deleted", models.PositiveIntegerField(default=0)),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("error", models.CharField(blank=True, max_length=2000, null=True)),
+                ("requested_by", models.PositiveIntegerField(default=0)),
+                ("date_requested", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
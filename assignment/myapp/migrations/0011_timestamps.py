@@ -0,0 +1,81 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:04
+
+import datetime
+import django.utils.timezone
+from django.db import migrations, models
+from myapp.search import install_search_index
+
+
+def backfill_created_at(apps, schema_editor):
+    # Tickets were created on the day they were reported, the time of day is not known
+    Ticket = apps.get_model("myapp", "Ticket")
+    tickets = []
+    for ticket in Ticket.objects.only("ticket_id", "date_reported").iterator(
+        chunk_size=1000
+    ):
+        ticket.created_at = django.utils.timezone.make_aware(
+            datetime.datetime.combine(ticket.date_reported, datetime.time())
+        )
+        tickets.append(ticket)
+        if len(tickets) == 1000:
+            Ticket.objects.bulk_update(tickets, ["created_at"])
+            tickets = []
+    Ticket.objects.bulk_update(tickets, ["created_at"])
+
+
+def create_index(apps, schema_editor):
+    # Adding the columns rebuilds the ticket table on SQLite, which drops the search index triggers
+    install_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0010_job_queue"),
+    ]
+
+    operations = [
+        # Reinstalls the search index once the columns have been removed when this is reversed
+        migrations.RunPython(migrations.RunPython.noop, create_index),
+        migrations.AddField(
+            model_name="status",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, db_index=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="status",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, db_index=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name="tickettype",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, db_index=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="tickettype",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(backfill_created_at, migrations.RunPython.noop),
+        migrations.RunPython(create_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:11
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0011_timestamps"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TicketTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("ticket_id", models.PositiveIntegerField()),
+                ("deleted_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["updated_at", "ticket_id"],
+                name="myapp_ticke_updated_91a0ad_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tickettombstone",
+            index=models.Index(
+                fields=["deleted_at", "ticket_id"],
+                name="myapp_ticke_deleted_c4f606_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("myapp", "0012_ticket_tombstones"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="date_heartbeat",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -9,7 +9,8 @@ Tutor:    Suraksha Neupane
 Date:     22/09/23
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 
@@ -17,6 +18,29 @@ class Status(models.Model):
     status_name = models.CharField(max_length=20, primary_key=True, null=False)
     status_description = models.CharField(max_length=100, blank=True, null=True)
     reporter_id = models.PositiveIntegerField(null=False, default=0)
+    # Tickets with a closed status are not counted as open
+    is_closed = models.BooleanField(default=False)
+    # Maintained by the signal handlers in `signals.py`, see `counters.py`
+    ticket_count = models.PositiveIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Used for the ETag and Last-Modified headers of the view status page, see `views.conditional_page` and
+    # `async_views.async_conditional_page`
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the Status, without overwriting its ticket count when updating it, as the count may have
+        been changed since the Status was loaded. This is done in a transaction, so the ticket counts
+        recounted when the Status is opened or closed are committed with it.
+        """
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "ticket_count"
+            ]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         """
@@ -31,6 +55,27 @@ class TicketType(models.Model):
     type_name = models.CharField(max_length=20, null=False, primary_key=True)
     type_description = models.CharField(max_length=100, blank=True, null=True)
     reporter_id = models.PositiveIntegerField(null=False, default=0)
+    # Maintained by the signal handlers in `signals.py`, see `counters.py`
+    ticket_count = models.PositiveIntegerField(default=0, editable=False)
+    open_ticket_count = models.PositiveIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Used for the ETag and Last-Modified headers of the view type page, see `views.conditional_page` and
+    # `async_views.async_conditional_page`
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the TicketType, without overwriting its ticket counts when updating it, as the counts may
+        have been changed since the TicketType was loaded
+        """
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in ("ticket_count", "open_ticket_count")
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         """
@@ -51,3 +96,163 @@ class Ticket(models.Model):
     date_reported = models.DateField(null=False)
     date_due = models.DateField(blank=True, null=True)
     reporter_id = models.PositiveIntegerField(null=False, default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Used for the ETag and Last-Modified headers of the ticket pages, see `views.conditional_page` and
+    # `async_views.async_conditional_page`. Updates made with `update()` do not set it, so they must set it
+    # themselves.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Support keyset pagination of the ticket list for each of its sort orders
+            models.Index(fields=["ticket_title", "ticket_id"]),
+            models.Index(fields=["date_reported", "ticket_id"]),
+            # Support the filters available on the ticket list
+            models.Index(fields=["status", "date_due"]),
+            models.Index(fields=["type", "date_due"]),
+            models.Index(fields=["assignee", "status"]),
+            models.Index(fields=["reporter_id"]),
+            # Support reading the tickets changed since a cursor, see `changes.py`
+            models.Index(fields=["updated_at", "ticket_id"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the Ticket in a transaction, so the ticket counts of its Status and TicketType, which are
+        updated when it is saved, are committed with it
+        """
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class TicketTombstone(models.Model):
+    """
+    Records that a Ticket was deleted, so clients reading the changes to the tickets since they last
+    checked are told about it, see `changes.py`. Tombstones are removed by the `prune_tombstones` command
+    once they are older than TOMBSTONE_RETENTION_DAYS.
+    """
+
+    ticket_id = models.PositiveIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deleted_at", "ticket_id"]),
+        ]
+
+    def __str__(self) -> str:
+        """
+        Used to return formatted values from an entry to display information to the user in a more readable way
+        Returns:
+            : The id of the deleted ticket
+        """
+        return f"Ticket {self.ticket_id} deleted"
+
+
+class Job(models.Model):
+    """
+    A task queued to be run by the `run_worker` command, see `jobs.py`
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    task = models.CharField(max_length=200)
+    arguments = models.JSONField(default=list)
+    state = models.CharField(max_length=10, choices=STATES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=100, blank=True, null=True)
+    error = models.CharField(max_length=2000, blank=True, null=True)
+    requested_by = models.PositiveIntegerField(null=False, default=0)
+    date_requested = models.DateTimeField(auto_now_add=True)
+    date_started = models.DateTimeField(blank=True, null=True)
+    # Refreshed by the worker while the job runs, so jobs of workers that have stopped can be found
+    date_heartbeat = models.DateTimeField(blank=True, null=True)
+    date_finished = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Support workers finding the next job to run
+            models.Index(fields=["state", "run_after"]),
+        ]
+
+    def __str__(self) -> str:
+        """
+        Used to return formatted values from an entry to display information to the user in a more readable way
+        Returns:
+            : The id and task of the job
+        """
+        return f"Job {self.id} ({self.task.rsplit('.', 1)[-1]})"
+
+    @property
+    def is_active(self) -> bool:
+        """
+        Returns:
+            (bool): If the job has not yet finished
+        """
+        return self.state in (self.QUEUED, self.RUNNING)
+
+
+class BulkDeletion(models.Model):
+    """
+    A Status or TicketType being deleted in the background, along with the tickets using it
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    model_name = models.CharField(max_length=20)
+    object_id = models.CharField(max_length=20)
+    total = models.PositiveIntegerField(default=0)
+    deleted = models.PositiveIntegerField(default=0)
+    state = models.CharField(max_length=10, choices=STATES, default=PENDING)
+    error = models.CharField(max_length=2000, blank=True, null=True)
+    requested_by = models.PositiveIntegerField(null=False, default=0)
+    date_requested = models.DateTimeField(auto_now_add=True)
+    job = models.ForeignKey(Job, blank=True, null=True, on_delete=models.SET_NULL)
+
+    def __str__(self) -> str:
+        """
+        Used to return formatted values from an entry to display information to the user in a more readable way
+        Returns:
+            : The entry being deleted
+        """
+        return f"{self.model_name} {self.object_id}"
+
+    @property
+    def percent(self) -> int:
+        """
+        Returns:
+            (int): How much of the deletion is complete, as a percentage
+        """
+        if self.state == self.DONE:
+            return 100
+        if not self.total:
+            return 0
+        return min(self.deleted * 100 // self.total, 100)
+
+    @property
+    def is_active(self) -> bool:
+        """
+        Returns:
+            (bool): If the deletion has not yet finished
+        """
+        return self.state in (self.PENDING, self.RUNNING)
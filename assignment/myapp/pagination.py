@@ -0,0 +1,263 @@
+"""
+Program:  Web Based Database Application
+Filename: pagination.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+import base64
+import datetime
+import json
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+
+PAGE_SIZE = 50
+
+# The columns a ticket list can be ordered by. `ticket_id` is always used as the final tie-breaker
+# so every row has a unique position, which is what allows a cursor to point between two rows.
+SORT_KEYS = ("ticket_id", "ticket_title", "date_reported")
+DEFAULT_SORT = "ticket_id"
+# The type each sort column is decoded from a cursor as
+SORT_KEY_TYPES = {"ticket_id": int, "ticket_title": str, "date_reported": datetime.date}
+MAX_CURSOR_INT = 2**63 - 1
+
+
+class KeysetPage:
+    """
+    A single page of results produced by `paginate`
+
+    Attributes:
+        items (list): The rows on this page, in display order
+        next_cursor (str): Cursor for the page after this one, None if this is the last page
+        previous_cursor (str): Cursor for the page before this one, None if this is the first page
+    """
+
+    def __init__(self, items: list, next_cursor: str, previous_cursor: str):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+
+def clean_sort(sort: str) -> str:
+    """
+    Validates a sort key supplied by the user, falling back to the default when it is not recognised
+
+    Parameters:
+        sort (str): The sort key, optionally prefixed with "-" for descending order
+
+    Returns:
+        (str): A valid sort key
+    """
+    if sort and sort.lstrip("-") in SORT_KEYS:
+        return sort
+    return DEFAULT_SORT
+
+
+def encode_cursor(values: list) -> str:
+    """
+    Encodes the sort values of a row into an opaque, URL safe cursor
+
+    Parameters:
+        values (list): The values of the sort columns for the row
+
+    Returns:
+        (str): The encoded cursor
+    """
+    data = json.dumps(values, default=str).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _convert_cursor_value(value, value_type: type):
+    """
+    Converts a value decoded from a cursor to the type of its column, so values that could not have come
+    from `encode_cursor` are rejected before they reach the database
+
+    Raises:
+        ValueError: If the value is not of the type
+    """
+    if value_type is int:
+        # JSON booleans are ints in Python, but are never written by `encode_cursor`
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError("Invalid page cursor")
+        value = int(value)
+        # Larger values overflow the integer columns of the database
+        if abs(value) > MAX_CURSOR_INT:
+            raise ValueError("Invalid page cursor")
+        return value
+
+    if not isinstance(value, str):
+        raise ValueError("Invalid page cursor")
+    if value_type is str:
+        return value
+    if value_type is datetime.datetime:
+        value = parse_datetime(value)
+    elif value_type is datetime.date:
+        value = parse_date(value)
+    else:
+        raise TypeError(f"Unsupported cursor value type {value_type}")
+    if value is None:
+        raise ValueError("Invalid page cursor")
+    return value
+
+
+def decode_cursor(cursor: str, types: list) -> list:
+    """
+    Decodes a cursor created by `encode_cursor`
+
+    Parameters:
+        cursor (str): The cursor supplied by the user
+        types (list): The type of each value the cursor is expected to contain, one of int, str,
+            datetime.date or datetime.datetime
+
+    Returns:
+        values (list): The values of the sort columns, converted to their types
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid page cursor") from e
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid page cursor")
+    try:
+        return [
+            _convert_cursor_value(value, value_type)
+            for value, value_type in zip(values, types)
+        ]
+    except ValueError as e:
+        # Dates that are well formed but do not exist, such as 2023-02-30, raise their own ValueError
+        raise ValueError("Invalid page cursor") from e
+
+
+def _row_value(row, field: str):
+    """
+    Reads a column from a row, supporting both model instances and `values()` dictionaries
+    """
+    if isinstance(row, dict):
+        return row[field]
+    return getattr(row, field)
+
+
+def _keyset_filter(fields: list, values: list, lookup: str) -> Q:
+    """
+    Builds the filter selecting the rows positioned after a cursor.
+
+    For the fields (a, b) and lookup "gt" this is: a > x OR (a = x AND b > y)
+    """
+    condition = Q(**{f"{fields[-1]}__{lookup}": values[-1]})
+    for field, value in zip(reversed(fields[:-1]), reversed(values[:-1])):
+        condition = Q(**{f"{field}__{lookup}": value}) | (
+            Q(**{field: value}) & condition
+        )
+    return condition
+
+
+def _page_queryset(queryset, sort: str, after: str, before: str, page_size: int):
+    """
+    Builds the query for a page of results. One more row than the page size is selected, to find out if
+    there is another page after it.
+
+    Returns:
+        queryset (QuerySet): The ordered and sliced queryset
+        fields (list): The columns the rows are ordered by
+    """
+    descending = sort.startswith("-")
+    field = sort.lstrip("-")
+    fields = [field] if field == "ticket_id" else [field, "ticket_id"]
+
+    backwards = before is not None
+    cursor = before if backwards else after
+    # Walking backwards through a descending list is the same as walking forwards through an ascending one
+    reverse = descending != backwards
+
+    if cursor is not None:
+        values = decode_cursor(cursor, [SORT_KEY_TYPES[f] for f in fields])
+        queryset = queryset.filter(
+            _keyset_filter(fields, values, "lt" if reverse else "gt")
+        )
+
+    ordering = [f"-{f}" if reverse else f for f in fields]
+    return queryset.order_by(*ordering)[: page_size + 1], fields
+
+
+def _build_page(
+    rows: list, fields: list, after: str, before: str, page_size: int
+) -> KeysetPage:
+    """
+    Builds a page from the rows selected by the query from `_page_queryset`
+    """
+    backwards = before is not None
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if backwards:
+        rows.reverse()
+
+    def row_cursor(row) -> str:
+        return encode_cursor([_row_value(row, f) for f in fields])
+
+    next_cursor = None
+    previous_cursor = None
+    if rows:
+        # A page reached by going backwards always has the page it came from after it
+        if has_more or backwards:
+            next_cursor = row_cursor(rows[-1])
+        if (has_more and backwards) or (after is not None and not backwards):
+            previous_cursor = row_cursor(rows[0])
+
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def paginate(
+    queryset,
+    sort: str = DEFAULT_SORT,
+    after: str = None,
+    before: str = None,
+    page_size: int = PAGE_SIZE,
+) -> KeysetPage:
+    """
+    Paginates a ticket queryset using keyset (cursor) pagination. The ordering and the page boundary are
+    both applied in SQL, so each page is a single bounded query no matter how large the table is.
+
+    Parameters:
+        queryset (QuerySet): The tickets to paginate
+        sort (str), default="ticket_id": The sort key, optionally prefixed with "-" for descending order
+        after (str), default=None: Cursor of the row the page should start after
+        before (str), default=None: Cursor of the row the page should end before
+        page_size (int), default=PAGE_SIZE: The maximum number of rows on a page
+
+    Returns:
+        (KeysetPage): The page of results with the cursors for its neighbours
+
+    Raises:
+        ValueError: If a cursor is malformed
+    """
+    page_queryset, fields = _page_queryset(
+        queryset, clean_sort(sort), after, before, page_size
+    )
+    return _build_page(list(page_queryset), fields, after, before, page_size)
+
+
+async def apaginate(
+    queryset,
+    sort: str = DEFAULT_SORT,
+    after: str = None,
+    before: str = None,
+    page_size: int = PAGE_SIZE,
+) -> KeysetPage:
+    """
+    Async version of `paginate`, reading the page using the async ORM API
+    """
+    page_queryset, fields = _page_queryset(
+        queryset, clean_sort(sort), after, before, page_size
+    )
+    rows = [row async for row in page_queryset]
+    return _build_page(rows, fields, after, before, page_size)
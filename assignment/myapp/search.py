@@ -0,0 +1,198 @@
+"""
+Program:  Web Based Database Application
+Filename: search.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+"""
+References:
+SQLite full text search uses the FTS5 extension, kept in sync with the ticket table using triggers.
+PostgreSQL full text search uses an expression GIN index over the ticket title and info.
+
+SQLite (2023) SQLite FTS5 Extension. Available at: https://www.sqlite.org/fts5.html (Accessed: 22 September 2023)
+PostgreSQL (2023) Full Text Search. Available at: https://www.postgresql.org/docs/current/textsearch.html (Accessed: 22 September 2023)
+"""
+
+from django.db import connection
+from django.db.models import Q
+from .models import Ticket
+
+SEARCH_PAGE_SIZE = 25
+# The last page of results that can be read, as each page skips the rows of the pages before it. This
+# also keeps the offset within the integers the database accepts.
+MAX_SEARCH_PAGE = 400
+
+# SQLite (2023) - START
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS myapp_ticket_fts USING fts5(
+        ticket_title, ticket_info, content='myapp_ticket', content_rowid='ticket_id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS myapp_ticket_fts_insert AFTER INSERT ON myapp_ticket BEGIN
+        INSERT INTO myapp_ticket_fts(rowid, ticket_title, ticket_info)
+        VALUES (new.ticket_id, new.ticket_title, new.ticket_info);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS myapp_ticket_fts_delete AFTER DELETE ON myapp_ticket BEGIN
+        INSERT INTO myapp_ticket_fts(myapp_ticket_fts, rowid, ticket_title, ticket_info)
+        VALUES ('delete', old.ticket_id, old.ticket_title, old.ticket_info);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS myapp_ticket_fts_update
+    AFTER UPDATE OF ticket_title, ticket_info ON myapp_ticket BEGIN
+        INSERT INTO myapp_ticket_fts(myapp_ticket_fts, rowid, ticket_title, ticket_info)
+        VALUES ('delete', old.ticket_id, old.ticket_title, old.ticket_info);
+        INSERT INTO myapp_ticket_fts(rowid, ticket_title, ticket_info)
+        VALUES (new.ticket_id, new.ticket_title, new.ticket_info);
+    END
+    """,
+    "INSERT INTO myapp_ticket_fts(myapp_ticket_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS myapp_ticket_fts_insert",
+    "DROP TRIGGER IF EXISTS myapp_ticket_fts_delete",
+    "DROP TRIGGER IF EXISTS myapp_ticket_fts_update",
+    "DROP TABLE IF EXISTS myapp_ticket_fts",
+]
+
+# Matches on the title are ranked ten times higher than matches on the info
+SQLITE_SEARCH = """
+    SELECT rowid FROM myapp_ticket_fts WHERE myapp_ticket_fts MATCH %s
+    ORDER BY bm25(myapp_ticket_fts, 10.0, 1.0), rowid LIMIT %s OFFSET %s
+"""
+# SQLite (2023) - END
+
+# PostgreSQL (2023) - START
+# The search query must use exactly the same expression as the index for the index to be used
+POSTGRES_DOCUMENT = """
+    setweight(to_tsvector('english', coalesce(ticket_title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(ticket_info, '')), 'B')
+"""
+
+POSTGRES_CREATE = [
+    f"""
+    CREATE INDEX IF NOT EXISTS myapp_ticket_search_idx ON myapp_ticket
+    USING GIN (({POSTGRES_DOCUMENT}))
+    """,
+]
+
+POSTGRES_DROP = ["DROP INDEX IF EXISTS myapp_ticket_search_idx"]
+
+POSTGRES_SEARCH = f"""
+    SELECT ticket_id FROM myapp_ticket, websearch_to_tsquery('english', %s) query
+    WHERE ({POSTGRES_DOCUMENT}) @@ query
+    ORDER BY ts_rank(({POSTGRES_DOCUMENT}), query) DESC, ticket_id LIMIT %s OFFSET %s
+"""
+# PostgreSQL (2023) - END
+
+
+def install_search_index(schema_editor):
+    """
+    Creates the full text index for the ticket table on the database being migrated. This must also be
+    run after any migration that rebuilds the ticket table on SQLite, as rebuilding drops the triggers.
+
+    Parameters:
+        schema_editor: The schema editor of the migration
+    """
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        statements = SQLITE_CREATE
+    elif vendor == "postgresql":
+        statements = POSTGRES_CREATE
+    else:
+        return
+
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def remove_search_index(schema_editor):
+    """
+    Removes the full text index created by `install_search_index`
+
+    Parameters:
+        schema_editor: The schema editor of the migration
+    """
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "sqlite":
+        statements = SQLITE_DROP
+    elif vendor == "postgresql":
+        statements = POSTGRES_DROP
+    else:
+        return
+
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def sqlite_match_query(text: str) -> str:
+    """
+    Converts the text entered by the user into an FTS5 query. Each word is quoted so characters in the
+    text are not interpreted as FTS5 query syntax.
+
+    Parameters:
+        text (str): The search text
+
+    Returns:
+        (str): The FTS5 query, matching tickets containing all of the words
+    """
+    words = ['"' + word.replace('"', '""') + '"' for word in text.split()]
+    return " ".join(words)
+
+
+def search_ticket_ids(text: str, page: int = 1, page_size: int = SEARCH_PAGE_SIZE):
+    """
+    Searches the ticket titles and info, using the full text index of the database
+
+    Parameters:
+        text (str): The search text
+        page (int), default=1: The page of results to return, no results are returned after
+            MAX_SEARCH_PAGE
+        page_size (int), default=SEARCH_PAGE_SIZE: The number of results on a page
+
+    Returns:
+        ticket_ids (list): The ids of the matching tickets on the page, best match first
+        has_next (bool): Denotes if there are more results after this page
+    """
+    text = text.strip()
+    if not text or page > MAX_SEARCH_PAGE:
+        return [], False
+
+    # One extra row is fetched to find out if there is another page
+    limit = page_size + 1
+    offset = (page - 1) * page_size
+
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(SQLITE_SEARCH, [sqlite_match_query(text), limit, offset])
+            ticket_ids = [row[0] for row in cursor.fetchall()]
+    elif connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(POSTGRES_SEARCH, [text, limit, offset])
+            ticket_ids = [row[0] for row in cursor.fetchall()]
+    else:
+        # Databases without a supported full text index fall back to a pattern match
+        ticket_ids = list(
+            Ticket.objects.filter(
+                Q(ticket_title__icontains=text) | Q(ticket_info__icontains=text)
+            )
+            .order_by("ticket_id")
+            .values_list("ticket_id", flat=True)[offset : offset + limit]
+        )
+
+    return (
+        ticket_ids[:page_size],
+        len(ticket_ids) > page_size and page < MAX_SEARCH_PAGE,
+    )
@@ -0,0 +1,146 @@
+"""
+Program:  Web Based Database Application
+Filename: seeding.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+import datetime
+import random
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from .counters import recount_ticket_counts
+from .models import Ticket, Status, TicketType
+
+SEED_BATCH_SIZE = 1000
+SEED_PASSWORD = "BenchPassword"
+# Every ticket is reported in the year before this date, and half of them are due in the year after it
+SEED_START_DATE = datetime.date(2023, 1, 1)
+
+
+def seed_data(
+    users: int,
+    statuses: int,
+    types: int,
+    tickets: int,
+    seed: int = 0,
+    batch_size: int = SEED_BATCH_SIZE,
+) -> dict:
+    """
+    Fills the database with generated users, statuses, types and tickets using bulk inserts. The same
+    seed always generates the same data, so benchmarks of different builds can be compared. Users,
+    statuses and types that already exist are kept, tickets are always added.
+
+    Every fourth status is closed, and a quarter of the tickets are not assigned to anyone. The users
+    share the password `SEED_PASSWORD`.
+
+    Parameters:
+        users (int): The number of users to create
+        statuses (int): The number of statuses to create
+        types (int): The number of ticket types to create
+        tickets (int): The number of tickets to create
+        seed (int), default=0: Seeds the random choices
+        batch_size (int), default=SEED_BATCH_SIZE: The number of rows inserted by each query
+
+    Returns:
+        (dict): The usernames, status names, type names and ticket ids that were created
+    """
+    rng = random.Random(seed)
+    # Hashing a password is deliberately slow, so every user shares the same hash
+    password = make_password(SEED_PASSWORD)
+
+    usernames = [f"bench_user_{i}" for i in range(users)]
+    User.objects.bulk_create(
+        (
+            User(
+                username=username,
+                password=password,
+                first_name=f"Bench{i}",
+                last_name="User",
+            )
+            for i, username in enumerate(usernames)
+        ),
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    user_ids = list(
+        User.objects.filter(username__in=usernames)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+    status_names = [f"Bench status {i}" for i in range(statuses)]
+    Status.objects.bulk_create(
+        (
+            Status(
+                status_name=name,
+                status_description=f"Generated status {i}",
+                reporter_id=rng.choice(user_ids) if user_ids else 0,
+                is_closed=i % 4 == 3,
+            )
+            for i, name in enumerate(status_names)
+        ),
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+
+    type_names = [f"Bench type {i}" for i in range(types)]
+    TicketType.objects.bulk_create(
+        (
+            TicketType(
+                type_name=name,
+                type_description=f"Generated type {i}",
+                reporter_id=rng.choice(user_ids) if user_ids else 0,
+            )
+            for i, name in enumerate(type_names)
+        ),
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+
+    def generate_ticket(i: int) -> Ticket:
+        date_reported = SEED_START_DATE - datetime.timedelta(days=rng.randrange(365))
+        return Ticket(
+            ticket_title=f"Bench ticket {i} {rng.getrandbits(32):08x}",
+            ticket_info=f"Generated ticket {i}" if rng.random() < 0.5 else None,
+            assignee_id=(
+                rng.choice(user_ids) if user_ids and rng.random() < 0.75 else None
+            ),
+            status_id=rng.choice(status_names) if status_names else None,
+            type_id=rng.choice(type_names) if type_names else None,
+            date_reported=date_reported,
+            date_due=(
+                SEED_START_DATE + datetime.timedelta(days=rng.randrange(365))
+                if rng.random() < 0.5
+                else None
+            ),
+            reporter_id=rng.choice(user_ids) if user_ids else 0,
+        )
+
+    latest_id = (
+        Ticket.objects.order_by("-ticket_id")
+        .values_list("ticket_id", flat=True)
+        .first()
+    )
+    Ticket.objects.bulk_create(
+        (generate_ticket(i) for i in range(tickets)), batch_size=batch_size
+    )
+    ticket_ids = list(
+        Ticket.objects.filter(ticket_id__gt=latest_id or 0)
+        .order_by("ticket_id")
+        .values_list("ticket_id", flat=True)
+    )
+
+    # bulk_create does not send signals, so the ticket counts are recounted here
+    recount_ticket_counts(status_names, type_names)
+
+    return {
+        "usernames": usernames,
+        "status_names": status_names,
+        "type_names": type_names,
+        "ticket_ids": ticket_ids,
+    }
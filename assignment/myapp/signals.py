@@ -0,0 +1,143 @@
+"""
+Program:  Web Based Database Application
+Filename: signals.py
+@author:  © Jack Styles
+Course:   BSc Digital Technology Solutions
+Module:   Software Engineering and Agile
+Tutor:    Suraksha Neupane
+@version: 1.0
+Date:     22/09/23
+"""
+
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from django.db.models import DEFERRED
+from .caching import (
+    bump_reference_version,
+    bump_ticket_deletions_version,
+    invalidate_dashboards,
+)
+from .counters import adjust_ticket_counts, recount_ticket_counts
+from .events import broadcaster, publish_ticket_deleted, publish_ticket_saved
+from .models import Ticket, Status, TicketType, TicketTombstone
+
+
+@receiver(post_save, sender=Status)
+@receiver(post_delete, sender=Status)
+@receiver(post_save, sender=TicketType)
+@receiver(post_delete, sender=TicketType)
+def reference_data_changed(sender, **kwargs):
+    """
+    Invalidates the cached Statuses and TicketTypes when one is created, updated or deleted. This waits
+    for the change to be committed, as a request reading the old rows before then would cache them again.
+    """
+    transaction.on_commit(bump_reference_version)
+
+
+@receiver(post_init, sender=Status)
+def remember_closed(sender, instance, **kwargs):
+    """
+    Records if a Status was closed when it was loaded, so a change to it can be found on save
+    """
+    instance._loaded_is_closed = instance.__dict__.get("is_closed")
+
+
+@receiver(post_save, sender=Status)
+def status_saved(sender, instance, created, **kwargs):
+    """
+    Recounts the open tickets of the TicketTypes when a Status with tickets is opened or closed
+    """
+    if not created and instance.is_closed != instance._loaded_is_closed:
+        # The number of tickets using the Status does not change, only the types of its tickets
+        recount_ticket_counts(
+            status_ids=[],
+            type_ids=Ticket.objects.filter(status=instance).values("type"),
+        )
+    instance._loaded_is_closed = instance.is_closed
+
+
+@receiver(post_init, sender=Ticket)
+def remember_ticket(sender, instance, **kwargs):
+    """
+    Records the assignee, Status and TicketType a Ticket was loaded with, so the user it is unassigned
+    from and the counts it is moved between on save are known. The fields are read from the instance
+    dictionary, as they are missing when the fields are deferred.
+    """
+    instance._loaded_assignee_id = instance.__dict__.get("assignee_id")
+    if "status_id" in instance.__dict__ and "type_id" in instance.__dict__:
+        instance._loaded_counts = (instance.status_id, instance.type_id)
+    else:
+        instance._loaded_counts = DEFERRED
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, **kwargs):
+    """
+    Invalidates the cached home page of the user a saved Ticket is assigned to, and of the user it was
+    assigned to before, and moves it between the ticket counts of its old and new Status and TicketType.
+    The home pages are invalidated once the Ticket is committed, as the ticket counts are.
+    """
+    transaction.on_commit(
+        partial(
+            invalidate_dashboards, [instance._loaded_assignee_id, instance.assignee_id]
+        )
+    )
+    instance._loaded_assignee_id = instance.assignee_id
+
+    if "status_id" in instance.__dict__ and "type_id" in instance.__dict__:
+        counts = (instance.status_id, instance.type_id)
+    else:
+        counts = DEFERRED
+
+    if created:
+        adjust_ticket_counts(None, counts)
+    elif DEFERRED in (instance._loaded_counts, counts):
+        # What the ticket was counted under is not known, so if the Status or TicketType may have been
+        # changed, every count is recounted
+        if "status_id" in instance.__dict__ or "type_id" in instance.__dict__:
+            recount_ticket_counts()
+    else:
+        adjust_ticket_counts(instance._loaded_counts, counts)
+    instance._loaded_counts = counts
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    """
+    Invalidates the cached home page of the user a deleted Ticket was assigned to, and removes it from
+    the ticket counts of its Status and TicketType
+    """
+    transaction.on_commit(
+        partial(
+            invalidate_dashboards, [instance._loaded_assignee_id, instance.assignee_id]
+        )
+    )
+    adjust_ticket_counts((instance.status_id, instance.type_id), None)
+
+
+@receiver(post_delete, sender=Ticket)
+def record_tombstone(sender, instance, **kwargs):
+    """
+    Records that a Ticket was deleted, for the clients reading the changes to the tickets and the pages
+    listing the tickets
+    """
+    tombstone = TicketTombstone.objects.create(ticket_id=instance.ticket_id)
+    transaction.on_commit(bump_ticket_deletions_version)
+    if broadcaster.has_subscribers():
+        transaction.on_commit(
+            partial(publish_ticket_deleted, tombstone.ticket_id, tombstone.deleted_at)
+        )
+
+
+@receiver(post_save, sender=Ticket)
+def publish_ticket(sender, instance, created, **kwargs):
+    """
+    Sends a saved Ticket to the browsers connected to the ticket events stream of this process, once it
+    has been committed. Browsers connected to other processes receive it from the database, see `events.py`.
+    """
+    if broadcaster.has_subscribers():
+        transaction.on_commit(
+            partial(publish_ticket_saved, instance.ticket_id, created)
+        )
@@ -9,10 +9,21 @@ Tutor:    Suraksha Neupane
 Date:     22/09/23
 """
 
-from django.test import TestCase
-from myapp.models import Status, TicketType
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from myapp.models import Status, TicketType, TicketTombstone, BulkDeletion, Job
 from django.urls import reverse
 from myapp.views import (
+    get_ticket_list_version,
+    TicketChanges,
+    Metrics,
+    ViewJob,
+    ViewJobs,
+    ViewDeletion,
+    HOME_TICKET_LIMIT,
+    HomePage,
+    AUTOCOMPLETE_LIMIT,
+    AssigneeAutocomplete,
     CreateStatusPage,
     ViewStatuses,
     ViewStatus,
@@ -28,11 +39,61 @@ from myapp.views import (
     ViewTicket,
     UpdateTicket,
     DeleteTicket,
+    get_reporter_names,
+    can_user_update_ticket,
+    annotate_can_update,
+    ReadmePage,
+    SearchTickets,
+    ExportTickets,
+    BulkUpdateTicketsPage,
 )
-from django.contrib.auth.models import User
-from django.test.client import RequestFactory
-from myapp.forms import AddStatus, AddTicketType, Ticket, AddTicket
+from django.contrib.auth.models import User, AnonymousUser
+from myapp import async_views
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test.client import RequestFactory, AsyncRequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.db import OperationalError, connection
+from django.core.cache import cache
+from myapp.forms import (
+    AddStatus,
+    AddTicketType,
+    Ticket,
+    AddTicket,
+    TicketFilter,
+    BulkUpdateTickets,
+)
+from myapp.pagination import encode_cursor, paginate, PAGE_SIZE
+from myapp.search import search_ticket_ids, MAX_SEARCH_PAGE, SEARCH_PAGE_SIZE
+from myapp.export import EXPORT_FIELDS
+from myapp.benchmarking import percentile, summarise
+from myapp.seeding import seed_data
+from myapp.caching import (
+    REFERENCE_CHOICES_TTL,
+    check_shared_cache,
+    get_reference_version,
+)
+from myapp.deletion import delete_batch, run_deletion
+from myapp.changes import get_ticket_changes
+from myapp.events import EVENT_QUEUE_SIZE, Broadcaster, broadcaster, change_event
+from myapp.metrics import MetricsRegistry, QueryStats, collect_metrics, render_metrics
+from myapp.jobs import (
+    JOB_TIMEOUT,
+    claim_job,
+    enqueue,
+    job_task,
+    requeue_stale_jobs,
+    run_job,
+)
+from django.core.management import CommandError, call_command
+from unittest import mock
+from io import StringIO
+import asyncio
 import datetime
+import json
+import os
+import re
+import tempfile
+import time
 
 
 def get_get_response_code(client, url: str) -> int:
@@ -61,6 +122,42 @@ def get_post_response_code(client, url: str, data: dict = {}) -> int:
     return client.post(url, data=data).status_code
 
 
+# The values recorded by `record_task`, used to check jobs have run
+task_results = []
+
+
+@job_task
+def record_task(value):
+    """
+    Job task recording its value, for use in the test cases
+    """
+    task_results.append(value)
+
+
+@job_task
+def failing_task():
+    """
+    Job task that always fails, for use in the test cases
+    """
+    raise ValueError("Task failed")
+
+
+@job_task
+def long_failing_task():
+    """
+    Job task that fails with a message longer than the error of a job, for use in the test cases
+    """
+    raise ValueError("Task failed " * 500)
+
+
+@job_task
+def slow_task(seconds):
+    """
+    Job task that takes a number of seconds, for use in the test cases
+    """
+    time.sleep(seconds)
+
+
 class TestStatusModel(TestCase):
     def create_status_object(
         self,
@@ -513,3 +610,2256 @@ class TestTicketModel(TestCase):
         form = self.create_ticket_form("Test Ticket")
         result = form.is_valid()
         self.assertTrue(result)
+
+
+class TestTicketPagination(TestCase):
+    def create_tickets(self, count: int):
+        """
+        Creates a number of tickets for use in the pagination test cases
+
+        Parameters:
+            count (int): The number of tickets to create
+        """
+        status = Status.objects.create(status_name="Test Status")
+        ticket_type = TicketType.objects.create(type_name="Test Ticket Type")
+        Ticket.objects.bulk_create(
+            Ticket(
+                ticket_title=f"Ticket {chr(ord('A') + (i % 3))}",
+                date_reported=datetime.date.today(),
+                status=status,
+                type=ticket_type,
+            )
+            for i in range(count)
+        )
+
+    def test_paginate_returns_pages_in_order(self):
+        self.create_tickets(5)
+        first = paginate(Ticket.objects.all(), page_size=2)
+        second = paginate(Ticket.objects.all(), after=first.next_cursor, page_size=2)
+        third = paginate(Ticket.objects.all(), after=second.next_cursor, page_size=2)
+        ids = [t.ticket_id for page in (first, second, third) for t in page.items]
+        self.assertEqual(
+            ids, sorted(Ticket.objects.values_list("ticket_id", flat=True))
+        )
+        self.assertIsNone(first.previous_cursor)
+        self.assertIsNone(third.next_cursor)
+
+    def test_paginate_previous_cursor_returns_previous_page(self):
+        self.create_tickets(5)
+        first = paginate(Ticket.objects.all(), sort="-ticket_title", page_size=2)
+        second = paginate(
+            Ticket.objects.all(),
+            sort="-ticket_title",
+            after=first.next_cursor,
+            page_size=2,
+        )
+        previous = paginate(
+            Ticket.objects.all(),
+            sort="-ticket_title",
+            before=second.previous_cursor,
+            page_size=2,
+        )
+        self.assertEqual(
+            [t.ticket_id for t in previous.items], [t.ticket_id for t in first.items]
+        )
+
+    def test_paginate_rejects_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            paginate(Ticket.objects.all(), after="not a cursor")
+
+    def test_paginate_rejects_cursor_values_of_the_wrong_type(self):
+        self.create_tickets(2)
+        for sort, values in (
+            ("date_reported", ["notadate", 1]),
+            ("date_reported", ["2023-02-30", 1]),
+            ("ticket_id", [{"ticket_id": 1}]),
+            ("ticket_id", [[1]]),
+            ("ticket_id", [True]),
+            ("ticket_id", [10**20]),
+            ("ticket_title", [["Ticket A"], 1]),
+            ("ticket_title", ["Ticket A", "1.5"]),
+        ):
+            with self.subTest(sort=sort, values=values), self.assertRaises(ValueError):
+                paginate(Ticket.objects.all(), sort=sort, after=encode_cursor(values))
+
+    def test_view_tickets_returns_to_first_page_on_malformed_cursor(self):
+        User.objects.create_user(username="Test Account", password="TestPassword")
+        self.client.login(username="Test Account", password="TestPassword")
+        for sort, values in (
+            ("date_reported", ["notadate", 1]),
+            ("ticket_id", [{"ticket_id": 1}]),
+            ("ticket_id", [[1]]),
+        ):
+            with self.subTest(sort=sort, values=values):
+                response = self.client.get(
+                    reverse(ViewTickets),
+                    {"sort": sort, "after": encode_cursor(values)},
+                )
+                self.assertRedirects(response, reverse(ViewTickets))
+
+    def test_view_tickets_limits_page_size(self):
+        self.create_tickets(PAGE_SIZE + 1)
+        User.objects.create_user(username="Test Account", password="TestPassword")
+        self.client.login(username="Test Account", password="TestPassword")
+        response = self.client.get(reverse(ViewTickets))
+        self.assertEqual(len(response.context["items"]), PAGE_SIZE)
+        self.assertIsNotNone(response.context["next_query"])
+
+
+class TestReporterLookup(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.client.login(username="Test Account", password="TestPassword")
+
+    def test_get_reporter_names_maps_ids_to_usernames(self):
+        status = Status.objects.create(
+            status_name="Test Status", reporter_id=self.user.id
+        )
+        self.assertEqual(get_reporter_names([status]), {self.user.id: "Test Account"})
+
+    def test_view_statuses_shows_reporter_username(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Status.objects.create(status_name="Test Status", reporter_id=self.user.id)
+            Status.objects.create(status_name="Other Status", reporter_id=0)
+        response = self.client.get(reverse(ViewStatuses))
+        reporters = {i["status_name"]: i["reporter"] for i in response.context["items"]}
+        self.assertEqual(
+            reporters, {"Test Status": "Test Account", "Other Status": "None"}
+        )
+
+    def test_view_types_query_count_does_not_grow_with_rows(self):
+        for i in range(5):
+            TicketType.objects.create(type_name=f"Type {i}", reporter_id=self.user.id)
+        url = reverse(ViewTypes)
+        self.client.get(url)
+        # The types are cached, so the cache is cleared to measure the queries building the list
+        cache.clear()
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        for i in range(5, 10):
+            TicketType.objects.create(type_name=f"Type {i}", reporter_id=self.user.id)
+        cache.clear()
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(url)
+        self.assertEqual(len(few), len(many))
+
+
+class TestTicketQueries(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.client.login(username="Test Account", password="TestPassword")
+        self.status = Status.objects.create(status_name="Test Status")
+        self.ticket_type = TicketType.objects.create(type_name="Test Ticket Type")
+
+    def create_tickets(self, count: int):
+        """
+        Creates a number of tickets assigned to the test user
+
+        Parameters:
+            count (int): The number of tickets to create
+        """
+        for i in range(count):
+            Ticket.objects.create(
+                ticket_title=f"Ticket {i}",
+                date_reported=datetime.date.today(),
+                assignee=self.user,
+                status=self.status,
+                type=self.ticket_type,
+                reporter_id=self.user.id,
+            )
+
+    def count_queries(self, url: str) -> int:
+        """
+        Counts the queries run to render a page
+
+        Parameters:
+            url (str): The URL of the page to load
+
+        Returns:
+            (int): The number of queries run
+        """
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return len(queries)
+
+    def test_view_tickets_query_count_does_not_grow_with_rows(self):
+        self.create_tickets(2)
+        few = self.count_queries(reverse(ViewTickets))
+        self.create_tickets(8)
+        self.assertEqual(few, self.count_queries(reverse(ViewTickets)))
+
+    def test_view_tickets_shows_related_entries(self):
+        self.create_tickets(1)
+        item = self.client.get(reverse(ViewTickets)).context["items"][0]
+        self.assertEqual(str(item["assignee"]), "Test Account")
+        self.assertEqual(str(item["status"]), "Test Status")
+        self.assertEqual(str(item["type"]), "Test Ticket Type")
+
+    def test_view_ticket_loads_related_entries_with_ticket(self):
+        self.create_tickets(1)
+        ticket = Ticket.objects.get()
+        url = reverse(ViewTicket, args=[ticket.ticket_id])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        # The ETag of the page is built from a query reading only when the ticket was updated
+        ticket_queries = [
+            q
+            for q in queries
+            if '"myapp_ticket"' in q["sql"] and '"updated_at"' not in q["sql"]
+        ]
+        self.assertEqual(len(ticket_queries), 1)
+
+
+class TestTicketPermissions(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.other_user = User.objects.create_user(
+            username="Other Account", password="TestPassword"
+        )
+        self.client.login(username="Test Account", password="TestPassword")
+
+    def create_ticket(self, ticket_title: str, **kwargs) -> Ticket:
+        """
+        Creates a ticket for use in the permission test cases
+
+        Parameters:
+            ticket_title (str): The title of the ticket
+            **kwargs: Any other fields to set on the ticket
+
+        Returns:
+            (Ticket): The created ticket
+        """
+        return Ticket.objects.create(
+            ticket_title=ticket_title, date_reported=datetime.date.today(), **kwargs
+        )
+
+    def test_can_update_annotation_matches_python_check(self):
+        self.create_ticket("Reported", reporter_id=self.user.id)
+        self.create_ticket("Assigned", assignee=self.user)
+        self.create_ticket("Unassigned")
+        self.create_ticket("Other", assignee=self.other_user)
+        request = RequestFactory().get("/")
+        request.user = self.user
+        for ticket in annotate_can_update(Ticket.objects.all(), self.user):
+            self.assertEqual(ticket.can_update, can_user_update_ticket(request, ticket))
+
+    def test_can_user_update_ticket_when_unassigned(self):
+        ticket = self.create_ticket("Unassigned")
+        request = RequestFactory().get("/")
+        request.user = self.user
+        self.assertFalse(can_user_update_ticket(request, ticket))
+
+    def test_view_tickets_editable_filter(self):
+        self.create_ticket("Assigned", assignee=self.user)
+        self.create_ticket("Other", assignee=self.other_user)
+        response = self.client.get(reverse(ViewTickets), {"editable": "1"})
+        titles = [item["ticket_title"] for item in response.context["items"]]
+        self.assertEqual(titles, ["Assigned"])
+
+
+class TestTicketFilter(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.client.login(username="Test Account", password="TestPassword")
+        self.open = Status.objects.create(status_name="Open")
+        self.closed = Status.objects.create(status_name="Closed")
+        today = datetime.date.today()
+        Ticket.objects.create(
+            ticket_title="Overdue",
+            date_reported=today,
+            date_due=today - datetime.timedelta(days=1),
+            status=self.open,
+            assignee=self.user,
+        )
+        Ticket.objects.create(
+            ticket_title="Upcoming",
+            date_reported=today,
+            date_due=today + datetime.timedelta(days=7),
+            status=self.closed,
+            reporter_id=self.user.id,
+        )
+
+    def get_titles(self, data: dict) -> list:
+        """
+        Gets the titles of the tickets matching a set of filters
+
+        Parameters:
+            data (dict): The filters to apply
+
+        Returns:
+            (list): The titles of the matching tickets
+        """
+        form = TicketFilter(data)
+        self.assertTrue(form.is_valid())
+        return list(
+            form.filter(Ticket.objects.order_by("ticket_id")).values_list(
+                "ticket_title", flat=True
+            )
+        )
+
+    def test_filter_by_status(self):
+        self.assertEqual(self.get_titles({"status": "Closed"}), ["Upcoming"])
+
+    def test_filter_by_assignee_and_reporter(self):
+        self.assertEqual(self.get_titles({"assignee": "Test Account"}), ["Overdue"])
+        self.assertEqual(self.get_titles({"reporter": "Test Account"}), ["Upcoming"])
+
+    def test_filter_overdue(self):
+        self.assertEqual(self.get_titles({"overdue": "on"}), ["Overdue"])
+
+    def test_filter_by_due_date_range(self):
+        today = datetime.date.today()
+        self.assertEqual(
+            self.get_titles({"due_after": today.isoformat()}), ["Upcoming"]
+        )
+        self.assertEqual(
+            self.get_titles({"due_before": today.isoformat()}), ["Overdue"]
+        )
+
+    def test_view_tickets_applies_filters(self):
+        response = self.client.get(reverse(ViewTickets), {"status": "Open"})
+        titles = [item["ticket_title"] for item in response.context["items"]]
+        self.assertEqual(titles, ["Overdue"])
+
+
+class TestReadmePage(TestCase):
+    def test_readme_page_renders_readme(self):
+        response = self.client.get(reverse(ReadmePage))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "<h1>Assignment</h1>", html=True)
+
+    def test_readme_page_is_only_rendered_once(self):
+        self.client.get(reverse(ReadmePage))
+        with mock.patch("myapp.views.markdown.markdown") as render_markdown:
+            self.client.get(reverse(ReadmePage))
+        render_markdown.assert_not_called()
+
+    def test_readme_page_not_modified(self):
+        etag = self.client.get(reverse(ReadmePage))["ETag"]
+        response = self.client.get(reverse(ReadmePage), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class TestTicketSearch(TestCase):
+    def create_ticket(self, ticket_title: str, ticket_info: str = "") -> Ticket:
+        """
+        Creates a ticket for use in the search test cases
+
+        Parameters:
+            ticket_title (str): The title of the ticket
+            ticket_info (str), default="": The information of the ticket
+
+        Returns:
+            (Ticket): The created ticket
+        """
+        return Ticket.objects.create(
+            ticket_title=ticket_title,
+            ticket_info=ticket_info,
+            date_reported=datetime.date.today(),
+        )
+
+    def test_search_ranks_title_matches_first(self):
+        info_match = self.create_ticket("Broken laptop", "The printer cable is lost")
+        title_match = self.create_ticket("Printer jammed")
+        self.create_ticket("Password reset")
+        ticket_ids, has_next = search_ticket_ids("printer")
+        self.assertEqual(ticket_ids, [title_match.ticket_id, info_match.ticket_id])
+        self.assertFalse(has_next)
+
+    def test_search_index_follows_updates_and_deletes(self):
+        ticket = self.create_ticket("Printer jammed")
+        ticket.ticket_title = "Monitor flickering"
+        ticket.save()
+        self.assertEqual(search_ticket_ids("printer")[0], [])
+        self.assertEqual(search_ticket_ids("monitor")[0], [ticket.ticket_id])
+        ticket.delete()
+        self.assertEqual(search_ticket_ids("monitor")[0], [])
+
+    def test_search_ignores_query_syntax(self):
+        self.create_ticket("Printer jammed")
+        self.assertEqual(search_ticket_ids('printer" OR (')[0], [])
+
+    def test_search_tickets_view_pages_results(self):
+        for i in range(SEARCH_PAGE_SIZE + 1):
+            self.create_ticket(f"Printer {i}")
+        User.objects.create_user(username="Test Account", password="TestPassword")
+        self.client.login(username="Test Account", password="TestPassword")
+        response = self.client.get(reverse(SearchTickets), {"q": "printer"})
+        self.assertEqual(len(response.context["items"]), SEARCH_PAGE_SIZE)
+        response = self.client.get(reverse(SearchTickets), {"q": "printer", "page": 2})
+        self.assertEqual(len(response.context["items"]), 1)
+
+    def test_search_tickets_view_limits_page_number(self):
+        self.create_ticket("Printer jammed")
+        User.objects.create_user(username="Test Account", password="TestPassword")
+        self.client.login(username="Test Account", password="TestPassword")
+        response = self.client.get(
+            reverse(SearchTickets), {"q": "printer", "page": str(10**20)}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["items"], [])
+        self.assertFalse(response.context["next_query"])
+        self.assertEqual(
+            search_ticket_ids("printer", page=MAX_SEARCH_PAGE + 1), ([], False)
+        )
+
+
+class TestTicketExport(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.client.login(username="Test Account", password="TestPassword")
+        status = Status.objects.create(status_name="Open")
+        Ticket.objects.create(
+            ticket_title="Printer jammed",
+            date_reported=datetime.date(2023, 9, 22),
+            assignee=self.user,
+            status=status,
+            reporter_id=self.user.id,
+        )
+        Ticket.objects.create(
+            ticket_title="Password reset", date_reported=datetime.date(2023, 9, 22)
+        )
+
+    def test_export_tickets_streams_csv(self):
+        response = self.client.get(reverse(ExportTickets), {"format": "csv"})
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], ",".join(EXPORT_FIELDS))
+        self.assertIn("Printer jammed,,Test Account,Test Account,Open,", lines[1])
+        self.assertEqual(len(lines), 3)
+
+    def test_export_tickets_applies_filters(self):
+        response = self.client.get(
+            reverse(ExportTickets), {"format": "ndjson", "status": "Open"}
+        )
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual([row["ticket_title"] for row in rows], ["Printer jammed"])
+        self.assertEqual(rows[0]["date_reported"], "2023-09-22")
+
+    def test_export_tickets_command(self):
+        output = StringIO()
+        call_command("export_tickets", "--format", "ndjson", stdout=output)
+        self.assertEqual(len(output.getvalue().splitlines()), 2)
+
+
+class TestImportTickets(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="Test Account")
+        Status.objects.create(status_name="Open")
+        TicketType.objects.create(type_name="Fault")
+
+    def import_file(self, contents: str, suffix: str, *args) -> tuple:
+        """
+        Runs the import_tickets command on a temporary file
+
+        Parameters:
+            contents (str): The contents of the file
+            suffix (str): The extension of the file, which selects the format
+            *args: Any extra arguments for the command
+
+        Returns:
+            (tuple): The standard output and standard error of the command
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f"tickets{suffix}")
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(contents)
+            stdout, stderr = StringIO(), StringIO()
+            call_command("import_tickets", path, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_csv_creates_valid_rows_and_reports_errors(self):
+        contents = (
+            "ticket_title,ticket_info,assignee,status,type,date_due\n"
+            "Printer jammed,Paper stuck,Test Account,Open,Fault,2023-09-30\n"
+            "lower case title,,,Open,Fault,\n"
+            "Unknown status,,,Closed,Fault,\n"
+        )
+        stdout, stderr = self.import_file(
+            contents, ".csv", "--reporter", "Test Account"
+        )
+        ticket = Ticket.objects.get()
+        self.assertEqual(ticket.ticket_title, "Printer jammed")
+        self.assertEqual(ticket.assignee, self.user)
+        self.assertEqual(ticket.reporter_id, self.user.id)
+        self.assertEqual(ticket.date_due, datetime.date(2023, 9, 30))
+        self.assertIn("Line 3: ticket_title", stderr)
+        self.assertIn("Line 4: status: Closed does not exist", stderr)
+        self.assertIn("Imported 1 tickets", stdout)
+
+    def test_import_ndjson_in_batches(self):
+        contents = "".join(
+            json.dumps(
+                {"ticket_title": f"Ticket {i}", "status": "Open", "type": "Fault"}
+            )
+            + "\n"
+            for i in range(5)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            self.import_file(contents, ".json", "--batch-size", "2")
+        self.assertEqual(Ticket.objects.count(), 5)
+        inserts = [q for q in queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 3)
+
+    def test_import_ndjson_reports_malformed_lines_and_continues(self):
+        contents = (
+            json.dumps(
+                {"ticket_title": "Printer jammed", "status": "Open", "type": "Fault"}
+            )
+            + "\n"
+            + '{"ticket_title": "Broken\n'
+            + json.dumps(
+                {"ticket_title": "Monitor broken", "status": "Open", "type": "Fault"}
+            )
+            + "\n"
+        )
+        stdout, stderr = self.import_file(contents, ".json")
+        self.assertEqual(Ticket.objects.count(), 2)
+        self.assertIn("Line 2: Invalid JSON", stderr)
+        self.assertIn("Imported 2 tickets", stdout)
+        self.assertIn("1 rows failed", stdout)
+
+    def test_import_json_rejects_rows_that_are_not_objects(self):
+        valid = '{"ticket_title": "Printer jammed", "status": "Open", "type": "Fault"}'
+        for contents, error in (
+            (f"{valid}\n[1, 2]\n", "Line 2: The row must be an object"),
+            (f"[[1, 2], {valid}]", "Line 1: The row must be an object"),
+            (
+                valid.replace('"Open"', '["Open"]') + "\n",
+                "Line 1: status: Enter a name.",
+            ),
+        ):
+            with self.subTest(contents=contents):
+                stdout, stderr = self.import_file(contents, ".json")
+                self.assertIn(error, stderr)
+                self.assertIn("1 rows failed", stdout)
+
+
+class TestBulkUpdateTickets(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.other_user = User.objects.create_user(username="Other Account")
+        self.client.login(username="Test Account", password="TestPassword")
+        self.open = Status.objects.create(status_name="Open")
+        self.closed = Status.objects.create(status_name="Closed")
+        self.own = [
+            Ticket.objects.create(
+                ticket_title=f"Own {i}",
+                date_reported=datetime.date.today(),
+                status=self.open,
+                reporter_id=self.user.id,
+            )
+            for i in range(3)
+        ]
+        self.other = Ticket.objects.create(
+            ticket_title="Other",
+            date_reported=datetime.date.today(),
+            status=self.open,
+            assignee=self.other_user,
+        )
+
+    def test_bulk_update_changes_only_tickets_user_can_update(self):
+        ticket_ids = [t.ticket_id for t in self.own] + [self.other.ticket_id]
+        url = reverse(BulkUpdateTicketsPage)
+        response = self.client.post(
+            url, {"ticket_ids": ticket_ids, "status": "Closed"}, follow=True
+        )
+        self.assertEqual(
+            Ticket.objects.filter(status=self.closed).count(), len(self.own)
+        )
+        self.assertEqual(Ticket.objects.get(pk=self.other.pk).status, self.open)
+        self.assertContains(response, "3 tickets updated")
+
+    def test_bulk_update_runs_single_update(self):
+        url = reverse(BulkUpdateTicketsPage)
+        data = {
+            "ticket_ids": [t.ticket_id for t in self.own],
+            "assignee": "Other Account",
+        }
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, data)
+        updates = [q for q in queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            Ticket.objects.filter(assignee=self.other_user).count(), len(self.own) + 1
+        )
+
+    def test_bulk_update_requires_a_change(self):
+        form = BulkUpdateTickets({})
+        self.assertFalse(form.is_valid())
+
+
+class TestAsyncViews(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.status = Status.objects.create(
+            status_name="Test Status", reporter_id=self.user.id
+        )
+        self.ticket_type = TicketType.objects.create(type_name="Test Ticket Type")
+        self.ticket = Ticket.objects.create(
+            ticket_title="Printer jammed",
+            date_reported=datetime.date.today(),
+            assignee=self.user,
+            status=self.status,
+            type=self.ticket_type,
+        )
+
+    def create_request(self, url: str, user=None):
+        """
+        Creates a request for calling an async view directly
+
+        Parameters:
+            url (str): The URL of the request
+            user (User), default=None: The user making the request, the test user if not set
+
+        Returns:
+            : The request
+        """
+        request = AsyncRequestFactory().get(url)
+        request.user = user or self.user
+        return request
+
+    async def test_async_view_tickets_lists_tickets(self):
+        response = await async_views.ViewTickets(self.create_request("/view_tickets/"))
+        self.assertContains(response, "Printer jammed")
+
+    async def test_async_view_ticket_shows_ticket(self):
+        response = await async_views.ViewTicket(
+            self.create_request("/view_ticket/"), id=self.ticket.ticket_id
+        )
+        self.assertContains(response, "Printer jammed")
+
+    async def test_async_list_and_detail_pages(self):
+        for view, kwargs, text in (
+            (async_views.HomePage, {}, "Printer jammed"),
+            (async_views.ViewStatuses, {}, "Test Account"),
+            (async_views.ViewStatus, {"status_name": "Test Status"}, "Update"),
+            (async_views.ViewTypes, {}, "Test Ticket Type"),
+            (async_views.ViewType, {"type_name": "Test Ticket Type"}, "Type:"),
+        ):
+            response = await view(self.create_request("/"), **kwargs)
+            self.assertContains(response, text)
+
+    async def test_async_views_redirect_anonymous_users_to_login(self):
+        response = await async_views.ViewTickets(
+            self.create_request("/view_tickets/", user=AnonymousUser())
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response["Location"].startswith("/login"))
+
+
+class TestReferenceDataCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.other_user = User.objects.create_user(
+            username="Other Account", email="other@test.com", password="TestPassword"
+        )
+        self.status = Status.objects.create(
+            status_name="Test Status", reporter_id=self.user.id
+        )
+        self.ticket_type = TicketType.objects.create(
+            type_name="Test Ticket Type", reporter_id=self.user.id
+        )
+        self.client.login(username="Test Account", password="TestPassword")
+
+    def count_reference_queries(self, url: str) -> int:
+        """
+        Counts the queries a page makes on the Status and TicketType tables
+
+        Parameters:
+            url (str): The URL of the page
+
+        Returns:
+            (int): The number of queries
+        """
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return sum(
+            "myapp_status" in q["sql"] or "myapp_tickettype" in q["sql"]
+            for q in queries.captured_queries
+        )
+
+    def test_cached_pages_do_not_query_reference_data(self):
+        for url in (
+            reverse(ViewStatuses),
+            reverse(ViewTypes),
+            reverse(ViewStatus, args=["Test Status"]),
+            reverse(ViewType, args=["Test Ticket Type"]),
+        ):
+            self.assertGreater(self.count_reference_queries(url), 0)
+            self.assertEqual(self.count_reference_queries(url), 0)
+
+    def test_can_update_is_not_shared_between_users(self):
+        response = self.client.get(reverse(ViewStatuses))
+        self.assertTrue(response.context["items"][0]["can_update"])
+        self.client.login(username="Other Account", password="TestPassword")
+        response = self.client.get(reverse(ViewStatuses))
+        self.assertFalse(response.context["items"][0]["can_update"])
+
+    def test_saving_reference_data_invalidates_cache(self):
+        self.client.get(reverse(ViewStatuses))
+        with self.captureOnCommitCallbacks(execute=True):
+            Status.objects.create(status_name="New Status")
+        names = [
+            i["status_name"]
+            for i in self.client.get(reverse(ViewStatuses)).context["items"]
+        ]
+        self.assertEqual(names, ["New Status", "Test Status"])
+
+        self.client.get(reverse(ViewType, args=["Test Ticket Type"]))
+        self.ticket_type.reporter_id = self.other_user.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ticket_type.save()
+        response = self.client.get(reverse(ViewType, args=["Test Ticket Type"]))
+        self.assertFalse(response.context["can_update"])
+
+    def test_cache_is_invalidated_once_committed(self):
+        version = get_reference_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.status.status_description = "Changed"
+            self.status.save()
+            # A request before the commit would read the old row, so it must not be cached again
+            self.assertEqual(get_reference_version(), version)
+
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_reference_version(), version)
+
+    def test_deleting_reference_data_invalidates_cache(self):
+        version = get_reference_version()
+        self.client.get(reverse(ViewStatus, args=["Test Status"]))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.status.delete()
+        self.assertNotEqual(get_reference_version(), version)
+        response = self.client.get(reverse(ViewStatus, args=["Test Status"]))
+        self.assertRedirects(response, reverse(ViewStatuses))
+
+
+class TestTicketFormChoices(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.status = Status.objects.create(status_name="Test Status")
+        self.ticket_type = TicketType.objects.create(type_name="Test Ticket Type")
+        self.data = {
+            "ticket_title": "Printer jammed",
+            "status": "Test Status",
+            "type": "Test Ticket Type",
+        }
+
+    def count_reference_queries(self, func) -> int:
+        """
+        Counts the queries made on the Status and TicketType tables
+
+        Parameters:
+            func: The function making the queries
+
+        Returns:
+            (int): The number of queries
+        """
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        return sum(
+            "myapp_status" in q["sql"] or "myapp_tickettype" in q["sql"]
+            for q in queries.captured_queries
+        )
+
+    def test_choices_are_held_between_forms(self):
+        self.assertGreater(self.count_reference_queries(lambda: str(AddTicket())), 0)
+        self.assertEqual(self.count_reference_queries(lambda: str(AddTicket())), 0)
+        self.assertEqual(
+            self.count_reference_queries(
+                lambda: self.assertTrue(AddTicket(self.data).is_valid())
+            ),
+            0,
+        )
+
+    def test_valid_form_saves_status_and_type(self):
+        form = AddTicket(self.data)
+        self.assertTrue(form.is_valid())
+        ticket = form.save()
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, self.status)
+        self.assertEqual(ticket.type, self.ticket_type)
+
+    def test_unknown_status_is_invalid(self):
+        form = AddTicket({**self.data, "status": "Missing Status"})
+        self.assertFalse(form.is_valid())
+        self.assertIn("status", form.errors)
+
+    def test_choices_change_with_reference_data(self):
+        str(AddTicket())
+        with self.captureOnCommitCallbacks(execute=True):
+            Status.objects.create(status_name="New Status")
+        self.assertTrue(AddTicket({**self.data, "status": "New Status"}).is_valid())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.status.delete()
+        self.assertFalse(AddTicket(self.data).is_valid())
+
+    def test_choices_are_rebuilt_when_the_version_is_not_shared(self):
+        str(AddTicket())
+        # Created through another process, whose version change this process does not see
+        Status.objects.bulk_create([Status(status_name="New Status")])
+        data = {**self.data, "status": "New Status"}
+        self.assertFalse(AddTicket(data).is_valid())
+
+        later = time.monotonic() + REFERENCE_CHOICES_TTL
+        with mock.patch("myapp.caching.time.monotonic", return_value=later):
+            self.assertTrue(AddTicket(data).is_valid())
+
+    def test_cache_kept_by_each_process_is_reported(self):
+        with override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+            }
+        ):
+            self.assertEqual(
+                [warning.id for warning in check_shared_cache(None)], ["myapp.W001"]
+            )
+        with override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": tempfile.gettempdir(),
+                }
+            }
+        ):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_update_form_selects_current_status(self):
+        ticket = Ticket.objects.create(
+            ticket_title="Printer jammed",
+            date_reported=datetime.date.today(),
+            status=self.status,
+            type=self.ticket_type,
+        )
+        self.assertIn(
+            '<option value="Test Status" selected>', str(AddTicket(instance=ticket))
+        )
+
+
+class TestAssigneeAutocomplete(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Test Account",
+            email="test@test.com",
+            password="TestPassword",
+            first_name="Alice",
+            last_name="Smith",
+        )
+        self.status = Status.objects.create(status_name="Test Status")
+        self.ticket_type = TicketType.objects.create(type_name="Test Ticket Type")
+        self.client.login(username="Test Account", password="TestPassword")
+
+    def get_usernames(self, query: str) -> list:
+        """
+        Gets the usernames suggested by the autocomplete
+
+        Parameters:
+            query (str): The text typed so far
+
+        Returns:
+            (list): The suggested usernames
+        """
+        response = self.client.get(reverse(AssigneeAutocomplete), {"q": query})
+        return [user["username"] for user in response.json()["results"]]
+
+    def test_matches_start_of_username_and_names(self):
+        User.objects.create_user(username="bob", first_name="Robert")
+        self.assertEqual(self.get_usernames("test"), ["Test Account"])
+        self.assertEqual(self.get_usernames("ali"), ["Test Account"])
+        self.assertEqual(self.get_usernames("SMI"), ["Test Account"])
+        self.assertEqual(self.get_usernames("rob"), ["bob"])
+        self.assertEqual(self.get_usernames("account"), [])
+        self.assertEqual(self.get_usernames(""), [])
+
+    def test_results_are_capped(self):
+        User.objects.bulk_create(
+            User(username=f"user{i}") for i in range(AUTOCOMPLETE_LIMIT + 5)
+        )
+        self.assertEqual(len(self.get_usernames("user")), AUTOCOMPLETE_LIMIT)
+
+    def test_form_does_not_load_users(self):
+        with CaptureQueriesContext(connection) as queries:
+            html = str(AddTicket())
+        self.assertFalse(any("auth_user" in q["sql"] for q in queries))
+        self.assertIn(reverse(AssigneeAutocomplete), html)
+
+    def test_form_assigns_user_by_username(self):
+        data = {
+            "ticket_title": "Printer jammed",
+            "assignee": "Test Account",
+            "status": "Test Status",
+            "type": "Test Ticket Type",
+        }
+        form = AddTicket(data)
+        self.assertTrue(form.is_valid())
+        ticket = form.save()
+        self.assertEqual(ticket.assignee, self.user)
+        self.assertIn('value="Test Account"', str(AddTicket(instance=ticket)))
+
+        form = AddTicket({**data, "assignee": "Missing Account"})
+        self.assertFalse(form.is_valid())
+        self.assertIn("assignee", form.errors)
+
+
+class TestHomeDashboard(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.other_user = User.objects.create_user(
+            username="Other Account", email="other@test.com", password="TestPassword"
+        )
+        self.status = Status.objects.create(status_name="Test Status")
+        self.ticket_type = TicketType.objects.create(type_name="Test Ticket Type")
+        self.client.login(username="Test Account", password="TestPassword")
+
+    def create_ticket(self, ticket_title: str, assignee=None, date_due=None) -> Ticket:
+        """
+        Creates a ticket for use in the test cases
+
+        Parameters:
+            ticket_title (str): The title of the ticket
+            assignee (User), default=None: The user assigned the ticket
+            date_due (date), default=None: The date the ticket is due
+
+        Returns:
+            (Ticket): The ticket
+        """
+        return Ticket.objects.create(
+            ticket_title=ticket_title,
+            date_reported=datetime.date.today(),
+            date_due=date_due,
+            assignee=assignee,
+            status=self.status,
+            type=self.ticket_type,
+        )
+
+    def get_titles(self) -> list:
+        """
+        Gets the titles of the tickets on the home page of the logged in user
+
+        Returns:
+            (list): The titles of the tickets
+        """
+        tickets = self.client.get(reverse(HomePage)).context["tickets"] or []
+        return [ticket.ticket_title for ticket in tickets]
+
+    def test_home_page_is_cached(self):
+        self.create_ticket("Printer jammed", assignee=self.user)
+        self.assertEqual(self.get_titles(), ["Printer jammed"])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get_titles(), ["Printer jammed"])
+        self.assertFalse(any("myapp_ticket" in q["sql"] for q in queries))
+
+    def test_assigning_and_unassigning_invalidates_cache(self):
+        ticket = self.create_ticket("Printer jammed", assignee=self.other_user)
+        self.assertEqual(self.get_titles(), [])
+
+        ticket = Ticket.objects.get(ticket_id=ticket.ticket_id)
+        ticket.assignee = self.user
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.save()
+        self.assertEqual(self.get_titles(), ["Printer jammed"])
+
+        ticket = Ticket.objects.get(ticket_id=ticket.ticket_id)
+        ticket.assignee = self.other_user
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.save()
+        self.assertEqual(self.get_titles(), [])
+
+    def test_cache_is_invalidated_once_committed(self):
+        ticket = self.create_ticket("Printer jammed", assignee=self.other_user)
+        self.assertEqual(self.get_titles(), [])
+
+        ticket = Ticket.objects.get(ticket_id=ticket.ticket_id)
+        ticket.assignee = self.user
+        with self.captureOnCommitCallbacks() as callbacks:
+            ticket.save()
+        self.assertEqual(self.get_titles(), [])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get_titles(), ["Printer jammed"])
+
+    def test_deleting_ticket_invalidates_cache(self):
+        ticket = self.create_ticket("Printer jammed", assignee=self.user)
+        self.assertEqual(self.get_titles(), ["Printer jammed"])
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+        self.assertEqual(self.get_titles(), [])
+
+    def test_bulk_update_invalidates_cache(self):
+        ticket = self.create_ticket("Printer jammed", assignee=self.user)
+        self.assertEqual(self.get_titles(), ["Printer jammed"])
+        self.client.post(
+            reverse(BulkUpdateTicketsPage),
+            {"ticket_ids": [ticket.ticket_id], "assignee": "Other Account"},
+        )
+        self.assertEqual(self.get_titles(), [])
+
+    def test_tickets_due_soonest_are_listed(self):
+        today = datetime.date.today()
+        self.create_ticket("No due date", assignee=self.user)
+        for i in range(HOME_TICKET_LIMIT):
+            self.create_ticket(
+                f"Ticket {i}",
+                assignee=self.user,
+                date_due=today + datetime.timedelta(days=HOME_TICKET_LIMIT - i),
+            )
+        response = self.client.get(reverse(HomePage))
+        titles = [ticket.ticket_title for ticket in response.context["tickets"]]
+        self.assertEqual(len(titles), HOME_TICKET_LIMIT)
+        self.assertEqual(titles[0], f"Ticket {HOME_TICKET_LIMIT - 1}")
+        self.assertNotIn("No due date", titles)
+        self.assertEqual(
+            response.context["more_tickets_query"], "assignee=Test+Account"
+        )
+
+
+class TestTicketCounts(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.open_status = Status.objects.create(status_name="Open")
+        self.closed_status = Status.objects.create(status_name="Closed", is_closed=True)
+        self.ticket_type = TicketType.objects.create(type_name="Test Ticket Type")
+        self.other_type = TicketType.objects.create(type_name="Other Ticket Type")
+        self.client.login(username="Test Account", password="TestPassword")
+
+    def create_ticket(self, status: Status, ticket_type: TicketType) -> Ticket:
+        """
+        Creates a ticket for use in the test cases
+
+        Parameters:
+            status (Status): The status of the ticket
+            ticket_type (TicketType): The type of the ticket
+
+        Returns:
+            (Ticket): The ticket
+        """
+        return Ticket.objects.create(
+            ticket_title="Printer jammed",
+            date_reported=datetime.date.today(),
+            status=status,
+            type=ticket_type,
+        )
+
+    def assert_counts(self, status_counts: dict, type_counts: dict):
+        """
+        Checks the stored ticket counts
+
+        Parameters:
+            status_counts (dict): The expected number of tickets of each status
+            type_counts (dict): The expected number of tickets and open tickets of each type
+        """
+        self.assertEqual(
+            dict(Status.objects.values_list("status_name", "ticket_count")),
+            status_counts,
+        )
+        self.assertEqual(
+            {
+                name: (tickets, open_tickets)
+                for name, tickets, open_tickets in TicketType.objects.values_list(
+                    "type_name", "ticket_count", "open_ticket_count"
+                )
+            },
+            type_counts,
+        )
+
+    def test_counts_follow_ticket_changes(self):
+        ticket = self.create_ticket(self.open_status, self.ticket_type)
+        self.create_ticket(self.closed_status, self.ticket_type)
+        self.assert_counts(
+            {"Open": 1, "Closed": 1},
+            {"Test Ticket Type": (2, 1), "Other Ticket Type": (0, 0)},
+        )
+
+        ticket = Ticket.objects.get(ticket_id=ticket.ticket_id)
+        ticket.status = self.closed_status
+        ticket.type = self.other_type
+        ticket.save()
+        self.assert_counts(
+            {"Open": 0, "Closed": 2},
+            {"Test Ticket Type": (1, 0), "Other Ticket Type": (1, 0)},
+        )
+
+        ticket.delete()
+        self.assert_counts(
+            {"Open": 0, "Closed": 1},
+            {"Test Ticket Type": (1, 0), "Other Ticket Type": (0, 0)},
+        )
+
+    def test_closing_status_recounts_open_tickets(self):
+        self.create_ticket(self.open_status, self.ticket_type)
+        status = Status.objects.get(status_name="Open")
+        status.is_closed = True
+        status.save()
+        self.assert_counts(
+            {"Open": 1, "Closed": 0},
+            {"Test Ticket Type": (1, 0), "Other Ticket Type": (0, 0)},
+        )
+
+    def test_saving_status_keeps_count(self):
+        status = Status.objects.get(status_name="Open")
+        self.create_ticket(self.open_status, self.ticket_type)
+        status.status_description = "Being worked on"
+        status.save()
+        self.assertEqual(Status.objects.get(status_name="Open").ticket_count, 1)
+
+    def test_bulk_update_recounts(self):
+        ticket = self.create_ticket(self.open_status, self.ticket_type)
+        self.client.post(
+            reverse(BulkUpdateTicketsPage),
+            {"ticket_ids": [ticket.ticket_id], "status": "Closed"},
+        )
+        self.assert_counts(
+            {"Open": 0, "Closed": 1},
+            {"Test Ticket Type": (1, 0), "Other Ticket Type": (0, 0)},
+        )
+
+    def test_recount_command_repairs_counts(self):
+        self.create_ticket(self.open_status, self.ticket_type)
+        self.create_ticket(self.closed_status, self.other_type)
+        Status.objects.update(ticket_count=5)
+        TicketType.objects.update(ticket_count=5, open_ticket_count=5)
+        call_command("recount_tickets", stdout=StringIO())
+        self.assert_counts(
+            {"Open": 1, "Closed": 1},
+            {"Test Ticket Type": (1, 1), "Other Ticket Type": (1, 0)},
+        )
+
+    def test_list_pages_show_counts_without_counting(self):
+        self.create_ticket(self.open_status, self.ticket_type)
+        self.create_ticket(self.closed_status, self.ticket_type)
+        with CaptureQueriesContext(connection) as queries:
+            statuses = self.client.get(reverse(ViewStatuses)).context["items"]
+            types = self.client.get(reverse(ViewTypes)).context["items"]
+        self.assertFalse(any("COUNT(" in q["sql"] for q in queries))
+        self.assertEqual(
+            {i["status_name"]: (i["open_tickets"], i["tickets"]) for i in statuses},
+            {"Open": (1, 1), "Closed": (0, 1)},
+        )
+        self.assertEqual(
+            {i["type_name"]: (i["open_tickets"], i["tickets"]) for i in types},
+            {"Test Ticket Type": (1, 2), "Other Ticket Type": (0, 0)},
+        )
+
+    def test_delete_page_warns_of_tickets(self):
+        self.create_ticket(self.open_status, self.ticket_type)
+        response = self.client.get(reverse(DeleteStatus, args=["Open"]))
+        self.assertContains(response, "also delete the 1 tickets")
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class TestBulkDeletion(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.status = Status.objects.create(status_name="Test Status")
+        self.other_status = Status.objects.create(status_name="Other Status")
+        self.ticket_type = TicketType.objects.create(type_name="Test Ticket Type")
+        for i in range(5):
+            Ticket.objects.create(
+                ticket_title=f"Ticket {i}",
+                date_reported=datetime.date.today(),
+                assignee=self.user,
+                status=self.status,
+                type=self.ticket_type,
+            )
+        Ticket.objects.create(
+            ticket_title="Other Ticket",
+            date_reported=datetime.date.today(),
+            status=self.other_status,
+            type=self.ticket_type,
+        )
+        self.client.login(username="Test Account", password="TestPassword")
+
+    @mock.patch("myapp.deletion.DELETE_BATCH_SIZE", 2)
+    def test_tickets_are_deleted_in_batches(self):
+        with mock.patch(
+            "myapp.deletion.delete_batch", wraps=delete_batch
+        ) as batch, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse(DeleteStatus, args=["Test Status"]), {"delete": ""}
+            )
+
+        deletion = BulkDeletion.objects.get()
+        self.assertRedirects(response, reverse(ViewDeletion, args=[deletion.id]))
+        # Three batches of tickets, and a final batch finding none left
+        self.assertEqual(batch.call_count, 4)
+        self.assertEqual(deletion.state, BulkDeletion.DONE)
+        self.assertEqual((deletion.deleted, deletion.total), (5, 5))
+        self.assertFalse(Status.objects.filter(status_name="Test Status").exists())
+        self.assertEqual(
+            list(Ticket.objects.values_list("ticket_title", flat=True)),
+            ["Other Ticket"],
+        )
+
+    def test_counts_and_home_page_are_updated(self):
+        self.client.get(reverse(HomePage))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse(DeleteTicketType, args=["Test Ticket Type"]), {"delete": ""}
+            )
+        self.assertFalse(Ticket.objects.exists())
+        self.assertEqual(
+            dict(Status.objects.values_list("status_name", "ticket_count")),
+            {"Test Status": 0, "Other Status": 0},
+        )
+        self.assertIsNone(self.client.get(reverse(HomePage)).context["tickets"])
+
+    def test_batch_records_what_the_delete_signals_would(self):
+        ticket_ids = list(
+            Ticket.objects.filter(status=self.status).values_list(
+                "ticket_id", flat=True
+            )
+        )
+        deletion = BulkDeletion.objects.create(
+            model_name="Status", object_id="Test Status", total=5
+        )
+        with mock.patch(
+            "myapp.deletion.broadcaster.has_subscribers", return_value=True
+        ), mock.patch("myapp.deletion.publish_ticket_deleted") as publish:
+            self.assertEqual(delete_batch(deletion, "status"), 5)
+
+        self.assertEqual(
+            sorted(TicketTombstone.objects.values_list("ticket_id", flat=True)),
+            ticket_ids,
+        )
+        self.assertEqual(
+            sorted(call.args[0] for call in publish.call_args_list), ticket_ids
+        )
+        # The full text index is kept up to date by the database
+        self.assertEqual(
+            search_ticket_ids("Ticket")[0],
+            [Ticket.objects.get(status=self.other_status).ticket_id],
+        )
+
+    def test_long_errors_are_cut_to_fit(self):
+        deletion = BulkDeletion.objects.create(
+            model_name="Status", object_id="Test Status", total=5
+        )
+        with mock.patch(
+            "myapp.deletion.delete_batch", side_effect=OperationalError("x" * 5000)
+        ), self.assertRaises(OperationalError):
+            run_deletion(deletion.id)
+
+        deletion.refresh_from_db()
+        self.assertEqual(deletion.state, BulkDeletion.FAILED)
+        self.assertEqual(
+            len(deletion.error), BulkDeletion._meta.get_field("error").max_length
+        )
+
+    def test_progress_page_shows_deletion(self):
+        deletion = BulkDeletion.objects.create(
+            model_name="Status", object_id="Test Status", total=5, deleted=2
+        )
+        response = self.client.get(reverse(ViewDeletion, args=[deletion.id]))
+        self.assertContains(response, "2 of 5 tickets deleted")
+        self.assertContains(response, 'http-equiv="refresh"')
+
+    def test_status_without_tickets_is_deleted_immediately(self):
+        Status.objects.create(status_name="Unused Status")
+        self.client.post(reverse(DeleteStatus, args=["Unused Status"]), {"delete": ""})
+        self.assertFalse(Status.objects.filter(status_name="Unused Status").exists())
+        self.assertFalse(BulkDeletion.objects.exists())
+
+
+class TestJobQueue(TestCase):
+    def setUp(self):
+        task_results.clear()
+
+    def test_claimed_job_is_not_claimed_again(self):
+        job = enqueue(record_task, "first")
+        claimed = claim_job("worker-1")
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual((claimed.state, claimed.attempts), (Job.RUNNING, 1))
+        self.assertIsNone(claim_job("worker-2"))
+
+        self.assertTrue(run_job(claimed))
+        self.assertEqual(task_results, ["first"])
+        self.assertEqual(Job.objects.get(pk=job.pk).state, Job.DONE)
+
+    def test_failed_job_is_retried_until_out_of_attempts(self):
+        job = enqueue(failing_task, max_attempts=2)
+        self.assertFalse(run_job(claim_job("worker")))
+        job.refresh_from_db()
+        self.assertEqual(job.state, Job.QUEUED)
+        self.assertEqual(job.error, "Error: Task failed")
+        # The retry is delayed
+        self.assertIsNone(claim_job("worker"))
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.assertFalse(run_job(claim_job("worker")))
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts), (Job.FAILED, 2))
+
+    def test_long_errors_are_truncated(self):
+        job = enqueue(long_failing_task, max_attempts=1)
+        self.assertFalse(run_job(claim_job("worker")))
+        job.refresh_from_db()
+        self.assertEqual(job.state, Job.FAILED)
+        self.assertEqual(len(job.error), Job._meta.get_field("error").max_length)
+        self.assertTrue(job.error.startswith("Error: Task failed"))
+
+    def test_only_job_tasks_are_run(self):
+        Job.objects.create(task="os.getcwd", max_attempts=1)
+        self.assertFalse(run_job(claim_job("worker")))
+        self.assertIn("is not a job task", Job.objects.get().error)
+
+    def test_stale_jobs_are_queued_again(self):
+        job = enqueue(record_task, "stale")
+        claim_job("worker")
+        Job.objects.filter(pk=job.pk).update(
+            date_started=timezone.now() - JOB_TIMEOUT * 2,
+            date_heartbeat=timezone.now() - JOB_TIMEOUT * 2,
+        )
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(claim_job("other-worker").pk, job.pk)
+
+    def test_long_running_jobs_with_a_heartbeat_are_not_queued_again(self):
+        job = enqueue(record_task, "slow")
+        claim_job("worker")
+        Job.objects.filter(pk=job.pk).update(
+            date_started=timezone.now() - JOB_TIMEOUT * 10,
+            date_heartbeat=timezone.now(),
+        )
+        self.assertEqual(requeue_stale_jobs(), 0)
+        self.assertIsNone(claim_job("other-worker"))
+
+    def test_job_pages(self):
+        User.objects.create_superuser(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.client.login(username="Test Account", password="TestPassword")
+        job = enqueue(record_task, "page")
+        self.assertContains(self.client.get(reverse(ViewJobs)), str(job))
+        response = self.client.get(reverse(ViewJob, args=[job.id]))
+        self.assertContains(response, "myapp.tests.record_task")
+        self.assertContains(response, 'http-equiv="refresh"')
+
+
+class TestRunWorker(TransactionTestCase):
+    def setUp(self):
+        task_results.clear()
+
+    def test_worker_runs_queued_jobs_once(self):
+        for i in range(3):
+            enqueue(record_task, i)
+        enqueue(failing_task, max_attempts=1)
+
+        out, err = StringIO(), StringIO()
+        call_command("run_worker", "--once", stdout=out, stderr=err)
+
+        self.assertEqual(sorted(task_results), [0, 1, 2])
+        self.assertEqual(out.getvalue().count("done"), 3)
+        self.assertIn("failed", err.getvalue())
+        self.assertFalse(Job.objects.filter(state=Job.QUEUED).exists())
+
+    def test_worker_carries_on_after_an_error(self):
+        enqueue(record_task, "after error")
+        calls = []
+
+        def claim_job_once_broken(worker):
+            calls.append(worker)
+            if len(calls) == 1:
+                raise OperationalError("server closed the connection unexpectedly")
+            return claim_job(worker)
+
+        out, err = StringIO(), StringIO()
+        with mock.patch(
+            "myapp.management.commands.run_worker.claim_job", claim_job_once_broken
+        ):
+            call_command(
+                "run_worker", "--once", "--poll-interval", "0", stdout=out, stderr=err
+            )
+
+        self.assertIn("OperationalError: server closed the connection", err.getvalue())
+        self.assertEqual(task_results, ["after error"])
+        self.assertEqual(out.getvalue().count("done"), 1)
+
+    @mock.patch("myapp.jobs.JOB_HEARTBEAT_INTERVAL", datetime.timedelta(seconds=0.05))
+    def test_heartbeats_are_recorded_while_a_job_runs(self):
+        job = enqueue(slow_task, 0.5)
+        claimed = claim_job("worker")
+        self.assertTrue(run_job(claimed))
+        started = claimed.date_heartbeat
+        self.assertGreater(Job.objects.get(pk=job.pk).date_heartbeat, started)
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        metrics_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(metrics_dir.cleanup)
+        self.metrics_dir = metrics_dir.name
+        self.enterContext(override_settings(METRICS_DIR=self.metrics_dir))
+        self.registry = self.enterContext(
+            mock.patch("myapp.metrics.registry", MetricsRegistry())
+        )
+        self.user = User.objects.create_superuser(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        Status.objects.create(status_name="Test Status")
+        Status.objects.create(status_name="Other Status")
+
+    def test_requests_are_recorded_for_each_route(self):
+        self.client.login(username="Test Account", password="TestPassword")
+        self.client.get(reverse(ViewStatus, args=["Test Status"]))
+        self.client.get(reverse(ViewStatus, args=["Other Status"]))
+        metrics = self.client.get(reverse(Metrics)).content.decode()
+
+        labels = 'route="View Status",method="GET",status="200"'
+        self.assertIn(f"assignment_requests_total{{{labels}}} 2", metrics)
+        self.assertIn(
+            f'assignment_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2',
+            metrics,
+        )
+        queries = re.search(
+            rf"assignment_db_queries_total{{{re.escape(labels)}}} (\d+)", metrics
+        )
+        self.assertGreater(int(queries.group(1)), 0)
+
+    def test_latency_histogram_is_cumulative(self):
+        self.registry.record("Home", "GET", 200, 0.02, QueryStats())
+        metrics = render_metrics(collect_metrics())
+        labels = 'route="Home",method="GET",status="200"'
+        self.assertIn(
+            f'assignment_request_duration_seconds_bucket{{{labels},le="0.01"}} 0',
+            metrics,
+        )
+        self.assertIn(
+            f'assignment_request_duration_seconds_bucket{{{labels},le="0.025"}} 1',
+            metrics,
+        )
+        self.assertIn(
+            f'assignment_request_duration_seconds_bucket{{{labels},le="10.0"}} 1',
+            metrics,
+        )
+
+    def test_metrics_of_every_process_are_added_up(self):
+        self.registry.record("Home", "GET", 200, 0.02, QueryStats())
+        other_process = MetricsRegistry()
+        other_process.record("Home", "GET", 200, 0.5, QueryStats())
+        other_process.record("Home", "GET", 200, 0.5, QueryStats())
+        other_process.flush()
+
+        metrics = render_metrics(collect_metrics())
+        self.assertIn(
+            'assignment_requests_total{route="Home",method="GET",status="200"} 3',
+            metrics,
+        )
+
+    def test_unknown_methods_are_recorded_as_other(self):
+        self.client.login(username="Test Account", password="TestPassword")
+        self.client.generic("BREW", reverse(ViewStatus, args=["Test Status"]))
+        metrics = self.client.get(reverse(Metrics)).content.decode()
+
+        self.assertIn('method="other"', metrics)
+        self.assertNotIn('method="BREW"', metrics)
+
+    def test_unreadable_metrics_directory_returns_this_process(self):
+        self.registry.record("Home", "GET", 200, 0.02, QueryStats())
+        with mock.patch("myapp.metrics.os.listdir", side_effect=PermissionError):
+            metrics = render_metrics(collect_metrics())
+
+        self.assertIn(
+            'assignment_requests_total{route="Home",method="GET",status="200"} 1',
+            metrics,
+        )
+
+    def test_unreadable_metrics_files_are_skipped(self):
+        self.registry.record("Home", "GET", 200, 0.02, QueryStats())
+        with open(os.path.join(self.metrics_dir, f"{os.getpid()}-0.json"), "w") as file:
+            file.write("[{")
+
+        metrics = render_metrics(collect_metrics())
+        self.assertIn(
+            'assignment_requests_total{route="Home",method="GET",status="200"} 1',
+            metrics,
+        )
+
+    def test_files_of_exited_processes_are_folded_together(self):
+        self.registry.record("Home", "GET", 200, 0.02, QueryStats())
+        exited_process = MetricsRegistry()
+        with mock.patch.object(exited_process, "flush"):
+            exited_process.record("Home", "GET", 200, 0.5, QueryStats())
+        for name in ("1001-0.json", "1002-0.json"):
+            with open(os.path.join(self.metrics_dir, name), "w") as file:
+                json.dump(exited_process.snapshot(), file)
+        with open(os.path.join(self.metrics_dir, "1003-0.json.1.tmp"), "w") as file:
+            file.write("[{")
+
+        with mock.patch("myapp.metrics.process_exists", lambda pid: pid == os.getpid()):
+            first = render_metrics(collect_metrics())
+            second = render_metrics(collect_metrics())
+
+        labels = 'route="Home",method="GET",status="200"'
+        self.assertIn(f"assignment_requests_total{{{labels}}} 3", first)
+        self.assertIn(f"assignment_requests_total{{{labels}}} 3", second)
+        self.assertEqual(
+            sorted(os.listdir(self.metrics_dir)),
+            sorted(
+                [
+                    "exited.json",
+                    "exited.lock",
+                    f"{os.getpid()}-{self.registry.started}.json",
+                ]
+            ),
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_need_admin_or_token(self):
+        url = reverse(Metrics)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(
+            self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 403
+        )
+        self.assertEqual(
+            self.client.get(url, HTTP_AUTHORIZATION="Bearer secret").status_code, 200
+        )
+        self.client.login(username="Test Account", password="TestPassword")
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+@mock.patch("myapp.changes.CHANGE_SETTLE_TIME", datetime.timedelta(0))
+class TestTicketChanges(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.client.login(username="Test Account", password="TestPassword")
+        self.status = Status.objects.create(status_name="Test Status")
+        self.ticket_type = TicketType.objects.create(type_name="Test Ticket Type")
+        self.tickets = [
+            Ticket.objects.create(
+                ticket_title=f"Ticket {i}",
+                date_reported=datetime.date.today(),
+                assignee=self.user,
+                status=self.status,
+                type=self.ticket_type,
+            )
+            for i in range(3)
+        ]
+
+    def get_changes(self, since=None, **params) -> dict:
+        """
+        Reads the ticket changes
+
+        Parameters:
+            since (str), default=None: The cursor of the previous call
+            **params: Other query parameters
+
+        Returns:
+            (dict): The JSON response
+        """
+        if since is not None:
+            params["since"] = since
+        response = self.client.get(reverse(TicketChanges), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_first_call_lists_every_ticket(self):
+        first = self.get_changes(limit=2)
+        self.assertEqual(
+            [change["ticket_id"] for change in first["changes"]],
+            [ticket.ticket_id for ticket in self.tickets[:2]],
+        )
+        self.assertEqual(
+            [change["action"] for change in first["changes"]], ["created", "created"]
+        )
+        self.assertTrue(first["has_more"])
+        self.assertEqual(first["changes"][0]["ticket"]["assignee"], "Test Account")
+
+        rest = self.get_changes(first["cursor"], limit=2)
+        self.assertEqual(
+            [change["ticket_id"] for change in rest["changes"]],
+            [self.tickets[2].ticket_id],
+        )
+        self.assertFalse(rest["has_more"])
+
+    def test_first_call_without_changes_returns_a_cursor(self):
+        Ticket.objects.all().delete()
+        TicketTombstone.objects.all().delete()
+        first = self.get_changes()
+        self.assertEqual(first["changes"], [])
+        self.assertIsNotNone(first["cursor"])
+
+        created = Ticket.objects.create(
+            ticket_title="Ticket created", date_reported=datetime.date.today()
+        )
+        changes = self.get_changes(first["cursor"])
+        self.assertEqual(
+            [(c["ticket_id"], c["action"]) for c in changes["changes"]],
+            [(created.ticket_id, "created")],
+        )
+
+    def test_lists_only_changes_since_cursor(self):
+        cursor = self.get_changes()["cursor"]
+        self.assertEqual(self.get_changes(cursor)["changes"], [])
+
+        deleted_id = self.tickets[0].ticket_id
+        self.tickets[1].ticket_title = "Ticket renamed"
+        self.tickets[1].save()
+        self.tickets[0].delete()
+
+        created = Ticket.objects.create(
+            ticket_title="Ticket created", date_reported=datetime.date.today()
+        )
+
+        changes = self.get_changes(cursor)
+        self.assertEqual(
+            [(c["ticket_id"], c["deleted"]) for c in changes["changes"]],
+            [
+                (self.tickets[1].ticket_id, False),
+                (deleted_id, True),
+                (created.ticket_id, False),
+            ],
+        )
+        self.assertEqual(
+            [c["action"] for c in changes["changes"]],
+            ["updated", "deleted", "created"],
+        )
+        self.assertEqual(
+            changes["changes"][0]["ticket"]["ticket_title"], "Ticket renamed"
+        )
+        self.assertIsNone(changes["changes"][1]["ticket"])
+        # A poll with nothing new returns the same cursor
+        self.assertEqual(
+            self.get_changes(changes["cursor"])["cursor"], changes["cursor"]
+        )
+
+    def test_bulk_updates_and_deletions_are_listed(self):
+        ticket_ids = [ticket.ticket_id for ticket in self.tickets]
+        cursor = self.get_changes()["cursor"]
+        self.client.post(
+            reverse(BulkUpdateTicketsPage),
+            {"ticket_ids": [ticket_ids[0]], "unassign": "on"},
+        )
+        changes = self.get_changes(cursor)
+        self.assertEqual(
+            [(c["ticket_id"], c["deleted"]) for c in changes["changes"]],
+            [(ticket_ids[0], False)],
+        )
+
+        deletion = BulkDeletion.objects.create(
+            model_name="Status", object_id="Test Status", total=3
+        )
+        delete_batch(deletion, "status")
+        changes = self.get_changes(changes["cursor"])
+        self.assertEqual(
+            [(c["ticket_id"], c["deleted"]) for c in changes["changes"]],
+            [(ticket_id, True) for ticket_id in ticket_ids],
+        )
+
+    def test_recent_changes_wait_to_settle(self):
+        with mock.patch(
+            "myapp.changes.CHANGE_SETTLE_TIME", datetime.timedelta(minutes=1)
+        ):
+            changes = self.get_changes()
+        self.assertEqual(changes["changes"], [])
+        # The cursor is from before the changes, so they are listed once they have settled
+        changes = self.get_changes(changes["cursor"])
+        self.assertEqual(
+            [(c["ticket_id"], c["action"]) for c in changes["changes"]],
+            [(ticket.ticket_id, "created") for ticket in self.tickets],
+        )
+
+    @override_settings(TOMBSTONE_RETENTION_DAYS=30)
+    def test_old_and_invalid_cursors_are_rejected(self):
+        old = encode_cursor(
+            [(timezone.now() - datetime.timedelta(days=31)).isoformat(), 0]
+        )
+        response = self.client.get(reverse(TicketChanges), {"since": old})
+        self.assertEqual(response.status_code, 410)
+
+        response = self.client.get(reverse(TicketChanges), {"since": "invalid"})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(TOMBSTONE_RETENTION_DAYS=30)
+    def test_prune_tombstones_removes_old_tombstones(self):
+        deleted_id = self.tickets[0].ticket_id
+        self.tickets[0].delete()
+        TicketTombstone.objects.create(
+            ticket_id=100, deleted_at=timezone.now() - datetime.timedelta(days=31)
+        )
+        call_command("prune_tombstones", stdout=StringIO())
+        self.assertEqual(
+            list(TicketTombstone.objects.values_list("ticket_id", flat=True)),
+            [deleted_id],
+        )
+
+
+@mock.patch("myapp.changes.CHANGE_SETTLE_TIME", datetime.timedelta(0))
+class TestTicketEvents(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.ticket = Ticket.objects.create(
+            ticket_title="Printer jammed", date_reported=datetime.date.today()
+        )
+
+    async def open_stream(self, headers=None, user=None):
+        """
+        Connects to the ticket events stream
+
+        Parameters:
+            headers (dict), default=None: The headers of the request
+            user (User), default=None: The user making the request, the test user if not set
+
+        Returns:
+            : The stream, which must be closed with `aclose`
+        """
+        request = AsyncRequestFactory().get("/ticket_events/", headers=headers)
+        request.user = user or self.user
+        response = await async_views.TicketEvents(request)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return response.streaming_content
+
+    async def read_event(self, stream) -> str:
+        """
+        Reads the next event from a stream, failing if none arrives within a second
+        """
+        return (await asyncio.wait_for(anext(stream), 1)).decode()
+
+    async def close_stream(self, stream):
+        """
+        Disconnects from a stream and stops the poller it started
+        """
+        await stream.aclose()
+        # The response wraps the stream of the view, which is closed by the event loop once unused
+        await asyncio.sleep(0.01)
+        if broadcaster.poller is not None:
+            broadcaster.poller.cancel()
+
+    def test_anonymous_users_are_redirected_to_login(self):
+        request = AsyncRequestFactory().get("/ticket_events/")
+        request.user = AnonymousUser()
+        response = async_to_sync(async_views.TicketEvents)(request)
+        self.assertEqual(response.status_code, 302)
+
+    async def test_saved_and_deleted_tickets_are_pushed(self):
+        stream = await self.open_stream()
+        try:
+            self.assertTrue((await self.read_event(stream)).startswith("retry:"))
+            self.assertTrue((await self.read_event(stream)).startswith("id:"))
+
+            def change_tickets():
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.ticket.ticket_title = "Printer fixed"
+                    self.ticket.save()
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.ticket.delete()
+
+            ticket_id = self.ticket.ticket_id
+            await sync_to_async(change_tickets)()
+
+            updated = await self.read_event(stream)
+            self.assertIn("event: ticket", updated)
+            self.assertIn('"action": "updated"', updated)
+            self.assertIn("Printer fixed", updated)
+            deleted = await self.read_event(stream)
+            self.assertIn('"action": "deleted"', deleted)
+            self.assertIn(f'"ticket_id": {ticket_id}', deleted)
+        finally:
+            await self.close_stream(stream)
+        self.assertFalse(broadcaster.has_subscribers())
+
+    async def test_reconnecting_replays_missed_changes(self):
+        cursor = (await sync_to_async(get_ticket_changes)())["cursor"]
+        await Ticket.objects.filter(ticket_id=self.ticket.ticket_id).aupdate(
+            ticket_title="Printer fixed", updated_at=timezone.now()
+        )
+
+        stream = await self.open_stream(headers={"Last-Event-ID": cursor})
+        try:
+            await self.read_event(stream)
+            replayed = await self.read_event(stream)
+            self.assertIn('"action": "updated"', replayed)
+            self.assertIn("Printer fixed", replayed)
+            self.assertTrue(replayed.startswith("id:"))
+        finally:
+            await self.close_stream(stream)
+
+        stream = await self.open_stream(headers={"Last-Event-ID": "invalid"})
+        try:
+            await self.read_event(stream)
+            self.assertIn("event: reset", await self.read_event(stream))
+        finally:
+            await self.close_stream(stream)
+
+    @mock.patch("myapp.events.EVENTS_POLL_INTERVAL", 0)
+    async def test_poller_publishes_changes_from_other_processes(self):
+        events = Broadcaster()
+        queue = events.subscribe()
+        try:
+            await asyncio.sleep(0.01)
+
+            def save_tickets():
+                # Database calls share a thread, so the poller cannot read the changes in between
+                Ticket.objects.create(
+                    ticket_title="Saved here", date_reported=datetime.date.today()
+                )
+                saved = Ticket.objects.create(
+                    ticket_title="Saved elsewhere", date_reported=datetime.date.today()
+                )
+                changes = get_ticket_changes()
+                # Published by this process when it was saved, so not published again by the poller
+                events.publish(change_event(changes["changes"][-2], with_id=False))
+                return saved, changes
+
+            saved, changes = await sync_to_async(save_tickets)()
+
+            event = await asyncio.wait_for(queue.get(), 1)
+            self.assertIsNone(event["id"])
+            event = await asyncio.wait_for(queue.get(), 1)
+            self.assertEqual(event["data"]["ticket_id"], saved.ticket_id)
+            self.assertIsNotNone(event["id"])
+            # The position the browsers reconnect from is moved past both changes
+            event = await asyncio.wait_for(queue.get(), 1)
+            self.assertEqual(event["id"], changes["cursor"])
+        finally:
+            events.unsubscribe(queue)
+            await asyncio.wait_for(events.poller, 1)
+
+    def test_browsers_that_fall_behind_are_reset(self):
+        queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        for i in range(EVENT_QUEUE_SIZE + 1):
+            Broadcaster.put(queue, {"key": str(i), "event": "ticket"})
+        self.assertEqual(queue.qsize(), 1)
+        self.assertEqual(queue.get_nowait()["event"], "reset")
+
+
+class TestConditionalPages(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.other_user = User.objects.create_user(
+            username="Other Account", email="other@test.com", password="TestPassword"
+        )
+        self.status = Status.objects.create(
+            status_name="Test Status", reporter_id=self.user.id
+        )
+        self.ticket_type = TicketType.objects.create(
+            type_name="Test Ticket Type", reporter_id=self.user.id
+        )
+        self.ticket = Ticket.objects.create(
+            ticket_title="Printer jammed",
+            date_reported=datetime.date.today(),
+            assignee=self.user,
+            status=self.status,
+            type=self.ticket_type,
+            reporter_id=self.user.id,
+        )
+        self.client.login(username="Test Account", password="TestPassword")
+
+    def revalidate(self, url: str, response) -> int:
+        """
+        Requests a page again with the ETag of an earlier response
+
+        Parameters:
+            url (str): The URL of the page
+            response: The earlier response
+
+        Returns:
+            (int): The status code of the new response
+        """
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code
+
+    def test_timestamps_are_set_when_saved(self):
+        created_at = self.ticket.created_at
+        self.assertIsNotNone(created_at)
+        self.ticket.ticket_title = "Printer fixed"
+        self.ticket.save()
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.created_at, created_at)
+        self.assertGreater(self.ticket.updated_at, created_at)
+
+    def test_unchanged_pages_are_not_modified(self):
+        for url in (
+            reverse(ViewTicket, args=[self.ticket.ticket_id]),
+            reverse(ViewTickets),
+            reverse(ViewStatus, args=["Test Status"]),
+            reverse(ViewType, args=["Test Ticket Type"]),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.has_header("Last-Modified"))
+                self.assertIn("no-cache", response["Cache-Control"])
+                self.assertEqual(self.revalidate(url, response), 304)
+
+    def test_changed_ticket_is_rendered(self):
+        url = reverse(ViewTicket, args=[self.ticket.ticket_id])
+        response = self.client.get(url)
+        self.ticket.ticket_title = "Printer fixed"
+        self.ticket.save()
+        self.assertEqual(self.revalidate(url, response), 200)
+
+    def test_ticket_list_changes_with_tickets(self):
+        url = reverse(ViewTickets)
+        response = self.client.get(url)
+        self.client.post(
+            reverse(BulkUpdateTicketsPage),
+            {"ticket_ids": [self.ticket.ticket_id], "assignee": "Other Account"},
+        )
+        # Reading the page shows the message from the update, after which it can be revalidated
+        self.assertFalse(self.client.get(url).has_header("ETag"))
+        self.assertEqual(self.revalidate(url, response), 200)
+
+        # Deleting tickets that are not the latest modified does not change the latest modification time
+        Ticket.objects.create(
+            ticket_title="Monitor broken",
+            date_reported=datetime.date.today(),
+            status=self.status,
+        )
+        Ticket.objects.create(
+            ticket_title="Keyboard broken", date_reported=datetime.date.today()
+        )
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ticket.delete()
+        self.assertEqual(self.revalidate(url, response), 200)
+
+        response = self.client.get(url)
+        deletion = BulkDeletion.objects.create(
+            model_name="Status", object_id="Test Status", total=1
+        )
+        self.assertEqual(delete_batch(deletion, "status"), 1)
+        self.assertEqual(self.revalidate(url, response), 200)
+
+    def test_ticket_list_version_does_not_count_tickets(self):
+        with CaptureQueriesContext(connection) as queries:
+            get_ticket_list_version()
+        self.assertEqual(len(queries), 2)
+        for query in queries:
+            self.assertNotIn("COUNT", query["sql"].upper())
+
+    def test_ticket_list_is_modified_by_deleting_a_ticket(self):
+        # Last-Modified is sent to the second, so the ticket is made older than its deletion
+        Ticket.objects.filter(pk=self.ticket.pk).update(
+            updated_at=timezone.now() - datetime.timedelta(minutes=1)
+        )
+        url = reverse(ViewTickets)
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ticket.delete()
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "Printer jammed")
+
+    def test_changed_status_is_rendered(self):
+        url = reverse(ViewStatus, args=["Test Status"])
+        response = self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.status.status_description = "Changed"
+            self.status.save()
+        self.assertEqual(self.revalidate(url, response), 200)
+
+    def test_etag_differs_between_users(self):
+        url = reverse(ViewTicket, args=[self.ticket.ticket_id])
+        response = self.client.get(url)
+        self.client.login(username="Other Account", password="TestPassword")
+        self.assertEqual(self.revalidate(url, response), 200)
+
+    async def test_async_view_ticket_is_not_modified(self):
+        def create_request(headers=None):
+            request = AsyncRequestFactory().get("/view_ticket/", headers=headers)
+            request.user = self.user
+            # Set by the CSRF middleware from the cookie of the browser
+            request.META["CSRF_COOKIE"] = "a" * 32
+            return request
+
+        response = await async_views.ViewTicket(
+            create_request(), id=self.ticket.ticket_id
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = await async_views.ViewTicket(
+            create_request({"If-None-Match": response["ETag"]}),
+            id=self.ticket.ticket_id,
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+class TestQueryBudgets(TestCase):
+    """
+    Loads each page at several data sizes, checking the number of queries does not grow with the number of
+    rows and stays within the budget of the page. The cache is cleared before each page is loaded, so the
+    queries of a cache miss are counted.
+    """
+
+    SIZES = (1, 10, 100)
+    # The most queries each page may make, including loading the session and user
+    BUDGETS = {
+        "Home": 3,
+        "View Tickets": 10,
+        "View Ticket": 4,
+        "Update Ticket": 5,
+        "Create Ticket": 4,
+        "Search Tickets": 5,
+        "Export Tickets": 3,
+        "Assignee Autocomplete": 3,
+        "View Statuses": 6,
+        "View Status": 3,
+        "View Types": 6,
+        "View Type": 3,
+        "View Jobs": 3,
+    }
+    # The async views are called with the user already loaded, so the session and user are not counted
+    ASYNC_BUDGETS = {
+        "Home": 1,
+        "View Tickets": 8,
+        "View Statuses": 4,
+        "View Types": 4,
+    }
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username="Test Account", email="test@test.com", password="TestPassword"
+        )
+        self.client.login(username="Test Account", password="TestPassword")
+
+    def grow(self, size: int):
+        """
+        Adds generated users, statuses, types, tickets and jobs until there are `size` of each. Half of
+        the tickets are assigned to the test user, so they are shown on its home page.
+
+        Parameters:
+            size (int): The number of rows of each kind
+        """
+        seeded = seed_data(
+            users=size,
+            statuses=size,
+            types=size,
+            tickets=size - Ticket.objects.count(),
+            seed=size,
+        )
+        Ticket.objects.filter(ticket_id__in=seeded["ticket_ids"][::2]).update(
+            assignee=self.user
+        )
+        Job.objects.bulk_create(
+            Job(task="myapp.tests.record_task", requested_by=self.user.id)
+            for _ in range(size - Job.objects.count())
+        )
+
+    def get_pages(self) -> dict:
+        """
+        Returns:
+            (dict): The URL of each page with a budget, by the name of its route
+        """
+        ticket_id = Ticket.objects.order_by("ticket_id").first().ticket_id
+        return {
+            "Home": reverse(HomePage),
+            "View Tickets": reverse(ViewTickets),
+            "View Ticket": reverse(ViewTicket, args=[ticket_id]),
+            "Update Ticket": reverse(UpdateTicket, args=[ticket_id]),
+            "Create Ticket": reverse(CreateTicketPage),
+            "Search Tickets": reverse(SearchTickets) + "?q=Bench",
+            "Export Tickets": reverse(ExportTickets),
+            "Assignee Autocomplete": reverse(AssigneeAutocomplete) + "?q=bench",
+            "View Statuses": reverse(ViewStatuses),
+            "View Status": reverse(ViewStatus, args=["Bench status 0"]),
+            "View Types": reverse(ViewTypes),
+            "View Type": reverse(ViewType, args=["Bench type 0"]),
+            "View Jobs": reverse(ViewJobs),
+        }
+
+    def count_queries(self, url: str) -> int:
+        """
+        Counts the queries run to load a page with an empty cache
+
+        Parameters:
+            url (str): The URL of the page
+
+        Returns:
+            (int): The number of queries run
+        """
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    async def acount_queries(self, view, **kwargs) -> int:
+        """
+        Counts the queries run by an async view with an empty cache
+
+        Parameters:
+            view: The async view
+            **kwargs: The arguments from the path of the page
+
+        Returns:
+            (int): The number of queries run
+        """
+        await sync_to_async(cache.clear)()
+        request = AsyncRequestFactory().get("/")
+        request.user = self.user
+        # The database connection is not async, so the queries are captured and counted from a thread
+        queries = CaptureQueriesContext(connection)
+        await sync_to_async(queries.__enter__)()
+        try:
+            response = await view(request, **kwargs)
+        finally:
+            await sync_to_async(queries.__exit__)(None, None, None)
+        self.assertEqual(response.status_code, 200)
+        return await sync_to_async(len)(queries)
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        counts = {}
+        for size in self.SIZES:
+            self.grow(size)
+            for name, url in self.get_pages().items():
+                counts.setdefault(name, []).append(self.count_queries(url))
+
+        for name, page_counts in counts.items():
+            with self.subTest(page=name):
+                self.assertEqual(
+                    len(set(page_counts)),
+                    1,
+                    f"{name} made {page_counts} queries with {self.SIZES} rows",
+                )
+
+    def test_pages_stay_within_query_budgets(self):
+        self.grow(max(self.SIZES))
+        pages = self.get_pages()
+        self.assertEqual(set(pages), set(self.BUDGETS))
+        for name, url in pages.items():
+            with self.subTest(page=name):
+                self.assertLessEqual(self.count_queries(url), self.BUDGETS[name])
+
+    async def test_async_query_counts_do_not_grow_with_rows(self):
+        views = {
+            "Home": async_views.HomePage,
+            "View Tickets": async_views.ViewTickets,
+            "View Statuses": async_views.ViewStatuses,
+            "View Types": async_views.ViewTypes,
+        }
+        counts = {}
+        for size in self.SIZES:
+            await sync_to_async(self.grow)(size)
+            for name, view in views.items():
+                counts.setdefault(name, []).append(await self.acount_queries(view))
+
+        for name, page_counts in counts.items():
+            with self.subTest(page=name):
+                self.assertEqual(len(set(page_counts)), 1, f"{name}: {page_counts}")
+                self.assertLessEqual(page_counts[-1], self.ASYNC_BUDGETS[name])
+
+
+class TestBenchmarking(TestCase):
+    def test_percentile_uses_nearest_rank(self):
+        values = [0.4, 0.1, 0.3, 0.2]
+        self.assertEqual(percentile(values, 50), 0.2)
+        self.assertEqual(percentile(values, 95), 0.4)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_summarise_reports_milliseconds(self):
+        summary = summarise([0.001, 0.003])
+        self.assertEqual(summary["requests"], 2)
+        self.assertEqual(summary["mean_ms"], 2.0)
+        self.assertEqual(summary["p99_ms"], 3.0)
+
+    def test_seed_data_is_deterministic(self):
+        first = seed_data(users=5, statuses=3, types=2, tickets=20, seed=1)
+        second = seed_data(users=5, statuses=3, types=2, tickets=20, seed=1)
+
+        self.assertEqual(User.objects.filter(username__startswith="bench_").count(), 5)
+        self.assertEqual(Ticket.objects.count(), 40)
+
+        def titles(ticket_ids):
+            return list(
+                Ticket.objects.filter(ticket_id__in=ticket_ids)
+                .order_by("ticket_id")
+                .values_list("ticket_title", "status_id", "type_id", "date_due")
+            )
+
+        self.assertEqual(titles(first["ticket_ids"]), titles(second["ticket_ids"]))
+        # bulk_create does not send signals, so the seeding recounts the tickets
+        self.assertEqual(sum(Status.objects.values_list("ticket_count", flat=True)), 40)
+
+    def test_bench_measures_each_route(self):
+        out = StringIO()
+        call_command(
+            "bench",
+            "--no-test-database",
+            "--users=3",
+            "--statuses=2",
+            "--types=2",
+            "--tickets=10",
+            "--requests=2",
+            "--warmup=0",
+            "--routes",
+            "View Statuses",
+            "View Ticket",
+            "Logout",
+            stdout=out,
+        )
+        results = json.loads(out.getvalue())
+
+        self.assertEqual(results["seed"]["tickets"], 10)
+        self.assertEqual(
+            set(results["routes"]), {"View Statuses", "View Ticket", "Logout"}
+        )
+        view_ticket = results["routes"]["View Ticket"]
+        self.assertEqual(view_ticket["status_codes"], [200])
+        self.assertEqual(view_ticket["requests"], 2)
+        self.assertGreater(view_ticket["queries_max"], 0)
+        self.assertGreater(view_ticket["peak_memory_kb"], 0)
+        # The client logs in again after the logout page, so later pages are not redirected to login
+        self.assertEqual(results["routes"]["View Statuses"]["status_codes"], [200])
+
+    def test_bench_fails_on_regression(self):
+        baseline = {"routes": {"View Statuses": {"queries_max": 0, "p95_ms": 1000000}}}
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as file:
+            json.dump(baseline, file)
+        self.addCleanup(os.remove, file.name)
+
+        with self.assertRaisesMessage(CommandError, "View Statuses made"):
+            call_command(
+                "bench",
+                "--no-test-database",
+                "--tickets=5",
+                "--requests=1",
+                "--routes",
+                "View Statuses",
+                f"--baseline={file.name}",
+                stdout=StringIO(),
+            )
@@ -17,6 +17,13 @@ Markdown (2023) Python-Markdown 3.4.4 Documentation. Available at: https://pytho
 """
 
 from django.shortcuts import render, redirect
+from django.http import (
+    HttpResponse,
+    HttpResponseForbidden,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.urls import reverse
 from .forms import (
     NewUser,
     AddTicket,
@@ -24,14 +31,79 @@ from .forms import (
     AddTicketType,
     UpdateStatus,
     UpdateTicketType,
+    TicketFilter,
+    BulkUpdateTickets,
 )
 from django.contrib.auth import login, authenticate, logout
 from django.contrib import messages
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required, user_passes_test
-from .models import Ticket, Status, TicketType
+from .models import Ticket, Status, TicketType, TicketTombstone, BulkDeletion, Job
+from .pagination import paginate, clean_sort, SORT_KEYS
+from .search import MAX_SEARCH_PAGE, search_ticket_ids
+from .export import stream_export, EXPORT_FORMATS
+from .changes import (
+    CHANGES_LIMIT,
+    MAX_CHANGES_LIMIT,
+    CursorExpired,
+    get_ticket_changes,
+)
+from .caching import (
+    get_reference_data,
+    get_reference_version,
+    get_dashboard,
+    get_ticket_deletions_version,
+    get_ticket_counts,
+    invalidate_dashboards,
+)
+from .counters import recount_ticket_counts
+from .deletion import start_deletion
+from .metrics import collect_metrics, render_metrics
+from django.utils.crypto import constant_time_compare
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import BooleanField, Case, F, Max, Q, Value, When
+from django.conf import settings
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+from django.middleware.csrf import get_token
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
+from urllib.parse import urlencode
+import hashlib
 import markdown
+import os
+
+# The most tickets listed on the home page
+HOME_TICKET_LIMIT = 20
+
+
+def get_home_tickets(user_id: int) -> dict:
+    """
+    Gets the tickets shown on the home page of a user, which is cached for each user until a ticket
+    assigned to or unassigned from them changes. Only the tickets due soonest are shown, so the page
+    stays fast for a user assigned many tickets.
+
+    Parameters:
+        user_id (int): The id of the user
+
+    Returns:
+        (dict): The tickets due soonest, and if the user is assigned more tickets than are shown
+    """
+
+    def build():
+        # One ticket more than is shown is read, to find out if there are more
+        tickets = list(
+            Ticket.objects.filter(assignee=user_id)
+            .order_by(F("date_due").asc(nulls_last=True), "ticket_id")
+            .only("ticket_id", "ticket_title", "date_due")[: HOME_TICKET_LIMIT + 1]
+        )
+        return {
+            "tickets": tickets[:HOME_TICKET_LIMIT],
+            "has_more": len(tickets) > HOME_TICKET_LIMIT,
+        }
+
+    return get_dashboard(user_id, build)
 
 
 def HomePage(request):
@@ -46,20 +118,66 @@ def HomePage(request):
     """
 
     if request.user.is_authenticated:
-        tickets = Ticket.objects.filter(assignee=request.user.id)
+        home_tickets = get_home_tickets(request.user.id)
 
         return render(
             request,
             "myapp/home.html",
-            context={"tickets": tickets if tickets else None},
+            context={
+                "tickets": home_tickets["tickets"] or None,
+                "more_tickets_query": home_tickets["has_more"]
+                and urlencode({"assignee": request.user.username}),
+            },
         )
     return render(request, "myapp/home.html")
 
 
+README_PATH = settings.BASE_DIR / "README.md"
+
+# The rendered README, kept for the life of the process. It is only rendered again when the README
+# file is modified
+_readme_cache = {"mtime": None, "html": ""}
+
+
+def get_readme_html() -> str:
+    """
+    Gets the README.md of the application as HTML, rendering it with `markdown` only when the file has
+    changed since it was last rendered
+
+    Returns:
+        (str): The README as HTML
+    """
+    mtime = os.stat(README_PATH).st_mtime_ns
+
+    if _readme_cache["mtime"] != mtime:
+        # Markdown (2023) - START
+        html = markdown.markdown(README_PATH.read_text(encoding="utf-8"))
+        # Markdown (2023) - END
+        _readme_cache.update(mtime=mtime, html=html)
+
+    return _readme_cache["html"]
+
+
+def readme_etag(request) -> str:
+    """
+    Builds the ETag for the Readme page. The navbar on the page depends on the user, so the user is
+    included alongside the modification time of the README.
+
+    Parameters:
+        request: The webpage request
+
+    Returns:
+        (str): The ETag for the page
+    """
+    return f"{os.stat(README_PATH).st_mtime_ns}-{request.user.pk}"
+
+
+@condition(etag_func=readme_etag)
 def ReadmePage(request):
     """
     Renders the Readme page. Uses `markdown` to take the README.md of the application and generate
-    a HTML page.
+    a HTML page. The HTML is cached in memory and the page supports conditional requests, so the
+    README is only rendered again when it changes.
 
     Parameters:
         request: The webpage request
@@ -68,14 +186,147 @@ def ReadmePage(request):
         : Render of the webpage using the django template
 
     """
+    return render(
+        request, "myapp/readme.html", {"readme_html": mark_safe(get_readme_html())}
+    )
+
+
+def get_page_validators(request, get_version, *args, **kwargs) -> tuple:
+    """
+    Builds the ETag and last modified time of a page, which are kept on the request so the version of
+    the page is only looked up once. The page is rendered differently for each user and CSRF token, so
+    these are included in the ETag. Pending messages are shown once by the page, so a page with pending
+    messages has no validators and is always rendered.
+
+    Parameters:
+        request: The webpage request
+        get_version: Called with the arguments of the page, returns the last modified time of the page
+            and any other values the page depends on, or None if the page should always be rendered
+
+    Returns:
+        etag (str): The ETag of the page, None if it should always be rendered
+        last_modified (datetime): When the page was last modified, None if not known
+    """
+    if not hasattr(request, "_page_validators"):
+        version = None
+        if not len(messages.get_messages(request)):
+            version = get_version(*args, **kwargs)
+
+        if version is None:
+            request._page_validators = (None, None)
+        else:
+            last_modified, parts = version
+            # Creates the CSRF secret now if the page would otherwise create it while being rendered
+            get_token(request)
+            key = repr(
+                (
+                    request.user.pk,
+                    request.user.is_superuser,
+                    request.META.get("CSRF_COOKIE"),
+                    last_modified,
+                    parts,
+                )
+            )
+            request._page_validators = (
+                hashlib.md5(key.encode()).hexdigest(),
+                last_modified,
+            )
+    return request._page_validators
 
-    # Markdown (2023) - START
-    markdown.markdownFromFile(
-        input=r"README.md", output=r"myapp/templates/myapp/readme_contents.html"
+
+def conditional_page(get_version):
+    """
+    Makes a page answer conditional requests with 304 Not Modified when its version has not changed,
+    without rendering it. Browsers are told to check the version every time the page is loaded.
+
+    Parameters:
+        get_version: See `get_page_validators`
+
+    Returns:
+        : The decorator for the view
+    """
+
+    def etag(request, *args, **kwargs):
+        return get_page_validators(request, get_version, *args, **kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return get_page_validators(request, get_version, *args, **kwargs)[1]
+
+    def decorator(view):
+        return cache_control(private=True, no_cache=True)(
+            condition(etag_func=etag, last_modified_func=last_modified)(view)
+        )
+
+    return decorator
+
+
+def get_ticket_version(id: int):
+    """
+    Gets the version of the view ticket page
+
+    Parameters:
+        id (int): The id of the ticket
+
+    Returns:
+        : When the ticket was last modified, None if it does not exist
+    """
+    updated_at = (
+        Ticket.objects.filter(ticket_id=id).values_list("updated_at", flat=True).first()
     )
-    # Markdown (2023) - END
+    return updated_at and (updated_at, ())
+
+
+def get_ticket_list_version():
+    """
+    Gets the version of the view tickets page, from the latest time a ticket was modified or deleted,
+    which are read from the indexes on `updated_at` and `deleted_at` without scanning the tables, and the
+    version of the deleted tickets. Deleting the newest ticket would otherwise move the time back, so a
+    browser revalidating with only If-Modified-Since would keep showing it. The filter and bulk update
+    forms list the statuses and types, so the version of the reference data is also included.
 
-    return render(request, "myapp/readme.html")
+    Returns:
+        : When a ticket was last modified or deleted, and the deleted tickets and reference data versions
+    """
+    times = [
+        Ticket.objects.aggregate(last_modified=Max("updated_at"))["last_modified"],
+        TicketTombstone.objects.aggregate(last_deleted=Max("deleted_at"))[
+            "last_deleted"
+        ],
+    ]
+    last_modified = max((time for time in times if time is not None), default=None)
+    return last_modified, (get_ticket_deletions_version(), get_reference_version())
+
+
+def get_status_version(status_name: str):
+    """
+    Gets the version of the view status page from the cached Status, so no query is needed
+
+    Parameters:
+        status_name (str): The name of the Status
+
+    Returns:
+        : When the Status was last modified, None if it does not exist
+    """
+    try:
+        return get_cached_status(status_name).updated_at, ()
+    except Status.DoesNotExist:
+        return None
+
+
+def get_type_version(type_name: str):
+    """
+    Gets the version of the view type page from the cached TicketType, so no query is needed
+
+    Parameters:
+        type_name (str): The name of the TicketType
+
+    Returns:
+        : When the TicketType was last modified, None if it does not exist
+    """
+    try:
+        return get_cached_type(type_name).updated_at, ()
+    except TicketType.DoesNotExist:
+        return None
 
 
 def RegisterPage(request):
@@ -238,21 +489,230 @@ def can_user_update_ticket(request, ticket: Ticket) -> bool:
     Returns:
         (bool): Denotes if the user can update the ticket
     """
-    try:
-        return (
-            request.user.id == ticket.reporter_id
-            or request.user.is_superuser
-            or request.user.id == ticket.assignee.id
-        )
-    except:
-        # If the above fails, the application assumes that the user cannot edit this ticket. This is a failsafe to prevent unauthorised updating on an entry
+    user = request.user
+
+    # Anonymous users have no id, which would otherwise match a ticket with no assignee
+    if not user.is_authenticated:
         return False
 
+    return (
+        user.is_superuser
+        or user.id == ticket.reporter_id
+        or user.id == ticket.assignee_id
+    )
+
+
+def editable_tickets_filter(user) -> Q:
+    """
+    Builds the database filter matching the tickets a user can update. This applies the same rules as
+    `can_user_update_ticket`, so the check can be run by the database for many tickets at once.
+
+    Parameters:
+        user (User): The user updating the tickets
+
+    Returns:
+        (Q): The filter to apply to a Ticket queryset
+    """
+    if user.is_superuser:
+        return Q()
+    return Q(reporter_id=user.id) | Q(assignee_id=user.id)
+
+
+def annotate_can_update(queryset, user):
+    """
+    Adds a `can_update` column to a Ticket queryset, computed by the database, denoting if the user
+    can update each ticket
+
+    Parameters:
+        queryset (QuerySet): The tickets to annotate
+        user (User): The user viewing the tickets
+
+    Returns:
+        (QuerySet): The annotated queryset
+    """
+    if user.is_superuser:
+        return queryset.annotate(can_update=Value(True, output_field=BooleanField()))
+    return queryset.annotate(
+        can_update=Case(
+            When(editable_tickets_filter(user), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+    )
+
+
+def get_ticket_list_queryset():
+    """
+    Builds the queryset used to list tickets. The assignee, status and type of each ticket are
+    fetched in the same query using joins, and only the columns shown in the list are selected.
+
+    Returns:
+        (QuerySet): The tickets with their related entries
+    """
+    return Ticket.objects.select_related("assignee", "status", "type").only(
+        "ticket_id",
+        "ticket_title",
+        "date_reported",
+        "reporter_id",
+        "assignee__username",
+        "status__status_name",
+        "type__type_name",
+    )
+
+
+def get_ticket_detail_queryset():
+    """
+    Builds the queryset used to show a single ticket, fetching its status and type in the same query
+
+    Returns:
+        (QuerySet): The tickets with their related entries
+    """
+    return Ticket.objects.select_related("status", "type").only(
+        "ticket_id",
+        "ticket_title",
+        "ticket_info",
+        "reporter_id",
+        "assignee",
+        "status__status_name",
+        "type__type_name",
+    )
+
+
+def get_reporter_names(objects) -> dict:
+    """
+    Looks up the usernames of the users who reported a set of Tickets, Statuses or TicketTypes using a
+    single query, rather than one query per entry
+
+    Parameters:
+        objects: The entries whose reporters should be looked up
+
+    Returns:
+        (dict): Maps each reporter id to the username of that user
+    """
+    reporter_ids = {obj.reporter_id for obj in objects}
+    return dict(User.objects.filter(id__in=reporter_ids).values_list("id", "username"))
+
+
+def filter_ticket_list(request, queryset):
+    """
+    Applies the filters chosen on the ticket list to a Ticket queryset. These are the "only tickets I
+    can update" mode and the fields of the `TicketFilter` form. Invalid filters are ignored.
+
+    Parameters:
+        request: The webpage request, containing the filters in its query string
+        queryset (QuerySet): The tickets to filter
+
+    Returns:
+        queryset (QuerySet): The filtered tickets
+        filter_form (TicketFilter): The bound filter form
+    """
+    if request.GET.get("editable") == "1":
+        queryset = queryset.filter(editable_tickets_filter(request.user))
+
+    filter_form = TicketFilter(request.GET)
+    if filter_form.is_valid():
+        queryset = filter_form.filter(queryset)
+
+    return queryset, filter_form
+
+
+def page_query(request, **params) -> str:
+    """
+    Builds the query string for a link to another page of a list, keeping the other parameters
+    (such as the sort order) from the current request
+
+    Parameters:
+        request: The webpage request
+        **params: The parameters to set on the link. Parameters set to None are removed
+
+    Returns:
+        (str): The encoded query string
+    """
+    query = request.GET.copy()
+    for key in ("after", "before"):
+        query.pop(key, None)
+    for key, value in params.items():
+        if value is None:
+            query.pop(key, None)
+        else:
+            query[key] = value
+    return query.urlencode()
+
+
+def get_ticket_items(tickets, reporters: dict) -> list:
+    """
+    Builds the rows shown in a table of tickets
+
+    Parameters:
+        tickets: The tickets, from a queryset built by `get_ticket_list_queryset` and annotated by
+            `annotate_can_update`
+        reporters (dict): The reporter usernames, from `get_reporter_names`
+
+    Returns:
+        (list): A dictionary of the values shown for each ticket
+    """
+    return [
+        {
+            "ticket_id": ticket.ticket_id,
+            "ticket_title": ticket.ticket_title,
+            "assignee": ticket.assignee,
+            "reporter": reporters.get(ticket.reporter_id, "None"),
+            "type": ticket.type,
+            "status": ticket.status,
+            "date_reported": ticket.date_reported,
+            "can_update": ticket.can_update,
+        }
+        for ticket in tickets
+    ]
+
+
+def get_ticket_list_context(
+    request, page, sort: str, filter_form, reporters: dict
+) -> dict:
+    """
+    Builds the template context of the view tickets page
+
+    Parameters:
+        request: The webpage request
+        page (KeysetPage): The page of tickets being shown
+        sort (str): The sort key of the list
+        filter_form (TicketFilter): The bound filter form
+        reporters (dict): The reporter usernames, from `get_reporter_names`
+
+    Returns:
+        (dict): The context for the template
+    """
+    editable_only = request.GET.get("editable") == "1"
+
+    return {
+        "items": get_ticket_items(page.items, reporters),
+        "sort": sort,
+        "filter_form": filter_form,
+        "bulk_form": BulkUpdateTickets(),
+        "return_query": request.GET.urlencode(),
+        "editable_only": editable_only,
+        "export_queries": {
+            export_format: page_query(request, sort=None, format=export_format)
+            for export_format in EXPORT_FORMATS
+        },
+        "editable_query": page_query(request, editable=None if editable_only else "1"),
+        # Selecting the column the list is already sorted by reverses the order
+        "sort_queries": {
+            key: page_query(request, sort=f"-{key}" if sort == key else key)
+            for key in SORT_KEYS
+        },
+        "next_query": page.next_cursor and page_query(request, after=page.next_cursor),
+        "previous_query": page.previous_cursor
+        and page_query(request, before=page.previous_cursor),
+    }
+
 
 @login_required(login_url="/login")
+@conditional_page(get_ticket_list_version)
 def ViewTickets(request):
     """
-    Renders the view tickets page
+    Renders the view tickets page. The tickets are sorted and paginated by the database using keyset
+    pagination, so only a single page of tickets is loaded for each request.
 
     Parameters:
         request: The webpage request
@@ -260,36 +720,246 @@ def ViewTickets(request):
     Returns:
         : Render of the webpage using the django template
     """
-    items = []
+    sort = clean_sort(request.GET.get("sort"))
 
-    for ticket in Ticket.objects.all():
-        try:
-            reporter = User.objects.get(id=ticket.reporter_id).username
-        except:
-            reporter = "None"
-
-        can_update = can_user_update_ticket(request, ticket)
+    tickets, filter_form = filter_ticket_list(
+        request, annotate_can_update(get_ticket_list_queryset(), request.user)
+    )
+    if not filter_form.is_valid():
+        messages.error(request, "Invalid filter, showing all tickets.")
 
-        items.append(
-            {
-                "ticket_id": ticket.ticket_id,
-                "ticket_title": ticket.ticket_title,
-                "assignee": ticket.assignee,
-                "reporter": reporter,
-                "ticket_type": ticket.type,
-                "status": ticket.status,
-                "can_update": can_update,
-            }
+    try:
+        page = paginate(
+            tickets,
+            sort=sort,
+            after=request.GET.get("after"),
+            before=request.GET.get("before"),
         )
+    except ValueError as e:
+        messages.error(request, message=f"Error: {e}")
+        return redirect("View Tickets")
+
+    reporters = get_reporter_names(page.items)
 
     return render(
         request,
         "myapp/display_tickets.html",
-        {"items": sorted(items, key=lambda i: i["ticket_id"])},
+        get_ticket_list_context(request, page, sort, filter_form, reporters),
     )
 
 
 @login_required(login_url="/login")
+def SearchTickets(request):
+    """
+    Renders the search tickets page. The search uses the full text index of the database over the
+    ticket titles and info, with the best matches listed first.
+
+    Parameters:
+        request: The webpage request
+
+    Returns:
+        : Render of the webpage using the django template
+    """
+    query = request.GET.get("q", "")
+
+    try:
+        page_number = min(max(int(request.GET.get("page", 1)), 1), MAX_SEARCH_PAGE)
+    except ValueError:
+        page_number = 1
+
+    ticket_ids, has_next = search_ticket_ids(query, page=page_number)
+
+    tickets = annotate_can_update(get_ticket_list_queryset(), request.user).in_bulk(
+        ticket_ids
+    )
+    # Keep the order of the search results, dropping any tickets deleted since the search ran
+    ticket_list = [tickets[i] for i in ticket_ids if i in tickets]
+    reporters = get_reporter_names(ticket_list)
+
+    return render(
+        request,
+        "myapp/display_search.html",
+        {
+            "items": get_ticket_items(ticket_list, reporters),
+            "query": query,
+            "next_query": has_next and page_query(request, page=page_number + 1),
+            "previous_query": page_number > 1
+            and page_query(request, page=page_number - 1),
+        },
+    )
+
+
+# The most users suggested by the assignee autocomplete
+AUTOCOMPLETE_LIMIT = 10
+
+
+@login_required(login_url="/login")
+def AssigneeAutocomplete(request):
+    """
+    Suggests users to assign a ticket to, for the type-ahead assignee field of the ticket forms. Users are
+    matched on the start of their username, first name or last name, which is supported by the user
+    search indexes on PostgreSQL, and only the first few matches are returned.
+
+    Parameters:
+        request: The webpage request, with the text typed so far as `q`
+
+    Returns:
+        : JSON response listing the username and full name of each matching user
+    """
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return JsonResponse({"results": []})
+
+    users = (
+        User.objects.filter(
+            Q(username__istartswith=query)
+            | Q(first_name__istartswith=query)
+            | Q(last_name__istartswith=query),
+            is_active=True,
+        )
+        .order_by("username")
+        .values("username", "first_name", "last_name")[:AUTOCOMPLETE_LIMIT]
+    )
+
+    return JsonResponse(
+        {
+            "results": [
+                {
+                    "username": user["username"],
+                    "name": f"{user['first_name']} {user['last_name']}".strip(),
+                }
+                for user in users
+            ]
+        }
+    )
+
+
+@login_required(login_url="/login")
+def TicketChanges(request):
+    """
+    Lists the tickets created, updated or deleted since a cursor as JSON, for clients that keep a copy of
+    the tickets up to date by polling. A client first calls this without a cursor to load every ticket,
+    then passes the returned cursor to each following call.
+
+    Parameters:
+        request: The webpage request, with the cursor as `since` and the most changes to return as `limit`
+
+    Returns:
+        : JSON response with the changes, the cursor for the next call and if there are more changes
+    """
+    try:
+        limit = min(
+            max(int(request.GET.get("limit", CHANGES_LIMIT)), 1), MAX_CHANGES_LIMIT
+        )
+    except ValueError:
+        limit = CHANGES_LIMIT
+
+    try:
+        changes = get_ticket_changes(request.GET.get("since"), limit)
+    except CursorExpired as e:
+        return JsonResponse({"error": f"Error: {e}"}, status=410)
+    except ValueError as e:
+        return JsonResponse({"error": f"Error: {e}"}, status=400)
+
+    return JsonResponse(changes)
+
+
+@login_required(login_url="/login")
+def ExportTickets(request):
+    """
+    Streams an export of the tickets as CSV or newline delimited JSON, applying the same filters as the
+    view tickets page. The tickets are read from the database in chunks as the response is sent, so the
+    export does not need to fit in memory.
+
+    Parameters:
+        request: The webpage request
+
+    Returns:
+        : The streamed export, or a redirect to the view tickets page if the filters are invalid
+    """
+    export_format = request.GET.get("format", "csv")
+    tickets, filter_form = filter_ticket_list(request, Ticket.objects.all())
+
+    if export_format not in EXPORT_FORMATS or not filter_form.is_valid():
+        messages.error(request, "Invalid export, please check the filters and format.")
+        return redirect("View Tickets")
+
+    content_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    response = StreamingHttpResponse(
+        stream_export(tickets, export_format), content_type=content_type
+    )
+    response["Content-Disposition"] = f'attachment; filename="tickets.{export_format}"'
+    return response
+
+
+@require_POST
+@login_required(login_url="/login")
+def BulkUpdateTicketsPage(request):
+    """
+    Applies a change of status, type or assignee to the tickets selected on the view tickets page.
+    The change is made with a single UPDATE, which only matches the selected tickets that the user can
+    update, so the permission check is also done by the database.
+
+    Parameters:
+        request: The webpage request
+
+    Returns:
+        : Redirect to the view tickets page
+    """
+    return_url = f"{reverse('View Tickets')}?{request.POST.get('return_query', '')}"
+
+    try:
+        ticket_ids = {int(i) for i in request.POST.getlist("ticket_ids")}
+    except ValueError:
+        ticket_ids = set()
+
+    if not ticket_ids:
+        messages.error(request, "Please select the tickets to update.")
+        return redirect(return_url)
+
+    form = BulkUpdateTickets(request.POST)
+    if not form.is_valid():
+        for error in form.errors.values():
+            messages.error(request, error.as_text())
+        return redirect(return_url)
+
+    tickets = Ticket.objects.filter(ticket_id__in=ticket_ids).filter(
+        editable_tickets_filter(request.user)
+    )
+    changes = form.get_changes()
+
+    with transaction.atomic():
+        # The update does not send signals, so the home pages of the users the tickets are moved between
+        # and the ticket counts of the statuses and types they are moved between are updated here
+        before = list(tickets.values_list("assignee_id", "status_id", "type_id"))
+        updated = tickets.update(**changes, updated_at=timezone.now())
+
+        if "status" in changes or "type" in changes:
+            # Moving tickets between statuses can also change the open tickets of their types
+            status_ids = set()
+            type_ids = {row[2] for row in before}
+            if "status" in changes:
+                status_ids = {row[1] for row in before} | {changes["status"].pk}
+            if "type" in changes:
+                type_ids.add(changes["type"].pk)
+            recount_ticket_counts(status_ids, type_ids)
+
+    if "assignee" in changes:
+        invalidate_dashboards(
+            {row[0] for row in before} | {getattr(changes["assignee"], "id", None)}
+        )
+
+    messages.success(request, f"{updated} tickets updated")
+    if updated < len(ticket_ids):
+        messages.error(
+            request,
+            f"{len(ticket_ids) - updated} tickets were not updated, as they do not exist or you cannot update them.",
+        )
+    return redirect(return_url)
+
+
+@login_required(login_url="/login")
+@conditional_page(get_ticket_version)
 def ViewTicket(request, id: int):
     """
     Renders the view ticket page
@@ -302,7 +972,7 @@ def ViewTicket(request, id: int):
     """
 
     try:
-        ticket = Ticket.objects.get(ticket_id=id)
+        ticket = get_ticket_detail_queryset().get(ticket_id=id)
     except Exception as e:
         messages.error(request, message=f"Error: {e}")
         return redirect("View Tickets")
@@ -329,6 +999,101 @@ def can_user_update(request, object) -> bool:
     return request.user.id == object.reporter_id or request.user.is_superuser
 
 
+def get_cached_statuses() -> tuple:
+    """
+    Gets all Statuses and the names of their reporters from the cache, querying the database when they
+    are not cached. Whether the user can update each Status is not cached, as it differs between users.
+
+    Returns:
+        statuses (list): The Statuses, ordered by name
+        reporters (dict): Maps the id of each reporter to their username
+    """
+
+    def build():
+        statuses = list(Status.objects.order_by("status_name"))
+        return statuses, get_reporter_names(statuses)
+
+    return get_reference_data("statuses", build)
+
+
+def get_cached_ticket_counts() -> dict:
+    """
+    Gets the ticket counts stored on each Status and TicketType from the cache, reading them from the
+    database when they are not cached. The counts are cached separately from the Statuses and
+    TicketTypes, as they change whenever a ticket is saved.
+
+    Returns:
+        (dict): Maps the name of each Status to its number of tickets under "statuses", and the name of
+            each TicketType to its number of tickets and open tickets under "types"
+    """
+
+    def build():
+        return {
+            "statuses": dict(Status.objects.values_list("status_name", "ticket_count")),
+            "types": {
+                type_name: (tickets, open_tickets)
+                for type_name, tickets, open_tickets in TicketType.objects.values_list(
+                    "type_name", "ticket_count", "open_ticket_count"
+                )
+            },
+        }
+
+    return get_ticket_counts(build)
+
+
+def get_cached_status(status_name: str) -> Status:
+    """
+    Gets a Status from the cache, querying the database when it is not cached
+
+    Parameters:
+        status_name (str): The name of the Status
+
+    Returns:
+        (Status): The Status
+
+    Raises:
+        Status.DoesNotExist: If there is no Status with the name, which is not cached
+    """
+    return get_reference_data(
+        "status", lambda: Status.objects.get(status_name=status_name), status_name
+    )
+
+
+def get_cached_types() -> tuple:
+    """
+    Gets all TicketTypes and the names of their reporters from the cache, querying the database when
+    they are not cached
+
+    Returns:
+        ticket_types (list): The TicketTypes, ordered by name
+        reporters (dict): Maps the id of each reporter to their username
+    """
+
+    def build():
+        ticket_types = list(TicketType.objects.order_by("type_name"))
+        return ticket_types, get_reporter_names(ticket_types)
+
+    return get_reference_data("types", build)
+
+
+def get_cached_type(type_name: str) -> TicketType:
+    """
+    Gets a TicketType from the cache, querying the database when it is not cached
+
+    Parameters:
+        type_name (str): The name of the TicketType
+
+    Returns:
+        (TicketType): The TicketType
+
+    Raises:
+        TicketType.DoesNotExist: If there is no TicketType with the name, which is not cached
+    """
+    return get_reference_data(
+        "type", lambda: TicketType.objects.get(type_name=type_name), type_name
+    )
+
+
 @login_required(login_url="/login")
 def ViewStatuses(request):
     """
@@ -341,12 +1106,12 @@ def ViewStatuses(request):
         : Render of the webpage using the django template
     """
     items = []
+    statuses, reporters = get_cached_statuses()
+    counts = get_cached_ticket_counts()["statuses"]
 
-    for status in Status.objects.all():
-        try:
-            reporter = User.objects.get(id=status.reporter_id).username
-        except:
-            reporter = "None"
+    for status in statuses:
+        reporter = reporters.get(status.reporter_id, "None")
+        tickets = counts.get(status.status_name, 0)
 
         can_update = can_user_update(request, status)
 
@@ -354,17 +1119,21 @@ def ViewStatuses(request):
             {
                 "status_name": status.status_name,
                 "reporter": reporter,
+                "is_closed": status.is_closed,
+                "tickets": tickets,
+                "open_tickets": 0 if status.is_closed else tickets,
                 "can_update": can_update,
             }
         )
     return render(
         request,
         "myapp/display_statuses.html",
-        {"items": sorted(items, key=lambda i: i["status_name"])},
+        {"items": items},
     )
 
 
 @login_required(login_url="/login")
+@conditional_page(get_status_version)
 def ViewStatus(request, status_name):
     """
     Renders the view status page
@@ -381,7 +1150,7 @@ def ViewStatus(request, status_name):
         pass
 
     try:
-        status = Status.objects.get(status_name=status_name)
+        status = get_cached_status(status_name)
     except Exception as e:
         messages.error(request, message=f"Error: {e}")
         return redirect("View Statuses")
@@ -407,12 +1176,12 @@ def ViewTypes(request):
     # types = TicketType.objects.all()
     # return render(request, "myapp/display_types.html", {"types": types})
     items = []
+    ticket_types, reporters = get_cached_types()
+    counts = get_cached_ticket_counts()["types"]
 
-    for ticket_type in TicketType.objects.all():
-        try:
-            reporter = User.objects.get(id=ticket_type.reporter_id).username
-        except:
-            reporter = "None"
+    for ticket_type in ticket_types:
+        reporter = reporters.get(ticket_type.reporter_id, "None")
+        tickets, open_tickets = counts.get(ticket_type.type_name, (0, 0))
 
         can_update = can_user_update(request, ticket_type)
 
@@ -420,6 +1189,8 @@ def ViewTypes(request):
             {
                 "type_name": ticket_type.type_name,
                 "reporter": reporter,
+                "tickets": tickets,
+                "open_tickets": open_tickets,
                 "can_update": can_update,
             }
         )
@@ -427,11 +1198,12 @@ def ViewTypes(request):
     return render(
         request,
         "myapp/display_types.html",
-        {"items": sorted(items, key=lambda i: i["type_name"])},
+        {"items": items},
     )
 
 
 @login_required(login_url="/login")
+@conditional_page(get_type_version)
 def ViewType(request, type_name):
     """
     Renders the view type page
@@ -448,7 +1220,7 @@ def ViewType(request, type_name):
         pass
 
     try:
-        type = TicketType.objects.get(type_name=type_name)
+        type = get_cached_type(type_name)
     except Exception as e:
         messages.error(request, message=f"Error: {e}")
         return redirect("View Types")
@@ -473,7 +1245,7 @@ def UpdateTicket(request, id):
     """
 
     try:
-        ticket = Ticket.objects.get(ticket_id=id)
+        ticket = Ticket.objects.select_related("assignee").get(ticket_id=id)
     except Exception as e:
         messages.error(request, message=f"Error: {e}")
         return redirect("View Tickets")
@@ -627,6 +1399,15 @@ def DeleteStatus(request, status_name):
 
     if request.method == "POST":
         if "delete" in request.POST:
+            if status.ticket_count:
+                # The tickets using the status are deleted in the background, in batches
+                deletion = start_deletion("Status", status, request.user)
+                messages.success(
+                    request,
+                    message=f"Deleting Status, {status_name}, and its {deletion.total} tickets",
+                )
+                return redirect("View Deletion", id=deletion.id)
+
             status.delete()
             messages.success(request, message=f"Status, {status_name}, deleted")
 
@@ -635,7 +1416,11 @@ def DeleteStatus(request, status_name):
     return render(
         request,
         "myapp/delete_object.html",
-        context={"model_name": "Status", "object_id": status.status_name},
+        context={
+            "model_name": "Status",
+            "object_id": status.status_name,
+            "ticket_count": status.ticket_count,
+        },
     )
 
 
@@ -659,6 +1444,15 @@ def DeleteTicketType(request, type_name):
 
     if request.method == "POST":
         if "delete" in request.POST:
+            if type.ticket_count:
+                # The tickets using the type are deleted in the background, in batches
+                deletion = start_deletion("Ticket Type", type, request.user)
+                messages.success(
+                    request,
+                    message=f"Deleting Type, {type_name}, and its {deletion.total} tickets",
+                )
+                return redirect("View Deletion", id=deletion.id)
+
             type.delete()
             messages.success(request, message=f"Type, {type_name}, deleted")
 
@@ -667,5 +1461,95 @@ def DeleteTicketType(request, type_name):
     return render(
         request,
         "myapp/delete_object.html",
-        context={"model_name": "Ticket Type", "object_id": type.type_name},
+        context={
+            "model_name": "Ticket Type",
+            "object_id": type.type_name,
+            "ticket_count": type.ticket_count,
+        },
+    )
+
+
+@user_passes_test(lambda user: user.is_superuser)
+def ViewDeletion(request, id: int):
+    """
+    Renders the progress of a Status or Ticket Type being deleted in the background
+
+    Parameters:
+        request: The webpage request
+        id (int): The id of the deletion
+
+    Returns:
+        : Render of the webpage using the django template
+    """
+    try:
+        deletion = BulkDeletion.objects.get(id=id)
+    except Exception as e:
+        messages.error(request, message=f"Error: {e}")
+        return redirect("Home")
+
+    return render(request, "myapp/display_deletion.html", {"deletion": deletion})
+
+
+# The most jobs listed on the jobs page
+JOB_LIST_LIMIT = 50
+
+
+@user_passes_test(lambda user: user.is_superuser)
+def ViewJobs(request):
+    """
+    Renders the jobs page, listing the most recently queued background jobs
+
+    Parameters:
+        request: The webpage request
+
+    Returns:
+        : Render of the webpage using the django template
+    """
+    jobs = list(Job.objects.order_by("-id")[:JOB_LIST_LIMIT])
+    return render(request, "myapp/display_jobs.html", {"jobs": jobs})
+
+
+@user_passes_test(lambda user: user.is_superuser)
+def ViewJob(request, id: int):
+    """
+    Renders the status of a background job
+
+    Parameters:
+        request: The webpage request
+        id (int): The id of the job
+
+    Returns:
+        : Render of the webpage using the django template
+    """
+    try:
+        job = Job.objects.get(id=id)
+    except Exception as e:
+        messages.error(request, message=f"Error: {e}")
+        return redirect("View Jobs")
+
+    return render(request, "myapp/display_job.html", {"job": job})
+
+
+def Metrics(request):
+    """
+    Renders the request metrics of every process in the Prometheus text format. The page can be viewed
+    by admin users, or with the METRICS_TOKEN as a bearer token.
+
+    Parameters:
+        request: The webpage request
+
+    Returns:
+        : The metrics as plain text, or a 403 response
+    """
+    token = settings.METRICS_TOKEN
+    has_token = bool(token) and constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    )
+
+    if not (has_token or request.user.is_superuser):
+        return HttpResponseForbidden("You cannot view the metrics.")
+
+    return HttpResponse(
+        render_metrics(collect_metrics()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
     )